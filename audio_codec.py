@@ -0,0 +1,79 @@
+import io
+import wave
+import logging
+import subprocess
+
+from workers import codec_workers
+from metrics import timed
+
+try:
+    import av  # PyAV: in-process libavcodec/libswresample
+except ImportError:
+    av = None
+
+TARGET_RATE = 16000
+
+
+def decode_to_pcm16(data, rate=TARGET_RATE):
+    """Decode browser audio (WebM/Opus, Ogg, WAV, ...) to 16-bit mono PCM bytes at `rate`.
+
+    `data` is a bytes-like buffer, or a file path for uploads that were spilled to disk.
+    Runs in-process with PyAV when it is installed; otherwise streams the bytes
+    through ffmpeg over pipes.
+    """
+    with timed("decode", decoder="av" if av is not None else "ffmpeg"):
+        if av is not None:
+            # libav decodes in C without yielding to the event loop
+            return codec_workers.run(_decode_with_av, data, rate)
+        return codec_workers.run_green(_decode_with_ffmpeg, data, rate)
+
+
+def _decode_with_av(data, rate):
+    resampler = av.AudioResampler(format="s16", layout="mono", rate=rate)
+    pcm = bytearray()
+
+    def append(frames):
+        for frame in frames:
+            # Packed s16 mono: one plane, 2 bytes per sample (plane buffers can be padded)
+            pcm.extend(bytes(frame.planes[0])[:frame.samples * 2])
+
+    source = data if isinstance(data, str) else io.BytesIO(data)
+    with av.open(source, mode="r") as container:
+        stream = container.streams.audio[0]
+        for frame in container.decode(stream):
+            append(resampler.resample(frame))
+    append(resampler.resample(None))  # flush buffered samples
+    return bytes(pcm)
+
+
+def _decode_with_ffmpeg(data, rate):
+    from_file = isinstance(data, str)
+    cmd = ["ffmpeg", "-loglevel", "error", "-i", data if from_file else "pipe:0",
+           "-ar", str(rate), "-ac", "1", "-f", "s16le", "pipe:1"]
+    try:
+        proc = subprocess.run(cmd, input=None if from_file else bytes(data),
+                              stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+    except subprocess.CalledProcessError as e:
+        logging.error(f"ffmpeg conversion failed: {e.stderr.decode(errors='ignore').strip()}")
+        raise
+    return proc.stdout
+
+
+def pcm16_to_wav(pcm, rate=TARGET_RATE):
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(pcm)
+    return buf.getvalue()
+
+
+def pcm16_duration(pcm, rate=TARGET_RATE):
+    return len(pcm) / 2.0 / rate
+
+
+def wav_to_pcm16(data):
+    """Raw PCM bytes and sample rate of a 16-bit mono WAV buffer (e.g. Riff16Khz16BitMonoPcm TTS output)."""
+    with wave.open(io.BytesIO(data), "rb") as wf:
+        return wf.readframes(wf.getnframes()), wf.getframerate()
@@ -0,0 +1,101 @@
+import re
+import json
+import logging
+from collections import namedtuple
+
+from llm_cache import verdict_cache, make_key
+from workers import PoolSaturated
+
+# One pending yes/no check; `key` identifies it in the batch (normally the field key)
+BatchCheck = namedtuple("BatchCheck", ["key", "label", "system_prompt", "text", "params"])
+
+BATCH_SYSTEM_PROMPT = (
+    "You are an English teacher grading several independent checks at once. "
+    "Each check has its own instructions and a student's text. Answer every check with 'Yes' or 'No' "
+    "exactly as its instructions ask. Respond only with a JSON object mapping each check number to "
+    "\"Yes\" or \"No\", for example {\"1\": \"Yes\", \"2\": \"No\"}."
+)
+
+_JSON_OBJECT = re.compile(r"\{.*\}", re.S)
+
+
+def _batch_message(checks):
+    parts = []
+    for i, check in enumerate(checks, start=1):
+        parts.append(f"Check {i}:\nInstructions: {check.system_prompt}\nStudent text: \"{check.text}\"")
+    return "\n\n".join(parts)
+
+
+def _parse_verdicts(text, count):
+    match = _JSON_OBJECT.search(text or "")
+    if not match:
+        return {}
+    try:
+        raw = json.loads(match.group(0))
+    except ValueError:
+        return {}
+    verdicts = {}
+    for i in range(1, count + 1):
+        answer = raw.get(str(i))
+        if isinstance(answer, str):
+            verdicts[i] = "yes" in answer.lower()
+    return verdicts
+
+
+def _single_key(check):
+    return make_key(check.label, check.system_prompt, check.text, check.params)
+
+
+def _batch_key(check):
+    # Batched answers come from BATCH_SYSTEM_PROMPT, not the check's own prompt, so they are
+    # stored apart and never overwrite (or stand in for) a single-prompt verdict
+    return make_key(f"batch:{check.label}", check.system_prompt, check.text, check.params)
+
+
+def evaluate_yes_no_batch(chat, checks, fallback):
+    """Resolve yes/no checks with at most one structured LLM round-trip.
+
+    Cached verdicts are used first: a single-prompt verdict, else an earlier
+    batched one for the same check. A single remaining check, or any check
+    the batched reply did not answer, goes through `fallback(check)`.
+    Returns {check.key: bool}.
+    """
+    results = {}
+    pending = []
+    for check in checks:
+        cached = verdict_cache.get(_single_key(check))
+        if cached is None:
+            cached = verdict_cache.get(_batch_key(check))
+        if cached is not None:
+            results[check.key] = cached
+        else:
+            pending.append(check)
+
+    if len(pending) == 1:
+        results[pending[0].key] = fallback(pending[0])
+        return results
+    if not pending:
+        return results
+
+    verdicts = {}
+    try:
+        resp = chat(
+            chat_history=[{"role": "system", "message": BATCH_SYSTEM_PROMPT}],
+            message=_batch_message(pending),
+            temperature=0.2,
+            max_tokens=16 + 8 * len(pending)
+        )
+        verdicts = _parse_verdicts(resp.text, len(pending))
+        logging.info(f"Batch validation of {len(pending)} checks: {verdicts}")
+    except PoolSaturated:
+        raise
+    except Exception as e:
+        logging.error(f"Batch validation failed, falling back to single checks: {e}")
+
+    for i, check in enumerate(pending, start=1):
+        if i in verdicts:
+            results[check.key] = verdicts[i]
+            verdict_cache.put(_batch_key(check), verdicts[i])
+        else:
+            results[check.key] = fallback(check)
+    return results
@@ -0,0 +1,116 @@
+from config_registry import config_registry
+from local_rules import rules as local_rules
+from similarity import missed_words
+
+
+class Behavior:
+    """How one `llm_behavior` is handled.
+
+    `handler` is a runner method name or a function(runner, field, text).
+    Validators (`scored=True`) return a verdict that the runner records with
+    `_set_result`; other handlers return the value to store for the field.
+    `args` picks what a validator method receives: "text_field", "text" or
+    "text_expected". A validator with a local rule (registered under the same
+    name) is judged by it first and only reaches the runner method when the
+    rule is unsure. Batchable behaviors name their batch label and the runner
+    method that builds their yes/no prompt.
+    """
+
+    def __init__(self, name, handler, args="text_field", scored=True, batch_label=None, batch_prompt=None):
+        self.name = name
+        self.handler = handler
+        self.args = args
+        self.scored = scored
+        self.batch_label = batch_label
+        self.batch_prompt = batch_prompt
+
+    @property
+    def local_rule(self):
+        return local_rules.has_rule(self.name)
+
+    def __call__(self, runner, field, text):
+        if callable(self.handler):
+            return self.handler(runner, field, text)
+        method = getattr(runner, self.handler)
+        if not self.scored:
+            return method(field, text)
+
+        verdict = local_rules.check(self.name, text, field) if self.local_rule else None
+        if verdict is None:
+            verdict = self._validate(method, field, text)
+        runner._set_result(field, verdict)
+        return text
+
+    def _validate(self, method, field, text):
+        if self.args == "text":
+            return method(text)
+        if self.args == "text_expected":
+            return method(text, field.get("expected"))
+        return method(text, field)
+
+    def __repr__(self):
+        return f"<Behavior {self.name}>"
+
+
+class BehaviorRegistry:
+    def __init__(self):
+        self._behaviors = {}
+
+    def register(self, name, handler, **meta):
+        self._behaviors[name] = Behavior(name, handler, **meta)
+        return self._behaviors[name]
+
+    def get(self, name):
+        return self._behaviors.get(name)
+
+    def __contains__(self, name):
+        return name in self._behaviors
+
+    def names(self):
+        return sorted(self._behaviors)
+
+
+behaviors = BehaviorRegistry()
+
+
+def _pronunciation(runner, field, text):
+    expected_text = field.get("expected")
+    if expected_text:
+        result, score = runner.validate_pronunciation(expected_text, text)
+        runner.filled_fields[f"{field['key']}_pron_score"] = round(score, 2)
+        runner.filled_fields[f"{field['key']}_pron_result"] = result
+        runner.filled_fields[f"{field['key']}_missed_words"] = missed_words(expected_text, text)
+        runner._set_result(field, result == "PASS")
+    return text
+
+
+behaviors.register("extract_value", "_extract_value", scored=False)
+behaviors.register("acknowledge", "_acknowledge", scored=False)
+behaviors.register("validate_pronunciation", _pronunciation)
+
+behaviors.register("validate_svo", "validate_svo_pattern", batch_label="SVO", batch_prompt="_svo_prompt")
+behaviors.register("validate_clause_expansion", "validate_clause_expansion",
+                   batch_label="Clause expansion", batch_prompt="_clause_expansion_prompt")
+behaviors.register("yesno_question_check", "validate_yesno_question", args="text",
+                   batch_label="Yes/No question", batch_prompt="_yesno_question_prompt")
+behaviors.register("negative_sentence_check", "validate_negative_sentence", args="text",
+                   batch_label="Negative sentence", batch_prompt="_negative_sentence_prompt")
+
+behaviors.register("validate_stress_pattern", "validate_stress_pattern", args="text_expected")
+behaviors.register("validate_rising_intonation", "validate_rising_intonation")
+behaviors.register("validate_falling_intonation", "validate_falling_intonation")
+behaviors.register("validate_family_answers", "validate_family_answer")
+behaviors.register("validate_command", "validate_command_sentence")
+
+for _name in (
+    "validate_adjective_description", "validate_modal_verb_usage", "validate_first_conditional",
+    "validate_phrasal_verb", "validate_place_description", "validate_contextual_dialogue",
+    "validate_synonym_antonym", "validate_meaningful_response_strict", "validate_mindmap_ideas",
+    "validate_grammar_correction", "validate_passive_voice", "validate_reported_speech",
+    "validate_discourse_marker", "validate_debate_response", "validate_comparative_expression",
+    "validate_past_tense_response",
+):
+    behaviors.register(_name, _name)
+
+# Compiled configs carry their handlers, so runners never look behaviors up by string per answer
+config_registry.set_behavior_resolver(behaviors.get)
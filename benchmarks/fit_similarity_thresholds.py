@@ -0,0 +1,126 @@
+"""Refit the PASS/RETRY cut-offs in similarity.py against the difflib ratio they replaced.
+
+Builds learner-like attempts at the configs' sentences by applying 0..N random
+edits (dropped words, mispronounced words, wrong words, fillers, homophones),
+scores each attempt with the old metric (difflib ratio over the normalized,
+space-free text) and with similarity.compare(), and for every old cut-off picks
+the new one whose pass/fail decisions agree best with the old ones. Candidates
+within --tolerance of the best agreement are broken by the closest pass rate.
+
+    python benchmarks/fit_similarity_thresholds.py
+
+Pronunciation uses the `expected` sentences of validate_pronunciation fields;
+summaries, which are longer, use config prompts of 10+ words as stand-ins.
+"""
+import os
+import sys
+import json
+import random
+import difflib
+import argparse
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from similarity import compare  # noqa: E402
+
+CONFIG_DIR = os.path.join(REPO_DIR, "configs")
+SUBSTITUTES = ["thing", "go", "have", "very", "good", "make"]
+FILLERS = ["um", "uh", "like", "the", "a"]
+HOMOPHONES = {"to": "two", "there": "their", "your": "you're", "see": "sea", "know": "no"}
+
+# mode -> (old cut-offs in use before the phoneme score, max edits per attempt, attempts per edit count)
+MODES = {
+    "pronunciation": ((0.85, 0.70), 6, 200),
+    "summary": ((0.90, 0.80), 12, 3),
+}
+
+
+def load_references(mode):
+    texts = set()
+    for root, _, names in os.walk(CONFIG_DIR):
+        for name in names:
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(root, name), "r") as f:
+                    config = json.load(f)
+            except ValueError:
+                continue
+            for field in config.get("fields", []):
+                if mode == "pronunciation" and isinstance(field.get("expected"), str):
+                    texts.add(field["expected"])
+                prompt = field.get("prompt")
+                if mode == "summary" and isinstance(prompt, str) and len(prompt.split()) >= 10:
+                    texts.add(prompt)
+    return sorted(texts)
+
+
+def mispronounce(word, rng):
+    if len(word) < 2:
+        return word
+    i = rng.randrange(len(word))
+    pool = "aeiou" if word[i] in "aeiou" else "bcdfghklmnprstvw"
+    return word[:i] + rng.choice(pool) + word[i + 1:]
+
+
+def perturb(text, edits, rng):
+    words = text.split()
+    for _ in range(edits):
+        if not words:
+            break
+        op = rng.choice(["drop", "mis", "mis", "sub", "ins", "homo"])
+        i = rng.randrange(len(words))
+        if op == "drop" and len(words) > 1:
+            del words[i]
+        elif op == "mis":
+            words[i] = mispronounce(words[i], rng)
+        elif op == "sub":
+            words[i] = rng.choice(SUBSTITUTES)
+        elif op == "ins":
+            words.insert(i, rng.choice(FILLERS))
+        elif op == "homo":
+            words[i] = HOMOPHONES.get(words[i].lower(), words[i])
+    return " ".join(words)
+
+
+def old_score(expected, spoken):
+    normalize = lambda s: "".join(s.lower().strip().split())
+    return difflib.SequenceMatcher(None, normalize(expected), normalize(spoken)).ratio()
+
+
+def fit(rows, old_cut, tolerance):
+    """(new cut-off, agreement, old pass rate, new pass rate) for one old cut-off."""
+    old_rate = sum(o >= old_cut for o, _ in rows) / len(rows)
+    scored = []
+    for cut in (x / 100 for x in range(40, 100)):
+        agreement = sum((o >= old_cut) == (n >= cut) for o, n in rows) / len(rows)
+        scored.append((cut, agreement, sum(n >= cut for _, n in rows) / len(rows)))
+    best = max(a for _, a, _ in scored)
+    cut, agreement, new_rate = min((s for s in scored if s[1] >= best - tolerance), key=lambda s: abs(s[2] - old_rate))
+    return cut, agreement, old_rate, new_rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refit similarity.py pass/retry cut-offs")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--tolerance", type=float, default=0.005, help="Agreement within this of the best counts as a tie")
+    args = parser.parse_args()
+
+    for mode, (old_cuts, max_edits, per_edit) in MODES.items():
+        rng = random.Random(args.seed)
+        references = load_references(mode)
+        rows = []
+        for text in references:
+            for edits in range(max_edits):
+                for _ in range(per_edit):
+                    spoken = perturb(text, edits, rng)
+                    rows.append((old_score(text, spoken), compare(text, spoken).score))
+        print(f"{mode}: {len(references)} references, {len(rows)} attempts")
+        for old_cut in old_cuts:
+            cut, agreement, old_rate, new_rate = fit(rows, old_cut, args.tolerance)
+            print(f"  {old_cut:.2f} -> {cut:.2f}  agreement {agreement:.3f}  pass rate {old_rate:.3f} -> {new_rate:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+"""Concurrent-learner load test for server.py.
+
+Starts server.py on the fake LLM/speech providers (or targets --url), runs
+learners that each connect over Socket.IO, start a sampled module, and
+answer every field via /transcribe and /submit-response until the closing
+event. Latency percentiles, sessions/sec and server CPU/RSS are written as
+JSON under benchmarks/results/.
+
+    python benchmarks/load_test.py --learners 20 --sessions 200
+    python benchmarks/load_test.py --compare benchmarks/results/<earlier>.json
+"""
+import io
+import os
+import sys
+import json
+import math
+import time
+import wave
+import queue
+import random
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import socketio
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(REPO_DIR, "benchmarks", "results")
+EVENT_TIMEOUT = 60  # seconds to wait for a ui_event before a session counts as failed
+
+
+def speech_wav(seconds=1.5, rate=16000):
+    """A voiced, speech-like clip (gliding harmonic tone in syllable bursts) that passes the server's VAD."""
+    frames = bytearray()
+    phase = 0.0
+    silence = int(0.3 * rate)
+    frames.extend(b"\x00\x00" * silence)
+    for n in range(int(seconds * rate)):
+        t = n / rate
+        f0 = 140 + 40 * t / seconds
+        phase += 2 * math.pi * f0 / rate
+        envelope = abs(math.sin(math.pi * t * 4))
+        value = sum(math.sin(k * phase) / k for k in range(1, 5)) * 6000 * envelope
+        frames.extend(int(value).to_bytes(2, "little", signed=True))
+    frames.extend(b"\x00\x00" * silence)
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(bytes(frames))
+    return buf.getvalue()
+
+
+class Recorder:
+    """Thread-safe latency samples per endpoint plus session outcomes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {}
+        self.statuses = {}
+        self.sessions_ok = 0
+        self.sessions_failed = 0
+        self.errors = {}
+
+    def add(self, name, seconds, status=None):
+        with self._lock:
+            self.samples.setdefault(name, []).append(seconds)
+            if status is not None:
+                counts = self.statuses.setdefault(name, {})
+                counts[str(status)] = counts.get(str(status), 0) + 1
+
+    def session_done(self, ok, error=None):
+        with self._lock:
+            if ok:
+                self.sessions_ok += 1
+            else:
+                self.sessions_failed += 1
+                self.errors[error] = self.errors.get(error, 0) + 1
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    index = min(int(math.ceil(q / 100 * len(sorted_values))) - 1, len(sorted_values) - 1)
+    return sorted_values[max(index, 0)]
+
+
+def summarize(values):
+    values = sorted(values)
+    ms = lambda v: round(v * 1000, 1) if v is not None else None
+    return {
+        "count": len(values),
+        "mean_ms": ms(sum(values) / len(values)) if values else None,
+        "p50_ms": ms(percentile(values, 50)),
+        "p95_ms": ms(percentile(values, 95)),
+        "p99_ms": ms(percentile(values, 99)),
+        "max_ms": ms(values[-1]) if values else None
+    }
+
+
+class ProcessSampler(threading.Thread):
+    """Samples CPU% and RSS of the server process (and its children) twice a second."""
+
+    def __init__(self, pid, interval=0.5):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.cpu = []
+        self.rss = []
+        self._done = threading.Event()
+
+    def _processes(self, root):
+        try:
+            return [root] + root.children(recursive=True)
+        except psutil.Error:
+            return [root]
+
+    def run(self):
+        root = psutil.Process(self.pid)
+        tracked = {}
+        while not self._done.is_set():
+            cpu, rss = 0.0, 0
+            for proc in self._processes(root):
+                try:
+                    if proc.pid not in tracked:
+                        tracked[proc.pid] = proc
+                        proc.cpu_percent(None)  # first call only primes the counter
+                    cpu += tracked[proc.pid].cpu_percent(None)
+                    rss += proc.memory_info().rss
+                except psutil.Error:
+                    continue
+            self.cpu.append(cpu)
+            self.rss.append(rss)
+            self._done.wait(self.interval)
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+    def report(self):
+        cpu = self.cpu[1:] or self.cpu
+        return {
+            "cpu_percent_mean": round(sum(cpu) / len(cpu), 1) if cpu else None,
+            "cpu_percent_max": round(max(cpu), 1) if cpu else None,
+            "rss_mb_peak": round(max(self.rss) / 2 ** 20, 1) if self.rss else None,
+            "rss_mb_end": round(self.rss[-1] / 2 ** 20, 1) if self.rss else None
+        }
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(args):
+    port = free_port()
+    env = dict(os.environ)
+    env.update({
+        "PORT": str(port),
+        "SERVER_DEBUG": "0",
+        "LLM_PROVIDER": args.llm_provider,
+        "FAKE_LLM_LATENCY_MS": args.llm_latency,
+        "FAKE_LLM_ERROR_RATE": str(args.llm_error_rate),
+        "SPEECH_BACKEND": "stub",
+        "STUB_LATENCY_MS": args.speech_latency,
+        "STUB_ERROR_RATE": str(args.speech_error_rate),
+        "FAKE_SEED": str(args.seed)
+    })
+    # Module result files are written to the working directory; keep them out of the repo
+    workdir = tempfile.mkdtemp(prefix="voice-bench-")
+    log = open(os.path.join(workdir, "server.log"), "w")
+    proc = subprocess.Popen([sys.executable, os.path.join(REPO_DIR, "server.py")], cwd=workdir, env=env,
+                            stdout=log, stderr=subprocess.STDOUT)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server.py exited with {proc.returncode}; see {log.name}")
+        try:
+            if requests.get(f"{url}/list-modules", timeout=1).ok:
+                return proc, url, log.name
+        except requests.RequestException:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError(f"server.py did not come up; see {log.name}")
+
+
+def run_learner(url, config, audio, recorder):
+    """One learner session; returns normally when the module closes."""
+    events = queue.Queue()
+    sio = socketio.Client(reconnection=False)
+    sio.on("ui_event", events.put)
+    http = requests.Session()
+
+    def timed(name, fn, *a, **kw):
+        started = time.perf_counter()
+        resp = fn(*a, **kw)
+        recorder.add(name, time.perf_counter() - started, resp.status_code)
+        return resp
+
+    def next_event(*labels):
+        deadline = time.monotonic() + EVENT_TIMEOUT
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"no {'/'.join(labels)} event")
+            event = events.get(timeout=remaining)
+            if event.get("label") in labels:
+                return event
+
+    session_started = time.perf_counter()
+    started = time.perf_counter()
+    sio.connect(url, transports=["websocket"])
+    recorder.add("socketio_connect", time.perf_counter() - started)
+    try:
+        sid = sio.get_sid()
+        resp = timed("start_module", http.post, f"{url}/start-module", json={"config": config, "session_id": sid})
+        resp.raise_for_status()
+
+        event = next_event("prompt", "closing")
+        while event["label"] != "closing":
+            field_key = event.get("field_key") or "answer"
+            resp = timed("transcribe", http.post, f"{url}/transcribe",
+                         files={"audio": ("answer.wav", audio, "audio/wav")}, data={"session_id": sid})
+            transcript = resp.json().get("transcript") if resp.ok else None
+            submitted = time.perf_counter()
+            resp = timed("submit_response", http.post, f"{url}/submit-response",
+                         json={"text": transcript or "I don't know", "field_key": field_key, "session_id": sid})
+            resp.raise_for_status()
+            job_id = resp.json().get("job_id")
+
+            # The verdict always arrives before the next prompt or closing
+            while next_event("verdict").get("job_id") != job_id:
+                pass
+            recorder.add("verdict", time.perf_counter() - submitted)
+            event = next_event("prompt", "closing")
+        recorder.add("session", time.perf_counter() - session_started)
+    finally:
+        sio.disconnect()
+        http.close()
+
+
+def compare(current, previous):
+    print(f"\nvs {previous.get('version')} ({previous.get('timestamp')}):")
+    for name, stats in current["endpoints"].items():
+        old = previous.get("endpoints", {}).get(name)
+        if not old or not old.get("p95_ms") or not stats.get("p95_ms"):
+            continue
+        change = (stats["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100
+        print(f"  {name:18} p95 {old['p95_ms']:>8} -> {stats['p95_ms']:>8} ms ({change:+.1f}%)")
+    old_rate, new_rate = previous.get("sessions_per_second"), current.get("sessions_per_second")
+    if old_rate and new_rate:
+        print(f"  sessions/sec {old_rate} -> {new_rate} ({(new_rate - old_rate) / old_rate * 100:+.1f}%)")
+
+
+def git_version():
+    try:
+        return subprocess.check_output(["git", "describe", "--always", "--dirty"], cwd=REPO_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test server.py with concurrent simulated learners")
+    parser.add_argument("--learners", type=int, default=10, help="Concurrent learners")
+    parser.add_argument("--sessions", type=int, default=50, help="Total module sessions to run")
+    parser.add_argument("--url", help="Use a running server instead of starting one")
+    parser.add_argument("--pid", type=int, help="Server pid to sample CPU/RSS from when using --url")
+    parser.add_argument("--configs", nargs="*", help="Module configs to sample from (default: all listed by the server)")
+    parser.add_argument("--llm-provider", default="fake", choices=["fake", "http", "cohere"])
+    parser.add_argument("--llm-latency", default="lognormal:300:0.4", help="FAKE_LLM_LATENCY_MS for the spawned server")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--speech-latency", default="lognormal:400:0.3", help="STUB_LATENCY_MS for the spawned server")
+    parser.add_argument("--speech-error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/<timestamp>_<version>.json)")
+    parser.add_argument("--compare", help="Earlier result file to print p95 and throughput changes against")
+    args = parser.parse_args()
+
+    proc, log_path = None, None
+    url = args.url
+    if not url:
+        proc, url, log_path = start_server(args)
+    pid = args.pid or (proc.pid if proc else None)
+    sampler = ProcessSampler(pid) if pid and psutil else None
+
+    try:
+        configs = args.configs or requests.get(f"{url}/list-modules", timeout=10).json()["modules"]
+        rng = random.Random(args.seed)
+        plan = [rng.choice(configs) for _ in range(args.sessions)]
+        audio = speech_wav()
+        recorder = Recorder()
+
+        def learner(config):
+            try:
+                run_learner(url, config, audio, recorder)
+                recorder.session_done(True)
+            except Exception as e:
+                recorder.session_done(False, f"{type(e).__name__}: {e}"[:200])
+
+        if sampler:
+            sampler.start()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.learners) as pool:
+            list(pool.map(learner, plan))
+        elapsed = time.perf_counter() - started
+        if sampler:
+            sampler.stop()
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    result = {
+        "version": git_version(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "learners": args.learners,
+        "sessions": args.sessions,
+        "sessions_ok": recorder.sessions_ok,
+        "sessions_failed": recorder.sessions_failed,
+        "errors": recorder.errors,
+        "elapsed_seconds": round(elapsed, 2),
+        "sessions_per_second": round(recorder.sessions_ok / elapsed, 3) if elapsed else None,
+        "endpoints": {name: summarize(values) for name, values in sorted(recorder.samples.items())},
+        "status_codes": recorder.statuses,
+        "server": sampler.report() if sampler else None,
+        "settings": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        "server_log": log_path
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}_{result['version']}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+
+    print(f"{recorder.sessions_ok}/{args.sessions} sessions in {elapsed:.1f}s "
+          f"({result['sessions_per_second']} sessions/sec), {args.learners} concurrent learners")
+    for name, stats in result["endpoints"].items():
+        print(f"  {name:18} n={stats['count']:<5} p50 {stats['p50_ms']:>8} p95 {stats['p95_ms']:>8} p99 {stats['p99_ms']:>8} ms")
+    if result["server"]:
+        print(f"  server CPU {result['server']['cpu_percent_mean']}% mean / {result['server']['cpu_percent_max']}% max, "
+              f"RSS peak {result['server']['rss_mb_peak']} MB")
+    if recorder.errors:
+        print(f"  errors: {recorder.errors}")
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            compare(result, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+import os
+import copy
+import json
+import time
+import string
+import logging
+import threading
+from collections import namedtuple
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CONFIG_DIR = os.path.join(BASE_DIR, "configs")
+CONFIG_RELOAD_SECONDS = float(os.getenv("CONFIG_RELOAD_SECONDS", "5"))  # 0 disables hot reload
+MODULE_CATEGORIES = ("energizer", "refresher", "achiver")
+
+# `placeholders` are the {names} a prompt needs from filled_fields; `handler` comes from the behavior resolver
+CompiledField = namedtuple("CompiledField", ["key", "behavior", "handler", "prompt", "placeholders", "duration", "max_attempts"])
+CompiledModule = namedtuple("CompiledModule", ["name", "category", "mtime", "fields", "activities", "config"])
+
+_formatter = string.Formatter()
+
+
+def prompt_placeholders(template):
+    if not isinstance(template, str):
+        return ()
+    try:
+        return tuple(name for _, name, _, _ in _formatter.parse(template) if name)
+    except ValueError:
+        return ()
+
+
+class ConfigError(ValueError):
+    pass
+
+
+class ConfigRegistry:
+    """Every module config under `config_dir`, parsed and validated once.
+
+    Files are re-checked for mtime changes at most every `reload_seconds`, so
+    listing and starting modules normally touch no files at all.
+    """
+
+    def __init__(self, config_dir=CONFIG_DIR, reload_seconds=CONFIG_RELOAD_SECONDS):
+        self.config_dir = config_dir
+        self.reload_seconds = reload_seconds
+        self.behavior_resolver = None  # behavior name -> handler, set by the runner module
+        self.modules = {}  # "refresher/hobby.json" -> CompiledModule
+        self.errors = {}  # name -> reason the file was rejected
+        self._index = {}  # category -> sorted file names
+        self._mtimes = {}
+        self._checked_at = 0.0
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def set_behavior_resolver(self, resolver):
+        with self._lock:
+            self.behavior_resolver = resolver
+            self._mtimes = {}  # recompile so handlers are attached
+        self.refresh(force=True)
+
+    def refresh(self, force=False):
+        now = time.monotonic()
+        if self._loaded and not force and (not self.reload_seconds or now - self._checked_at < self.reload_seconds):
+            return
+        with self._lock:
+            self._loaded = True
+            self._checked_at = now
+            seen = {}
+            for root, _, names in os.walk(self.config_dir):
+                for file_name in names:
+                    if file_name.endswith(".json"):
+                        path = os.path.join(root, file_name)
+                        seen[os.path.relpath(path, self.config_dir).replace(os.sep, "/")] = os.path.getmtime(path)
+
+            for name, mtime in seen.items():
+                if self._mtimes.get(name) != mtime:
+                    self._load_locked(name, mtime)
+            for name in set(self._mtimes) - set(seen):
+                self.modules.pop(name, None)
+                self.errors.pop(name, None)
+            self._mtimes = seen
+
+            index = {}
+            for module in self.modules.values():
+                index.setdefault(module.category, []).append(module.name.rsplit("/", 1)[-1])
+            self._index = {category: sorted(names) for category, names in index.items()}
+
+    def _load_locked(self, name, mtime):
+        try:
+            with open(os.path.join(self.config_dir, name), "r") as f:
+                module = self.compile(name, json.load(f), mtime)
+        except (ValueError, OSError) as e:
+            self.modules.pop(name, None)
+            self.errors[name] = str(e)
+            logging.warning(f"Skipping config {name}: {e}")
+            return
+        self.modules[name] = module
+        self.errors.pop(name, None)
+        logging.info(f"Compiled config {name} ({len(module.fields)} fields)")
+
+    def compile(self, name, config, mtime=0.0):
+        if not isinstance(config, dict):
+            raise ConfigError("top level must be an object")
+        fields = config.get("fields", [])
+        activities = config.get("activities", [])
+        if not isinstance(fields, list) or not isinstance(activities, list):
+            raise ConfigError("'fields' and 'activities' must be lists")
+        if not fields and not activities:
+            raise ConfigError("no fields or activities")
+
+        compiled = tuple(self._compile_field(f) for f in fields)
+        compiled_activities = tuple(
+            tuple(self._compile_field(f) for f in activity.get("fields", [])) for activity in activities
+        )
+        category = name.rsplit("/", 1)[0] if "/" in name else ""
+        return CompiledModule(name, category, mtime, compiled, compiled_activities, config)
+
+    def _compile_field(self, field):
+        if not isinstance(field, dict) or not field.get("key"):
+            raise ConfigError(f"field without a key: {field!r}")
+        behavior = field.get("llm_behavior")
+        handler = self.behavior_resolver(behavior) if self.behavior_resolver and behavior else None
+        return CompiledField(
+            key=field["key"],
+            behavior=behavior,
+            handler=handler,
+            prompt=field.get("prompt", ""),
+            placeholders=prompt_placeholders(field.get("prompt")),
+            duration=field.get("duration"),
+            max_attempts=field.get("max_attempts", 2)
+        )
+
+    def resolve_name(self, path):
+        """Registry name for a config path: relative to configs/, relative to the working directory, or absolute."""
+        candidates = [path] if os.path.isabs(path) else [os.path.join(self.config_dir, path), path]
+        names = [os.path.relpath(os.path.abspath(c), self.config_dir).replace(os.sep, "/") for c in candidates]
+        for name in names:
+            if name in self.modules or name in self.errors:
+                return name
+        return names[0]
+
+    def get(self, path):
+        self.refresh()
+        return self.modules.get(self.resolve_name(path))
+
+    def has(self, path):
+        return self.get(path) is not None
+
+    def materialize(self, path):
+        """A private, mutable copy of a config for one runner.
+
+        Configs outside the registry (e.g. a CLI path elsewhere) are read from disk.
+        """
+        module = self.get(path)
+        if module is not None:
+            return copy.deepcopy(module.config)
+        name = self.resolve_name(path)
+        if name in self.errors:
+            raise ConfigError(f"Invalid config {name}: {self.errors[name]}")
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Config file not found: {path}")
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def list_category(self, category):
+        self.refresh()
+        return list(self._index.get(category, []))
+
+    def categories(self):
+        self.refresh()
+        return sorted(c for c in self._index if c)
+
+    def list_modules(self, categories=MODULE_CATEGORIES):
+        self.refresh()
+        return [f"{category}/{name}" for category in categories for name in self._index.get(category, [])]
+
+
+config_registry = ConfigRegistry()
@@ -0,0 +1,246 @@
+import os
+import re
+import hashlib
+import logging
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+from audio_codec import TARGET_RATE, wav_to_pcm16
+from vad import as_samples, frame_features, trim_silence
+from prosody import HOP_MS, pitch_track, syllables
+from similarity import words
+from tts_cache import phrase_cache
+from speech_pool import DEFAULT_VOICE
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CONTOUR_DIR = os.getenv("CONTOUR_DIR", os.path.join(BASE_DIR, ".contour_cache"))
+CONTOUR_BEHAVIORS = ("validate_stress_pattern", "validate_rising_intonation", "validate_falling_intonation")
+DTW_BAND = 0.25  # warping window as a fraction of the longer contour
+ENERGY_FLOOR_DB = -40.0
+ENERGY_WEIGHT = 0.5  # pitch movement matters more than loudness for intonation
+
+# features: (frames, 2) float32 of [semitones from median pitch, energy dB / 10]; syllables: (n, 2) start/end seconds
+ReferenceContour = namedtuple("ReferenceContour", ["text", "features", "syllables", "stressed"])
+# distance: DTW cost per aligned step; score: 0..1, 1 for an identical contour
+ContourMatch = namedtuple("ContourMatch", ["distance", "score"])
+
+_QUOTED = re.compile(r"[‘'\"“]([^‘’'\"“”]+[?.!])[’'\"”]")
+
+
+def contour_text(field):
+    """The sentence or word a field asks the learner to say: `expected`, `hint`, or a quoted sentence in the prompt."""
+    for text in (field.get("expected"), field.get("hint")):
+        if isinstance(text, str) and words(text):
+            return text
+    quoted = _QUOTED.search(field.get("prompt") or "")
+    return quoted.group(1) if quoted else None
+
+
+def contour_features(pcm, rate=TARGET_RATE):
+    """Speaker-normalized pitch and energy per 10 ms of speech; None when nothing voiced was heard."""
+    samples = trim_silence(as_samples(pcm), rate)
+    track = pitch_track(samples, rate)
+    voiced = ~np.isnan(track.f0)
+    if voiced.sum() < 2:
+        return None
+    semitones = 12 * np.log2(track.f0[voiced] / np.median(track.f0[voiced]))
+    # Unvoiced stretches are bridged so the warping follows the melody rather than consonants
+    pitch = np.interp(np.arange(len(track.f0)), np.flatnonzero(voiced), semitones)
+    rms, _ = frame_features(samples, rate, HOP_MS)
+    db = 20 * np.log10(np.maximum(rms, 1.0))
+    energy = np.maximum(db - db.max(), ENERGY_FLOOR_DB) / 10
+    count = min(len(pitch), len(energy))
+    return np.stack([pitch[:count], energy[:count]], axis=1).astype(np.float32)
+
+
+def dtw(query, reference, band=DTW_BAND):
+    """Length-normalized DTW distance between two feature sequences.
+
+    Cells on one anti-diagonal only depend on the two previous diagonals, so
+    each diagonal is filled with a single vectorized step.
+    """
+    n, m = len(query), len(reference)
+    if not n or not m:
+        return np.inf
+    weights = np.array([1.0, ENERGY_WEIGHT], dtype=np.float32)[:query.shape[1]]
+    diff = (query[:, None, :] - reference[None, :, :]) * weights
+    cost = np.sqrt(np.einsum("ijk,ijk->ij", diff, diff))
+    if band is not None:
+        # Sakoe-Chiba band around the (stretched) diagonal
+        i, j = np.ogrid[:n, :m]
+        cost[np.abs(i / max(n - 1, 1) - j / max(m - 1, 1)) > band] = np.inf
+
+    acc = np.full((n + 1, m + 1), np.inf)
+    acc[0, 0] = 0.0
+    for k in range(2, n + m + 1):
+        i = np.arange(max(1, k - m), min(n, k - 1) + 1)
+        j = k - i
+        best = np.minimum(np.minimum(acc[i - 1, j - 1], acc[i - 1, j]), acc[i, j - 1])
+        acc[i, j] = cost[i - 1, j - 1] + best
+    return float(acc[n, m] / (n + m))
+
+
+class ContourStore:
+    """Reference contours of config sentences, rendered once from TTS audio.
+
+    `frames.npy` holds every contour back to back and is memory-mapped;
+    `index.npz` maps a sentence key to its slice, syllable boundaries and
+    stressed syllable.
+    """
+
+    def __init__(self, store_dir=CONTOUR_DIR):
+        self.store_dir = store_dir
+        self._lock = threading.Lock()
+        self._index = {}  # key -> (offset, length, syllable offset, syllable count, stressed)
+        self._frames = None
+        self._syllables = None
+        self._texts = {}
+        self._mtime = None
+
+    def key(self, text):
+        return hashlib.sha1(" ".join(words(text)).encode("utf-8")).hexdigest()
+
+    @property
+    def index_path(self):
+        return os.path.join(self.store_dir, "index.npz")
+
+    @property
+    def frames_path(self):
+        return os.path.join(self.store_dir, "frames.npy")
+
+    def _refresh(self):
+        try:
+            mtime = os.path.getmtime(self.index_path)
+        except OSError:
+            return
+        with self._lock:
+            if mtime == self._mtime:
+                return
+            with np.load(self.index_path) as index:
+                rows = zip(index["keys"].tolist(), index["offsets"].tolist(), index["lengths"].tolist(),
+                           index["syllable_offsets"].tolist(), index["syllable_counts"].tolist(), index["stressed"].tolist())
+                self._index = {key: row for key, *row in rows}
+                self._texts = dict(zip(index["keys"].tolist(), index["texts"].tolist()))
+                self._syllables = index["syllables"]
+            self._frames = np.load(self.frames_path, mmap_mode="r")
+            self._mtime = mtime
+            logging.info(f"Loaded {len(self._index)} reference contours")
+
+    def get(self, text):
+        self._refresh()
+        key = self.key(text)
+        entry = self._index.get(key)
+        if entry is None:
+            return None
+        offset, length, syllable_offset, syllable_count, stressed = entry
+        return ReferenceContour(
+            self._texts[key],
+            self._frames[offset:offset + length],
+            self._syllables[syllable_offset:syllable_offset + syllable_count],
+            stressed if stressed >= 0 else None
+        )
+
+    def stress_pattern(self, word):
+        """(syllables, stressed index) heard in the reference rendering of `word`, or None."""
+        reference = self.get(word) if word else None
+        if reference is None or reference.stressed is None:
+            return None
+        return len(reference.syllables), reference.stressed
+
+    def match(self, pcm, text, rate=TARGET_RATE):
+        reference = self.get(text)
+        if reference is None:
+            return None
+        features = contour_features(pcm, rate)
+        if features is None:
+            return None
+        distance = dtw(features, np.asarray(reference.features))
+        return ContourMatch(distance, 1.0 / (1.0 + distance))
+
+    def build(self, texts, voice=DEFAULT_VOICE):
+        """Render and analyse every text not yet in the store, then rewrite it. Returns how many were added."""
+        self._refresh()
+        entries = {}
+        for key in self._index:
+            reference = self.get(self._texts[key])
+            entries[key] = (reference.text, np.asarray(reference.features), np.asarray(reference.syllables), reference.stressed)
+
+        added = 0
+        for text in sorted(set(texts)):
+            key = self.key(text)
+            if key in entries or not words(text):
+                continue
+            pcm, rate = wav_to_pcm16(phrase_cache.get_or_synthesize(text, voice))
+            features = contour_features(pcm, rate)
+            if features is None:
+                logging.warning(f"No voiced speech in the rendering of '{text}', skipped")
+                continue
+            found = syllables(trim_silence(pcm, rate), rate)
+            bounds = np.array([(s.start, s.end) for s in found], dtype=np.float32).reshape(-1, 2)
+            stressed = max(range(len(found)), key=lambda i: found[i].prominence) if found else None
+            entries[key] = (text, features, bounds, stressed)
+            added += 1
+            logging.info(f"Reference contour for '{text}': {len(features)} frames, {len(found)} syllables")
+
+        if added:
+            self._write(entries)
+        return added
+
+    def _write(self, entries):
+        keys = sorted(entries)
+        lengths = np.array([len(entries[k][1]) for k in keys], dtype=np.int64)
+        syllable_counts = np.array([len(entries[k][2]) for k in keys], dtype=np.int64)
+        os.makedirs(self.store_dir, exist_ok=True)
+
+        tmp = f".{os.getpid()}.tmp"
+        np.save(self.frames_path + tmp, np.concatenate([entries[k][1] for k in keys]).astype(np.float32))
+        with open(self.index_path + tmp, "wb") as f:
+            np.savez(
+                f,
+                keys=np.array(keys),
+                texts=np.array([entries[k][0] for k in keys]),
+                offsets=np.concatenate([[0], np.cumsum(lengths)[:-1]]),
+                lengths=lengths,
+                syllable_offsets=np.concatenate([[0], np.cumsum(syllable_counts)[:-1]]),
+                syllable_counts=syllable_counts,
+                stressed=np.array([-1 if entries[k][3] is None else entries[k][3] for k in keys], dtype=np.int64),
+                syllables=np.concatenate([entries[k][2] for k in keys]).astype(np.float32).reshape(-1, 2)
+            )
+        # Frames first: a reader that sees the new index must find matching frames
+        os.replace(self.frames_path + tmp + ".npy", self.frames_path)
+        os.replace(self.index_path + tmp, self.index_path)
+        logging.info(f"Contour store written: {len(keys)} references, {int(lengths.sum())} frames")
+
+
+contour_store = ContourStore()
+
+
+def config_texts(config):
+    """Reference sentences for every stress/intonation field of a module config."""
+    fields = list(config.get("fields", []))
+    for activity in config.get("activities", []):
+        fields.extend(activity.get("fields", []))
+    texts = [contour_text(f) for f in fields if f.get("llm_behavior") in CONTOUR_BEHAVIORS]
+    return [t for t in texts if t]
+
+
+if __name__ == "__main__":
+    import argparse
+    from config_registry import config_registry
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Build reference pitch/energy contours for stress and intonation fields")
+    parser.add_argument("configs", nargs="*", help="Config paths (default: every config with such fields)")
+    parser.add_argument("--voice", default=DEFAULT_VOICE)
+    args = parser.parse_args()
+
+    if args.configs:
+        configs = [config_registry.materialize(path) for path in args.configs]
+    else:
+        config_registry.refresh(force=True)
+        configs = [module.config for module in config_registry.modules.values()]
+    texts = [text for config in configs for text in config_texts(config)]
+    added = contour_store.build(texts, args.voice)
+    logging.info(f"{len(set(texts))} reference texts, {added} newly built")
@@ -1,15 +1,27 @@
 # Refactored engine.py with LLM behavior dispatcher
 
-import cohere
 import os
 import json
 import logging
 import sounddevice as sd
-from scipy.io.wavfile import write
-import azure.cognitiveservices.speech as speechsdk
+from scipy.io.wavfile import write, read as read_wav
+import io
+from speech_pool import speech_pool
+from vad import record_until_silence
+from tts_cache import phrase_cache, is_static
 from dotenv import load_dotenv
+from llm_cache import verdict_cache, make_key
+from local_rules import rules as local_rules
+from batch_eval import BatchCheck, evaluate_yes_no_batch
+from config_registry import config_registry
+from behaviors import behaviors
+from scoring import ValidationAggregator
+from similarity import compare, missed_words, SUMMARY_PASS, SUMMARY_RETRY, PRONUNCIATION_PASS, PRONUNCIATION_RETRY
+from prosody import check_stress, check_intonation
+from contour_store import contour_store, contour_text
+from providers import make_llm_client
+from metrics import timed
 from datetime import datetime
-import difflib
 import time
 import random
 
@@ -29,6 +41,8 @@ VOCAB_ANTONYMS = [
     {"word": "tall", "type": "antonym", "hint": "short, tiny"}
 ]
 
+local_rules.register_vocab(VOCAB_SYNONYMS + VOCAB_ANTONYMS)
+
 AUDIO_FILENAME = "input_audio.wav"
 DEFAULT_DURATION = 5
 SIMILARITY_THRESHOLD = 0.90
@@ -42,7 +56,13 @@ COHERE_API_KEY = os.getenv("COHERE_API_KEY")
 AZURE_SPEECH_KEY = os.getenv("AZURE_SPEECH_KEY")
 AZURE_REGION = os.getenv("AZURE_REGION", "eastus")
 
-co = cohere.Client(api_key=COHERE_API_KEY)
+co = make_llm_client()  # LLM_PROVIDER picks Cohere or a local fake
+
+
+def chat(**kwargs):
+    """co.chat timed as the "llm" stage, as in new.py."""
+    with timed("llm"):
+        return co.chat(**kwargs)
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
@@ -51,14 +71,19 @@ class ModuleRunner:
     def __init__(self, config_path):
         self.config = self.load_config(config_path)
         self.fields = self.config.get("fields", [])
+        # Running correct/total for validation_logic, updated as each field is scored
+        self.scoring = ValidationAggregator(self.config.get("validation_logic"), self.fields)
         self.filled_fields = {}
         self.expected_summary = ""
         self.field_results = {}  # NEW: store field results
         self.field_scores = {}  # NEW: store validation results
+        self.last_audio = None  # int16 samples of the latest recording, for prosody checks
 
     def load_config(self, path):
-        with open(path, 'r') as f:
-            config = json.load(f)
+        config = config_registry.materialize(path)
+        compiled = config_registry.get(path)
+        # Handlers resolved when the config was compiled, keyed by field
+        self.behavior_handlers = {f.key: f.handler for f in compiled.fields} if compiled else {}
         if config.get("random_prompt_pool"):
             prompt_fields = config.get("fields", [])
             for field in prompt_fields:
@@ -82,30 +107,31 @@ class ModuleRunner:
 
     def speak(self, text):
         try:
-            speech_config = speechsdk.SpeechConfig(subscription=AZURE_SPEECH_KEY, region=AZURE_REGION)
-            speech_config.speech_synthesis_voice_name = "en-IN-NeerjaNeural"
-            synthesizer = speechsdk.SpeechSynthesizer(speech_config=speech_config)
-            synthesizer.speak_text_async(text).get()
+            if is_static(text):
+                # Config text repeats across runs, so play it from the phrase cache
+                rate, samples = read_wav(io.BytesIO(phrase_cache.get_or_synthesize(text)))
+                sd.play(samples, rate)
+                sd.wait()
+            else:
+                speech_pool.speak(text)
             time.sleep(0.5)
         except Exception as e:
             logging.error(f"TTS failed: {e}")
 
     def record_audio(self, duration):
-        logging.info(f"Recording for {duration} seconds...")
-        recording = sd.rec(int(duration * 16000), samplerate=16000, channels=1, dtype='int16')
-        sd.wait()
+        # `duration` is only an upper bound; recording stops once the learner goes quiet
+        logging.info(f"Recording for up to {duration} seconds...")
+        recording = record_until_silence(duration, rate=16000)
+        self.last_audio = recording
         write(AUDIO_FILENAME, 16000, recording)
         return AUDIO_FILENAME
 
     def transcribe_audio(self, filename=AUDIO_FILENAME):
         try:
-            speech_config = speechsdk.SpeechConfig(subscription=AZURE_SPEECH_KEY, region=AZURE_REGION)
-            audio_input = speechsdk.AudioConfig(filename=filename)
-            recognizer = speechsdk.SpeechRecognizer(speech_config=speech_config, audio_config=audio_input)
-            result = recognizer.recognize_once()
-            if result.reason == speechsdk.ResultReason.RecognizedSpeech:
-                logging.info(f"Recognized Text: {result.text}")
-                return result.text.strip()
+            text = speech_pool.recognize_file(filename)
+            if text:
+                logging.info(f"Recognized Text: {text}")
+                return text.strip()
         except Exception as e:
             logging.error(f"Transcription failed: {e}")
         return ""
@@ -126,7 +152,7 @@ class ModuleRunner:
         prompt = system_prompt_override or base_prompt
 
         try:
-            resp = co.chat(
+            resp = chat(
                 chat_history=[{"role": "system", "message": prompt}],
                 message=text,
                 temperature=0.3,
@@ -158,7 +184,8 @@ class ModuleRunner:
 
         try:
             message = f"{field_key}: {value}"
-            resp = co.chat(chat_history=[{"role": "system", "message": system_prompt}], message=message)
+            with timed("acknowledgment", config=self.config.get("module", "")):
+                resp = chat(chat_history=[{"role": "system", "message": system_prompt}], message=message)
             return resp.text.strip()
         except Exception as e:
             logging.error(f"Acknowledgment generation failed: {e}")
@@ -169,69 +196,41 @@ class ModuleRunner:
             logging.warning("Empty or invalid input for SVO validation.")
             return False
 
-        system_prompt = (
+        return self._validate_yes_no_prompt(self._svo_prompt(text), text.strip(), "SVO", temperature=0.2, max_tokens=10)
+
+    def _svo_prompt(self, text):
+        return (
             "You are an English grammar teacher. Evaluate whether the following sentence follows the Subject-Verb-Object (SVO) pattern. "
             "Only reply 'Yes' or 'No'."
         )
 
-        try:
-            resp = co.chat(
-                chat_history=[{"role": "system", "message": system_prompt}],
-                message=text.strip(),  # ✅ user input goes here
-                temperature=0.2,
-                max_tokens=10
-            )
-            answer = resp.text.strip().lower()
-            logging.info(f"SVO validation result: {answer}")
-            return "yes" in answer
-        except Exception as e:
-            logging.error(f"SVO validation failed: {e}")
-            return False
-
     def validate_clause_expansion(self, text, field):
-        system_prompt = (
+        return self._validate_yes_no_prompt(
+            self._clause_expansion_prompt(text), text, "Clause expansion", temperature=0.2, max_tokens=10
+        )
+
+    def _clause_expansion_prompt(self, text):
+        return (
             "You are a grammar tutor helping students expand sentences meaningfully.\n"
             "Check if the student's response logically expands the sentence: 'I met a girl.'\n"
             "It must include a clause such as 'who', 'where', 'when', or 'because', and maintain the original meaning (that the person met a girl).\n"
             f"Student's response: \"{text}\"\n"
             "Reply only 'Yes' if the response maintains the base meaning and adds a valid clause. Reply 'No' otherwise."
         )
-        try:
-            resp = co.chat(
-                chat_history=[{"role": "system", "message": system_prompt}],
-                message=text,
-                temperature=0.2,
-                max_tokens=10
-            )
-            result = resp.text.strip().lower()
-            logging.info(f"Clause expansion validation result: {result}")
-            return "yes" in result
-        except Exception as e:
-            logging.error(f"Clause expansion validation failed: {e}")
-            return False
     
     def validate_yesno_question(self, text):
         if not isinstance(text, str) or not text.strip():
             return False
 
-        system_prompt = (
+        return self._validate_yes_no_prompt(
+            self._yesno_question_prompt(text), text.strip(), "Yes/No question", temperature=0.2, max_tokens=10
+        )
+
+    def _yesno_question_prompt(self, text):
+        return (
             "You are an English grammar teacher. Is the following sentence a correctly formed Yes/No question? "
             "Answer only 'Yes' or 'No'."
         )
-
-        try:
-            resp = co.chat(
-                chat_history=[{"role": "system", "message": system_prompt}],
-                message=text.strip(),
-                temperature=0.2,
-                max_tokens=10
-            )
-            result = resp.text.strip().lower()
-            logging.info(f"Yes/No question check result: {result}")
-            return "yes" in result
-        except Exception as e:
-            logging.error(f"Yes/No validation failed: {e}")
-            return False
     
     def validate_family_answer(self, user_input, field):
         expected = field.get("hint", "")
@@ -240,14 +239,7 @@ class ModuleRunner:
             f"\nPrompt: {field['prompt']}\nHint (Expected Answer): {expected}\nStudent Answer: {user_input}"
             "\nOnly reply with Yes or No."
         )
-        try:
-            resp = co.chat(chat_history=[{"role": "system", "message": system_prompt}], message=user_input)
-            result = resp.text.strip().lower()
-            logging.info(f"Family validation result: {result}")
-            return "yes" in result
-        except Exception as e:
-            logging.error(f"Validation failed for {field['key']}: {e}")
-            return False  
+        return self._validate_yes_no_prompt(system_prompt, user_input, "Family")  
 
     def validate_adjective_description(self, text, field):
         expected = field.get("hint", "")
@@ -258,42 +250,54 @@ class ModuleRunner:
             f"Student Answer: {text}\n\n"
             "Reply only 'Yes' if the answer is contextually appropriate, otherwise 'No'."
         )
-        try:
-            resp = co.chat(
-                chat_history=[{"role": "system", "message": system_prompt}],
-                message=text,
-                temperature=0.2,
-                max_tokens=10
-            )
-            result = resp.text.strip().lower()
-            logging.info(f"Adjective validation result: {result}")
-            return "yes" in result
-        except Exception as e:
-            logging.error(f"Adjective description validation failed: {e}")
-            return False
+        return self._validate_yes_no_prompt(system_prompt, text, "Adjective description", temperature=0.2, max_tokens=10)
     
     def validate_negative_sentence(self, text):
         if not isinstance(text, str) or not text.strip():
             return False
 
-        system_prompt = (
+        return self._validate_yes_no_prompt(
+            self._negative_sentence_prompt(text), text.strip(), "Negative sentence", temperature=0.2, max_tokens=10
+        )
+
+    def _negative_sentence_prompt(self, text):
+        return (
             "You are an English grammar teacher. Is the following sentence a correct negative sentence in English? "
             "Answer only 'Yes' or 'No'."
         )
 
-        try:
-            resp = co.chat(
-                chat_history=[{"role": "system", "message": system_prompt}],
-                message=text.strip(),
-                temperature=0.2,
-                max_tokens=10
-            )
-            result = resp.text.strip().lower()
-            logging.info(f"Negative sentence check result: {result}")
-            return "yes" in result
-        except Exception as e:
-            logging.error(f"Negative validation failed: {e}")
-            return False
+    def batch_validate(self, checks):
+        """Score (field, behavior) pairs at module end with at most one LLM round-trip.
+
+        Fields already scored by the same behavior during the interaction reuse field_scores.
+        Returns {field_key: bool}.
+        """
+        verdicts = {}
+        pending = []
+        for field, behavior in checks:
+            key = field["key"]
+            text = self.filled_fields.get(key, "")
+            if field.get("llm_behavior") == behavior and key in self.field_scores:
+                verdicts[key] = bool(self.field_scores[key])
+                continue
+            if not isinstance(text, str) or not text.strip():
+                verdicts[key] = False
+                continue
+            text = text.strip()
+            local = local_rules.check(behavior, text, field)
+            if local is not None:
+                verdicts[key] = local
+                continue
+            spec = behaviors.get(behavior)
+            build_prompt = getattr(self, spec.batch_prompt)
+            pending.append(BatchCheck(key, spec.batch_label, build_prompt(text), text, {"temperature": 0.2, "max_tokens": 10}))
+
+        verdicts.update(evaluate_yes_no_batch(
+            chat,
+            pending,
+            fallback=lambda check: self._validate_yes_no_prompt(check.system_prompt, check.text, check.label, **check.params)
+        ))
+        return verdicts
 
     def extract_number_or_fallback(self, field_key, text):
         digits = ''.join(filter(str.isdigit, text))
@@ -314,6 +318,7 @@ class ModuleRunner:
             self.filled_fields["user_summary_spoken"] = user_summary
             self.filled_fields["expected_summary"] = self.expected_summary
             self.filled_fields["similarity_score"] = round(similarity, 2)
+            self.filled_fields["summary_missed_words"] = missed_words(self.expected_summary, user_summary)
 
             if assessment == "PASS":
                 self.filled_fields["assessment"] = "PASS"
@@ -368,174 +373,39 @@ class ModuleRunner:
         self.filled_fields[key] = value if value else "[Unrecognized or skipped]"
 
     def handle_llm_behavior(self, field, user_input):
-        behavior = field.get("llm_behavior")
-
-        if behavior == "extract_value":
-            extract_type = field.get("extract_type")
-            if extract_type == "number":
-                value = self.extract_number_or_fallback(field["key"], user_input)
-            else:
-                value = self.extract_with_cohere(field["key"], user_input)
-
-            # ✨ Fallback catch for hallucinated LLM messages
-            if value and "The input does not" in value:
-                logging.warning(f"LLM fallback text detected for {field['key']}")
-                value = "[Unrecognized]"
-
-            if field.get("acknowledge"):
-                ack_prompt = field.get("ack_prompt")
-                ack = self.generate_natural_acknowledgment(field["key"], value, custom_prompt=ack_prompt)
-                print(f"\nCHATBOT: {ack}")
-                self.speak(ack)
-
-            return value
-
-        elif behavior == "acknowledge":
-            return self.generate_natural_acknowledgment(field["key"], user_input)
-
-        elif behavior == "validate_svo":
-            return self.validate_svo_pattern(user_input, field)
-        
-        elif behavior == "validate_family_answers":
-            is_correct = self.validate_family_answer(user_input, field)
-            self.field_scores[field["key"]] = is_correct
-            self.field_results[field["key"]] = "PASS" if is_correct else "FAIL"
-            return user_input
-        
-        elif behavior == "yesno_question_check":
-            is_correct = self.validate_yesno_question(user_input)
-            self.field_scores[field["key"]] = is_correct
-            return user_input
-
-        elif behavior == "negative_sentence_check":
-            is_correct = self.validate_negative_sentence(user_input)
-            self.field_scores[field["key"]] = is_correct
-            return user_input
-        
-        elif behavior == "validate_clause_expansion":
-            is_correct = self.validate_clause_expansion(user_input, field)
-            self.field_scores[field["key"]] = is_correct
-            self.field_results[field["key"]] = "PASS" if is_correct else "FAIL"
-            return user_input
-        
-        elif behavior == "validate_pronunciation":
-            expected_text = field.get("expected")
-            if expected_text:
-                result, score = self.validate_pronunciation(expected_text, user_input)
-                self.field_scores[field["key"]] = result == "PASS"
-                self.filled_fields[f"{field['key']}_pron_score"] = round(score, 2)
-                self.filled_fields[f"{field['key']}_pron_result"] = result
-            return user_input
-        
-        elif behavior == "validate_stress_pattern":
-            result = self.validate_stress_pattern(user_input, field.get("expected"))
-            self.field_scores[field["key"]] = result
-            return user_input
-
-        elif behavior == "validate_rising_intonation":
-            result = self.validate_rising_intonation(user_input)
-            self.field_scores[field["key"]] = result
-            return user_input
-
-        elif behavior == "validate_adjective_description":
-            is_correct = self.validate_adjective_description(user_input, field)
-            self.field_scores[field["key"]] = is_correct
-            self.field_results[field["key"]] = "PASS" if is_correct else "FAIL"
-            return user_input
-
-        elif behavior == "validate_modal_verb_usage":
-            is_correct = self.validate_modal_verb_usage(user_input, field)
-            self.field_scores[field["key"]] = is_correct
-            self.field_results[field["key"]] = "PASS" if is_correct else "FAIL"
-            return user_input
-
-        elif behavior == "validate_first_conditional":
-            is_correct = self.validate_first_conditional(user_input, field)
-            self.field_scores[field["key"]] = is_correct
-            self.field_results[field["key"]] = "PASS" if is_correct else "FAIL"
+        handler = self.behavior_handlers.get(field["key"]) or behaviors.get(field.get("llm_behavior"))
+        if handler is None:
             return user_input
+        with timed("behavior", behavior=field.get("llm_behavior") or "", config=self.config.get("module", "")):
+            return handler(self, field, user_input)
+
+    def _set_result(self, field, is_correct):
+        self.field_scores[field["key"]] = is_correct
+        self.field_results[field["key"]] = "PASS" if is_correct else "FAIL"
+        self.scoring.record(field["key"], is_correct)
+
+    def _extract_value(self, field, user_input):
+        extract_type = field.get("extract_type")
+        if extract_type == "number":
+            value = self.extract_number_or_fallback(field["key"], user_input)
+        else:
+            value = self.extract_with_cohere(field["key"], user_input)
 
-        elif behavior == "validate_phrasal_verb":
-            is_correct = self.validate_phrasal_verb(user_input, field)
-            self.field_scores[field["key"]] = is_correct
-            self.field_results[field["key"]] = "PASS" if is_correct else "FAIL"
-            return user_input
+        # ✨ Fallback catch for hallucinated LLM messages
+        if value and "The input does not" in value:
+            logging.warning(f"LLM fallback text detected for {field['key']}")
+            value = "[Unrecognized]"
 
-        elif behavior == "validate_falling_intonation":
-            result = self.validate_falling_intonation(user_input)
-            self.field_scores[field["key"]] = result
-            return user_input
-        
-        elif behavior == "validate_command":
-            is_correct = self.validate_command_sentence(user_input, field)
-            self.field_scores[field["key"]] = is_correct
-            self.field_results[field["key"]] = "PASS" if is_correct else "FAIL"
-            return user_input
-        elif behavior == "validate_place_description":
-            is_correct = self.validate_place_description(user_input, field)
-            self.field_scores[field["key"]] = is_correct
-            self.field_results[field["key"]] = "PASS" if is_correct else "FAIL"
-            return user_input
-        
-        elif behavior == "validate_contextual_dialogue":
-            is_correct = self.validate_contextual_dialogue(user_input, field)
-            self.field_scores[field["key"]] = is_correct
-            self.field_results[field["key"]] = "PASS" if is_correct else "FAIL"
-            return user_input
+        if field.get("acknowledge"):
+            ack_prompt = field.get("ack_prompt")
+            ack = self.generate_natural_acknowledgment(field["key"], value, custom_prompt=ack_prompt)
+            print(f"\nCHATBOT: {ack}")
+            self.speak(ack)
 
-        elif behavior == "validate_synonym_antonym":
-            is_correct = self.validate_synonym_antonym(user_input, field)
-            self.field_scores[field["key"]] = is_correct
-            self.field_results[field["key"]] = "PASS" if is_correct else "FAIL"
-            return user_input
-        elif behavior == "validate_meaningful_response_strict":
-            is_correct = self.validate_meaningful_response_strict(user_input, field)
-            self.field_scores[field["key"]] = is_correct
-            self.field_results[field["key"]] = "PASS" if is_correct else "FAIL"
-            return user_input
-        elif behavior == "validate_mindmap_ideas":
-            is_correct = self.validate_mindmap_ideas(user_input, field)
-            self.field_scores[field["key"]] = is_correct
-            self.field_results[field["key"]] = "PASS" if is_correct else "FAIL"
-            return user_input
-        elif behavior == "validate_grammar_correction":
-            is_correct = self.validate_grammar_correction(user_input, field)
-            self.field_scores[field["key"]] = is_correct
-            self.field_results[field["key"]] = "PASS" if is_correct else "FAIL"
-            return user_input
-        elif behavior == "validate_passive_voice":
-            is_correct = self.validate_passive_voice(user_input, field)
-            self.field_scores[field["key"]] = is_correct
-            self.field_results[field["key"]] = "PASS" if is_correct else "FAIL"
-            return user_input
-
-        elif behavior == "validate_reported_speech":
-            is_correct = self.validate_reported_speech(user_input, field)
-            self.field_scores[field["key"]] = is_correct
-            self.field_results[field["key"]] = "PASS" if is_correct else "FAIL"
-            return user_input
+        return value
 
-        elif behavior == "validate_discourse_marker":
-            is_correct = self.validate_discourse_marker(user_input, field)
-            self.field_scores[field["key"]] = is_correct
-            self.field_results[field["key"]] = "PASS" if is_correct else "FAIL"
-            return user_input
-        elif behavior == "validate_debate_response":
-            is_correct = self.validate_debate_response(user_input, field)
-            self.field_scores[field["key"]] = is_correct
-            self.field_results[field["key"]] = "PASS" if is_correct else "FAIL"
-            return user_input
-        elif behavior == "validate_comparative_expression":
-            is_correct = self.validate_comparative_expression(user_input, field)
-            self.field_scores[field["key"]] = is_correct
-            self.field_results[field["key"]] = "PASS" if is_correct else "FAIL"
-            return user_input
-        elif behavior == "validate_past_tense_response":
-            is_correct = self.validate_past_tense_response(user_input, field)
-            self.field_scores[field["key"]] = is_correct
-            self.field_results[field["key"]] = "PASS" if is_correct else "FAIL"
-            return user_input
-        return user_input
+    def _acknowledge(self, field, user_input):
+        return self.generate_natural_acknowledgment(field["key"], user_input)
     
     def run(self):
         if "welcome" in self.config:
@@ -565,169 +435,12 @@ class ModuleRunner:
         feedback = ""
         if self.config.get("validation_logic"):
             logic = self.config["validation_logic"]
-            logic_type = logic.get("type", "pattern_match")
-            correct = 0
-            total = 0
-
-            if logic_type == "pattern_match":
-                patterns = logic.get("pattern", [])
-                if isinstance(patterns, str):
-                    patterns = [patterns]
-
-                for field in self.fields:
-                    if field.get("validate_pattern") == logic.get("pattern"):
-                        total += 1
-                        if self.validate_svo_pattern(self.filled_fields[field["key"]], field):
-                            correct += 1
-
-            elif logic_type == "family_validation":
-                for key, is_correct in self.field_scores.items():
-                    total += 1
-                    if is_correct:
-                        correct += 1
-
-            elif logic_type == "custom_svo_block":
-                for key in logic.get("target_fields", []):
-                    total += 1
-                    if self.validate_svo_pattern(self.filled_fields.get(key, ""), {"key": key}):
-                        correct += 1
-            elif logic_type == "custom_clause":
-                total = correct = 0
-                for field in self.fields:
-                    if field.get("llm_behavior") == "validate_clause_expansion":
-                        total += 1
-                        if self.validate_clause_expansion(self.filled_fields.get(field["key"], ""), field):
-                            correct += 1
-
-            elif logic_type == "yesno_or_negative":
-                total = len(self.field_scores)
-                correct = sum(1 for v in self.field_scores.values() if v)
-            elif logic_type == "yesno_pattern_matching":
-                patterns = logic.get("pattern", [])
-                if isinstance(patterns, str):
-                    patterns = [patterns]
-
-                for field in self.fields:
-                    if field.get("validate_pattern") in patterns:
-                        total += 1
-                        key = field["key"]
-                        text = self.filled_fields.get(key, "")
-                        pattern_type = field.get("validate_pattern")
-
-                        if pattern_type == "yesno":
-                            if self.validate_yesno_question(text):
-                                correct += 1
-                        elif pattern_type == "negative":
-                            if self.validate_negative_sentence(text):
-                                correct += 1
-
-            elif logic_type == "pronunciation_check":
-                for field in self.fields:
-                    if field.get("llm_behavior") == "validate_pronunciation":
-                        total += 1
-                        score_key = f"{field['key']}_pron_score"
-                        result_key = f"{field['key']}_pron_result"
-                        result = self.filled_fields.get(result_key, "FAIL")
-                        if result == "PASS":
-                            correct += 1
-            elif logic_type == "synonym_antonym_check":
-                for field in self.fields:
-                    if field.get("llm_behavior") == "validate_synonym_antonym":
-                        total += 1
-                        key = field["key"]
-                        if self.field_scores.get(key, False):
-                            correct += 1
-
-            elif logic_type == "meaningful_response":
-                for field in self.fields:
-                    if field.get("llm_behavior") == "validate_meaningful_response":
-                        total += 1
-                        if self.field_scores.get(field["key"], False):
-                            correct += 1
-
-            elif logic_type == "stress_and_intonation":
-                total = len(self.field_scores)
-                correct = sum(1 for v in self.field_scores.values() if v)
-
-            elif logic_type == "verb_constructs_validation":
-                for field in self.fields:
-                    key = field["key"]
-                    behavior = field.get("llm_behavior", "")
-                    if behavior in ["validate_modal_verb_usage", "validate_first_conditional", "validate_phrasal_verb"]:
-                        total += 1
-                        if self.field_scores.get(key, False):
-                            correct += 1
-            elif logic_type == "custom_command_block":
-                for key in logic.get("target_fields", []):
-                    total += 1
-                    if self.field_scores.get(key):
-                        correct += 1
-
-            elif logic_type == "command_validation":
-                for field in self.fields:
-                    if field.get("llm_behavior") == "validate_command":
-                        total += 1
-                        key = field["key"]
-                        if self.field_scores.get(key, False):
-                            correct += 1
-
-            elif logic_type == "place_description_check":
-                for field in self.fields:
-                    if field.get("llm_behavior") == "validate_place_description":
-                        total += 1
-                        if self.field_scores.get(field["key"]):
-                            correct += 1
-            elif logic_type == "custom_meaningful":
-                for key in logic.get("target_fields", []):
-                    total += 1
-                    if self.field_scores.get(key):
-                        correct += 1
-
-            elif logic_type == "price_check":
-                for field in self.fields:
-                    if field.get("llm_behavior") == "validate_price_question":
-                        total += 1
-                        key = field["key"]
-                        if self.field_scores.get(key, False):
-                            correct += 1
-            elif logic_type == "contextual_dialogue_check":
-                for field in self.fields:
-                    if field.get("llm_behavior") == "validate_contextual_dialogue":
-                        total += 1
-                        if self.field_scores.get(field["key"], False):
-                            correct += 1
-            elif logic_type == "mindmap_check":
-                for field in self.fields:
-                    if field.get("llm_behavior") == "validate_mindmap_ideas":
-                        total += 1
-                        if self.field_scores.get(field["key"], False):
-                            correct += 1
-            elif logic_type == "grammar_constructs_check":
-                for field in self.fields:
-                    if field["llm_behavior"] in ["validate_passive_voice", "validate_reported_speech", "validate_discourse_marker"]:
-                        total += 1
-                        if self.field_scores.get(field["key"], False):
-                            correct += 1
-            elif logic_type == "custom_literature_analysis":
-                for key in logic.get("target_fields", []):
-                    total += 1
-                    if self.field_scores.get(key):
-                        correct += 1
-            elif logic_type == "custom_debate_analysis":
-                for field in self.fields:
-                    if field["key"] in logic.get("target_fields", []):
-                        total += 1
-                        if self.field_scores.get(field["key"], False):
-                            correct += 1
-            elif logic_type == "group_discussion_turns":
-                for key in logic.get("target_fields", []):
-                    total += 1
-                    if self.field_scores.get(key):
-                        correct += 1
+            result = self.scoring.finalize(self.batch_validate)
+            correct, total = result.correct, result.total
 
             if total > 0:
                 score = correct / total
-                passed = score >= (logic.get("minimum_correct", total) / total)
+                passed = result.passed
                 feedback = logic.get("feedback_pass", "Great job!") if passed else logic.get("feedback_fail", "Please try again.")
                 print(f"\nCHATBOT FEEDBACK: {feedback}")
                 self.speak(feedback)
@@ -775,78 +488,73 @@ class ModuleRunner:
                 self.speak(msg)
 
         filename = f"{self.config['module']}_output_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.json"
-        with open(filename, 'w') as f:
+        with timed("write_results", config=self.config.get("module", "")), open(filename, 'w') as f:
             json.dump({**self.filled_fields, "field_results": self.field_results}, f, indent=2)
         print(f"\n📁 Results saved to {filename}")
         
     def assess_summary(self, user_spoken):
-        norm_user = self.normalize(user_spoken)
-        norm_expected = self.normalize(self.expected_summary)
-        score = difflib.SequenceMatcher(None, norm_user, norm_expected).ratio()
+        score = compare(self.expected_summary, user_spoken).score
 
-        if score >= 0.90:
+        if score >= SUMMARY_PASS:
             return "PASS", score
-        elif score >= 0.80:
+        elif score >= SUMMARY_RETRY:
             return "RETRY", score
         else:
             return "FAIL", score
 
     def validate_pronunciation(self, expected: str, spoken: str) -> tuple[str, float]:
-        norm_expected = self.normalize(expected)
-        norm_spoken = self.normalize(spoken)
-        similarity = difflib.SequenceMatcher(None, norm_expected, norm_spoken).ratio()
-        result = "PASS" if similarity >= 0.85 else "RETRY" if similarity >= 0.7 else "FAIL"
+        similarity = compare(expected, spoken).score
+        result = "PASS" if similarity >= PRONUNCIATION_PASS else "RETRY" if similarity >= PRONUNCIATION_RETRY else "FAIL"
         return result, similarity
     
+    def acoustic_verdict(self, check, *args):
+        """Verdict of a prosody check on the recording of this answer; None falls back to the LLM."""
+        if self.last_audio is None:
+            return None
+        try:
+            return check(self.last_audio, *args)
+        except Exception as e:
+            logging.error(f"Acoustic analysis failed: {e}")
+            return None
+
+    def record_contour_match(self, field):
+        """Store how closely the answer's pitch/energy contour follows the reference rendering, if one was built."""
+        reference = contour_text(field) if field else None
+        if self.last_audio is None or not reference:
+            return
+        try:
+            match = contour_store.match(self.last_audio, reference)
+        except Exception as e:
+            logging.error(f"Contour comparison failed: {e}")
+            return
+        if match:
+            self.filled_fields[f"{field['key']}_contour_score"] = round(match.score, 2)
+
     def validate_stress_pattern(self, text, expected_word):
+        verdict = self.acoustic_verdict(check_stress, text, expected_word, contour_store.stress_pattern(expected_word))
+        if verdict is not None:
+            return verdict
         system_prompt = (
             f"Does the pronunciation of the word '{expected_word}' in the user's response '{text}' show correct syllable stress? "
             "Reply only with 'Yes' or 'No'."
         )
-        try:
-            resp = co.chat(
-                chat_history=[{"role": "system", "message": system_prompt}],
-                message=text,
-                temperature=0.2,
-                max_tokens=10
-            )
-            answer = resp.text.strip().lower()
-            logging.info(f"Stress validation result: {answer}")
-            return "yes" in answer
-        except Exception as e:
-            logging.error(f"Stress validation failed: {e}")
-            return False
-    def validate_rising_intonation(self, text):
+        return self._validate_yes_no_prompt(system_prompt, text, "Stress", temperature=0.2, max_tokens=10)
+    def validate_rising_intonation(self, text, field=None):
+        self.record_contour_match(field)
+        verdict = self.acoustic_verdict(check_intonation, "rising")
+        if verdict is not None:
+            return verdict
         system_prompt = (
             "Does the following sentence demonstrate rising intonation (as in a Yes/No question)? "
             "Only answer 'Yes' or 'No'."
         )
-        try:
-            resp = co.chat(
-                chat_history=[{"role": "system", "message": system_prompt}],
-                message=text,
-                temperature=0.2,
-                max_tokens=10
-            )
-            answer = resp.text.strip().lower()
-            logging.info(f"Rising intonation result: {answer}")
-            return "yes" in answer
-        except Exception as e:
-            logging.error(f"Rising intonation validation failed: {e}")
-            return False
+        return self._validate_yes_no_prompt(system_prompt, text, "Rising intonation", temperature=0.2, max_tokens=10)
     def validate_meaningful_response(self, text, field):
         prompt = (
             f"Does the following response appropriately and meaningfully answer the question: '{field.get('prompt')}'?\n"
             f"Answer: '{text}'\n\nReply only 'Yes' or 'No'."
         )
-        try:
-            resp = co.chat(chat_history=[{"role": "system", "message": prompt}], message=text)
-            result = resp.text.strip().lower()
-            logging.info(f"Meaningful response check result: {result}")
-            return "yes" in result
-        except Exception as e:
-            logging.error(f"Meaningful response validation failed: {e}")
-            return False
+        return self._validate_yes_no_prompt(prompt, text, "Meaningful response")
     
     def validate_modal_verb_usage(self, text, field):
         prompt = (
@@ -869,34 +577,33 @@ class ModuleRunner:
         )
         return self._validate_yes_no_prompt(prompt, text, "Phrasal Verb")
 
-    def _validate_yes_no_prompt(self, system_prompt, text, label=""):
+    def _validate_yes_no_prompt(self, system_prompt, text, label="", **chat_params):
+        key = make_key(label, system_prompt, text, chat_params)
+        cached = verdict_cache.get(key)
+        if cached is not None:
+            logging.info(f"{label} validation result (cached): {'yes' if cached else 'no'}")
+            return cached
         try:
-            resp = co.chat(chat_history=[{"role": "system", "message": system_prompt}], message=text)
+            resp = chat(chat_history=[{"role": "system", "message": system_prompt}], message=text, **chat_params)
             result = resp.text.strip().lower()
             logging.info(f"{label} validation result: {result}")
-            return "yes" in result
+            verdict = "yes" in result
         except Exception as e:
             logging.error(f"{label} validation failed: {e}")
             return False
-
-    def validate_falling_intonation(self, text):
+        verdict_cache.put(key, verdict)
+        return verdict
+
+    def validate_falling_intonation(self, text, field=None):
+        self.record_contour_match(field)
+        verdict = self.acoustic_verdict(check_intonation, "falling")
+        if verdict is not None:
+            return verdict
         system_prompt = (
             "Does the following sentence demonstrate falling intonation (as in a wh-question or statement)? "
             "Only answer 'Yes' or 'No'."
         )
-        try:
-            resp = co.chat(
-                chat_history=[{"role": "system", "message": system_prompt}],
-                message=text,
-                temperature=0.2,
-                max_tokens=10
-            )
-            answer = resp.text.strip().lower()
-            logging.info(f"Falling intonation result: {answer}")
-            return "yes" in answer
-        except Exception as e:
-            logging.error(f"Falling intonation validation failed: {e}")
-            return False
+        return self._validate_yes_no_prompt(system_prompt, text, "Falling intonation", temperature=0.2, max_tokens=10)
         
     def validate_command_sentence(self, text, field):
         system_prompt = (   
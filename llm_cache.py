@@ -0,0 +1,117 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+VERDICT_CACHE_SIZE = int(os.getenv("VERDICT_CACHE_SIZE", "4096"))
+VERDICT_CACHE_TTL = float(os.getenv("VERDICT_CACHE_TTL", "86400"))  # seconds
+VERDICT_CACHE_DB = os.getenv("VERDICT_CACHE_DB")  # optional SQLite file for a shared on-disk tier
+
+# Punctuation plus quotes that are not apostrophes inside a word ("don't" keeps its quote)
+_PUNCTUATION = re.compile(r"[\"“”‘’.,!?;:]|(?<!\w)'|'(?!\w)")
+# Closing mark after any trailing quotes, e.g. the "?" in 'Is it raining?"'
+_FINAL_MARK = re.compile(r"([.!?])[\"“”‘’'\s]*$")
+
+
+def normalize_text(text):
+    """Lowercase, drop punctuation and collapse whitespace so trivially different answers share a key.
+
+    The sentence-final mark is kept: "Is it raining?" and "Is it raining." get different verdicts.
+    """
+    text = str(text or "").lower()
+    final = _FINAL_MARK.search(text)
+    text = " ".join(_PUNCTUATION.sub(" ", text).split())
+    return f"{text}{final.group(1)}" if final and text else text
+
+
+def make_key(behavior, system_prompt, transcript, params=None):
+    payload = json.dumps([
+        behavior,
+        normalize_text(system_prompt),
+        normalize_text(transcript),
+        sorted((params or {}).items())
+    ])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class VerdictCache:
+    """Yes/No LLM verdicts: an in-memory LRU in front of an optional SQLite tier, both with a TTL."""
+
+    def __init__(self, max_entries=VERDICT_CACHE_SIZE, ttl=VERDICT_CACHE_TTL, db_path=VERDICT_CACHE_DB):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (verdict, stored_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS verdicts (key TEXT PRIMARY KEY, verdict INTEGER, stored_at REAL)"
+            )
+            self._db.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                verdict, stored_at = entry
+                if now - stored_at <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return verdict
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT verdict, stored_at FROM verdicts WHERE key = ?", (key,)
+                ).fetchone()
+                if row and now - row[1] <= self.ttl:
+                    verdict = bool(row[0])
+                    self._store_locked(key, verdict, row[1])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return verdict
+
+            self.misses += 1
+            return None
+
+    def put(self, key, verdict):
+        now = time.time()
+        with self._lock:
+            self._store_locked(key, bool(verdict), now)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO verdicts (key, verdict, stored_at) VALUES (?, ?, ?)",
+                        (key, int(bool(verdict)), now)
+                    )
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    logging.error(f"Verdict cache write failed: {e}")
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+        }
+
+    def _store_locked(self, key, verdict, stored_at):
+        self._entries[key] = (verdict, stored_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+# Shared by every ModuleRunner in the process
+verdict_cache = VerdictCache()
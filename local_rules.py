@@ -0,0 +1,260 @@
+import os
+import re
+import logging
+import threading
+from collections import Counter
+
+# Set LOCAL_RULES=0 to always defer to the LLM
+LOCAL_RULES_ENABLED = os.getenv("LOCAL_RULES", "1") != "0"
+
+_WORD = re.compile(r"[a-z]+(?:'[a-z]+)?")
+
+SPATIAL_STRONG = [
+    "near", "next to", "behind", "beside", "opposite", "in front of", "between", "across from",
+    "close to", "far from", "on the left", "on the right", "around the corner", "beneath",
+    "above", "below", "under", "inside", "outside", "adjacent to", "in the middle of", "on top of"
+]
+
+DISCOURSE_STRONG = [
+    "however", "therefore", "meanwhile", "moreover", "furthermore", "nevertheless", "nonetheless",
+    "consequently", "in addition", "on the other hand", "as a result", "in contrast", "for example",
+    "for instance", "in conclusion", "similarly", "likewise", "hence", "thus", "besides",
+    "otherwise", "additionally"
+]
+
+TARGET_MODALS = {"must", "should", "might", "mustn't", "shouldn't", "mightn't"}
+OTHER_MODALS = {
+    "may", "can", "could", "would", "will", "shall", "ought",
+    "can't", "couldn't", "wouldn't", "won't", "cannot"
+}
+
+COMPARATIVE_WORDS = {"better", "best", "worse", "worst", "more", "most", "less", "least", "fewer", "further", "farther"}
+SUPERLATIVE_WORDS = {"best", "worst", "most", "least", "fewest", "furthest", "farthest"}
+# Adjectives whose -er/-est forms count as comparatives; anything else ending in -er/-est
+# ("other", "forest", "interest") is left to the LLM
+GRADABLE_ADJECTIVES = {
+    "big", "small", "tall", "short", "fast", "slow", "old", "young", "cheap", "hot", "cold", "warm",
+    "cool", "long", "high", "low", "strong", "weak", "rich", "poor", "easy", "happy", "busy", "heavy",
+    "early", "late", "nice", "large", "near", "clean", "hard", "soft", "quiet", "loud", "bright",
+    "dark", "safe", "wide", "deep", "kind", "smart", "quick", "close", "fine", "great", "thin", "fat",
+    "sweet", "light", "new", "funny", "pretty", "lazy", "healthy", "friendly", "noisy", "tiny", "dry",
+    "wet", "wise", "brave", "calm", "sad", "simple", "clever", "tidy", "dirty", "angry", "hungry",
+    "lucky", "ugly", "cute", "rude", "strange", "fresh", "full", "thick", "tough", "wild", "scary",
+    "crazy", "sunny", "rainy", "windy", "cloudy", "fancy"
+}
+_DOUBLED = {"big", "hot", "thin", "fat", "wet", "sad"}
+
+
+def _grade(adjective, suffix):
+    if adjective in _DOUBLED:
+        return adjective + adjective[-1] + suffix
+    if adjective.endswith("e"):
+        return adjective + suffix[1:]
+    if adjective.endswith("y") and adjective[-2] not in "aeiou":
+        return adjective[:-1] + "i" + suffix
+    return adjective + suffix
+
+
+COMPARATIVE_FORMS = {_grade(a, "er") for a in GRADABLE_ADJECTIVES} | {"better", "worse", "more", "less", "fewer", "further", "farther"}
+SUPERLATIVE_FORMS = {_grade(a, "est") for a in GRADABLE_ADJECTIVES} | SUPERLATIVE_WORDS
+
+# Base-form verbs learners use after modals and do-support; a known verb is needed for a confident PASS
+BASE_VERBS = {
+    "be", "have", "do", "go", "come", "eat", "drink", "study", "work", "wear", "take", "make", "see",
+    "visit", "call", "help", "finish", "stay", "leave", "try", "bring", "buy", "read", "write",
+    "practice", "practise", "listen", "wash", "clean", "sleep", "exercise", "drive", "stop", "start",
+    "keep", "get", "give", "tell", "ask", "wait", "arrive", "check", "pay", "use", "carry", "follow",
+    "remember", "forget", "learn", "speak", "talk", "play", "watch", "walk", "run", "cook", "open",
+    "close", "turn", "switch", "save", "avoid", "look", "like", "love", "want", "need", "know", "think",
+    "live", "travel", "swim", "sing", "dance", "meet", "send", "spend", "wake", "sit", "stand", "join",
+    "attend", "submit", "complete", "prepare", "lock", "fasten", "respect", "rest", "find",
+    "understand", "believe", "enjoy", "move", "change", "pass", "fail", "win"
+}
+
+AUXILIARIES = {
+    "am", "is", "are", "was", "were", "do", "does", "did", "have", "has", "had",
+    "can", "could", "will", "would", "shall", "should", "may", "might", "must",
+    "isn't", "aren't", "wasn't", "weren't", "don't", "doesn't", "didn't", "haven't", "hasn't",
+    "hadn't", "can't", "couldn't", "won't", "wouldn't", "shouldn't"
+}
+# Subject pronouns that can follow an inverted auxiliary ("Do you ...?")
+SUBJECT_PRONOUNS = {"i", "you", "he", "she", "we", "they"}
+# Which subject pronouns each inverted auxiliary agrees with; modals take any subject
+_SINGULAR_3RD = {"he", "she", "it"}
+_OTHERS = {"you", "we", "they"}
+AUX_SUBJECTS = {
+    "am": {"i"}, "is": _SINGULAR_3RD, "isn't": _SINGULAR_3RD, "was": _SINGULAR_3RD | {"i"},
+    "wasn't": _SINGULAR_3RD | {"i"}, "are": _OTHERS, "aren't": _OTHERS, "were": _OTHERS, "weren't": _OTHERS,
+    "does": _SINGULAR_3RD, "doesn't": _SINGULAR_3RD, "do": _OTHERS | {"i"}, "don't": _OTHERS | {"i"},
+    "has": _SINGULAR_3RD, "hasn't": _SINGULAR_3RD, "have": _OTHERS | {"i"}, "haven't": _OTHERS | {"i"},
+}
+BE_AUXILIARIES = {"am", "is", "are", "was", "were", "isn't", "aren't", "wasn't", "weren't"}
+PERFECT_AUXILIARIES = {"has", "have", "had", "hasn't", "haven't", "hadn't"}
+PAST_PARTICIPLES = {"been", "done", "seen", "eaten", "gone", "had", "got", "gotten", "made", "taken", "read", "written", "met", "heard", "found", "bought", "left", "won"}
+# What can follow "Is he/Are you ..." in a well-formed question
+BE_COMPLEMENTS = {
+    "a", "an", "the", "from", "in", "at", "on", "here", "there", "ready", "ok", "okay", "sure", "free",
+    "busy", "tired", "hungry", "happy", "sad", "sick", "ill", "late", "home", "coming", "going", "able",
+    "allowed", "married", "new", "still", "really", "very", "good", "fine", "right", "interested", "afraid"
+}
+WH_WORDS = {"what", "where", "when", "why", "who", "whom", "whose", "which", "how"}
+FILLERS = {"um", "uh", "so", "okay", "ok", "well", "and"}
+
+
+def _tokens(text):
+    return _WORD.findall(str(text or "").lower())
+
+
+def _contains(tokens, phrase):
+    haystack = f" {' '.join(tokens)} "
+    return f" {phrase} " in haystack
+
+
+class RuleEngine:
+    """Cheap deterministic checks tried before the LLM.
+
+    A rule returns True/False when it is confident and None when the answer is
+    ambiguous, in which case the caller falls through to Cohere.
+    """
+
+    def __init__(self, enabled=LOCAL_RULES_ENABLED):
+        self.enabled = enabled
+        self._rules = {}
+        self._vocab = {}  # word -> set of accepted answers from VOCAB_SYNONYMS/VOCAB_ANTONYMS
+        self.counts = Counter()  # (behavior, "local_pass" | "local_fail" | "llm") -> count
+        self._lock = threading.Lock()
+
+    def rule(self, behavior):
+        def register(fn):
+            self._rules[behavior] = fn
+            return fn
+        return register
+
+    def has_rule(self, behavior):
+        return behavior in self._rules
+
+    def register_vocab(self, entries):
+        for entry in entries:
+            answers = {w.strip().lower() for w in entry.get("hint", "").split(",") if w.strip()}
+            self._vocab.setdefault((entry["word"].lower(), entry.get("type", "synonym")), set()).update(answers)
+
+    def vocab_for(self, word, word_type):
+        return self._vocab.get((str(word).lower(), word_type), set())
+
+    def check(self, behavior, text, field=None):
+        rule = self._rules.get(behavior)
+        if not self.enabled or rule is None:
+            return None
+        try:
+            verdict = rule(text, field or {})
+        except Exception as e:
+            logging.error(f"Local rule for {behavior} failed: {e}")
+            verdict = None
+
+        path = "llm" if verdict is None else ("local_pass" if verdict else "local_fail")
+        with self._lock:
+            self.counts[(behavior, path)] += 1
+        if verdict is not None:
+            logging.info(f"{behavior} decided locally: {'PASS' if verdict else 'FAIL'}")
+        return verdict
+
+    def stats(self):
+        with self._lock:
+            return {f"{behavior}:{path}": n for (behavior, path), n in self.counts.items()}
+
+
+rules = RuleEngine()
+
+
+@rules.rule("validate_synonym_antonym")
+def _synonym_antonym(text, field):
+    tokens = _tokens(text)
+    if not tokens:
+        return False
+    word = str(field.get("word", "")).lower()
+    word_type = field.get("word_type", "synonym")
+    accepted = {w.strip().lower() for w in str(field.get("hint", "")).split(",") if w.strip()}
+    accepted |= rules.vocab_for(word, word_type)
+
+    if any(_contains(tokens, answer) for answer in accepted):
+        return True
+    if tokens == [word]:
+        return False
+    return None
+
+
+@rules.rule("validate_place_description")
+def _place_description(text, field):
+    tokens = _tokens(text)
+    if any(_contains(tokens, p) for p in SPATIAL_STRONG):
+        return True
+    # Anything else ("down the road", "upstairs") is for the LLM to judge
+    return None
+
+
+@rules.rule("validate_discourse_marker")
+def _discourse_marker(text, field):
+    tokens = _tokens(text)
+    if any(_contains(tokens, m) for m in DISCOURSE_STRONG):
+        # A marker on its own does not join two ideas
+        return True if len(tokens) >= 6 else None
+    return None
+
+
+@rules.rule("validate_modal_verb_usage")
+def _modal_verb_usage(text, field):
+    tokens = _tokens(text)
+    for i, token in enumerate(tokens):
+        if token not in TARGET_MODALS or i == 0:
+            continue
+        rest = [t for t in tokens[i + 1:] if t not in ("not", "also", "always", "never", "really")]
+        # A known base verb with something after it ("must wear a helmet"); "might went" or a bare
+        # "must wear" is for the LLM
+        if len(rest) >= 2 and rest[0] in BASE_VERBS:
+            return True
+    if any(t in TARGET_MODALS or t in OTHER_MODALS for t in tokens):
+        return None
+    return False
+
+
+@rules.rule("validate_comparative_expression")
+def _comparative_expression(text, field):
+    tokens = _tokens(text)
+    for i, token in enumerate(tokens):
+        prev = tokens[i - 1] if i else ""
+        if token == "than" and (prev in COMPARATIVE_FORMS or (i >= 2 and tokens[i - 2] in ("more", "less"))):
+            return True
+        if prev == "the" and token in SUPERLATIVE_FORMS:
+            return True
+    if "than" in tokens or any(t in COMPARATIVE_WORDS for t in tokens):
+        return None
+    if any(len(t) > 4 and t.endswith(("er", "est")) for t in tokens) or tokens.count("as") >= 2:
+        return None
+    return False
+
+
+@rules.rule("yesno_question_check")
+def _yesno_question(text, field):
+    tokens = _tokens(text)
+    while tokens and tokens[0] in FILLERS:
+        tokens = tokens[1:]
+    if not tokens:
+        return False
+    if tokens[0] in WH_WORDS:
+        return False
+    if tokens[0] in AUXILIARIES and len(tokens) >= 3 and tokens[1] in SUBJECT_PRONOUNS | {"it"}:
+        return True if _inverted_agrees(tokens[0], tokens[1], tokens[2]) else None
+    # Noun-phrase subjects ("Is the shop open?") and anything ungrammatical go to the LLM
+    return None
+
+
+def _inverted_agrees(aux, subject, verb):
+    """Whether "<aux> <subject> <verb>" is a well-formed question opening."""
+    if subject not in AUX_SUBJECTS.get(aux, SUBJECT_PRONOUNS | {"it"}):
+        return False  # "Is you", "Does they"
+    if aux in BE_AUXILIARIES:
+        return verb.endswith("ing") or verb in BE_COMPLEMENTS
+    if aux in PERFECT_AUXILIARIES:
+        return verb.endswith("ed") or verb in PAST_PARTICIPLES
+    # do-support and modals take the base form
+    return verb in BASE_VERBS
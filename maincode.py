@@ -1,26 +1,25 @@
 # engine_config_runner.py
 
-import cohere
 import os
 import json
 import logging
-import sounddevice as sd
 from scipy.io.wavfile import write
-import azure.cognitiveservices.speech as speechsdk
+from speech_pool import speech_pool
+from vad import record_until_silence
 from dotenv import load_dotenv
 from datetime import datetime
-import difflib
+from similarity import compare, SUMMARY_PASS
+from providers import make_llm_client
 
 AUDIO_FILENAME = "input_audio.wav"
 DEFAULT_DURATION = 5
-SIMILARITY_THRESHOLD = 0.90
 
 load_dotenv()
 COHERE_API_KEY = os.getenv("COHERE_API_KEY")
 AZURE_SPEECH_KEY = os.getenv("AZURE_SPEECH_KEY")
 AZURE_REGION = os.getenv("AZURE_REGION", "eastus")
 
-co = cohere.Client(api_key=COHERE_API_KEY)
+co = make_llm_client()  # LLM_PROVIDER picks Cohere or a local fake
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
 class ConfigModuleRunner:
@@ -32,29 +31,23 @@ class ConfigModuleRunner:
 
     def speak(self, text):
         try:
-            speech_config = speechsdk.SpeechConfig(subscription=AZURE_SPEECH_KEY, region=AZURE_REGION)
-            speech_config.speech_synthesis_voice_name = "en-IN-NeerjaNeural"
-            synthesizer = speechsdk.SpeechSynthesizer(speech_config=speech_config)
-            synthesizer.speak_text_async(text).get()
+            speech_pool.speak(text)
         except Exception as e:
             logging.error(f"TTS failed: {e}")
 
     def record_audio(self, duration):
-        logging.info(f"Recording for {duration} seconds...")
-        recording = sd.rec(int(duration * 16000), samplerate=16000, channels=1, dtype='int16')
-        sd.wait()
+        # `duration` is only an upper bound; recording stops once the learner goes quiet
+        logging.info(f"Recording for up to {duration} seconds...")
+        recording = record_until_silence(duration, rate=16000)
         write(AUDIO_FILENAME, 16000, recording)
         return AUDIO_FILENAME
 
     def transcribe_audio(self, filename=AUDIO_FILENAME):
         try:
-            speech_config = speechsdk.SpeechConfig(subscription=AZURE_SPEECH_KEY, region=AZURE_REGION)
-            audio_input = speechsdk.AudioConfig(filename=filename)
-            recognizer = speechsdk.SpeechRecognizer(speech_config=speech_config, audio_config=audio_input)
-            result = recognizer.recognize_once()
-            if result.reason == speechsdk.ResultReason.RecognizedSpeech:
-                logging.info(f"Recognized Text: {result.text}")
-                return result.text.strip()
+            text = speech_pool.recognize_file(filename)
+            if text:
+                logging.info(f"Recognized Text: {text}")
+                return text.strip()
         except Exception as e:
             logging.error(f"Transcription failed: {e}")
         return ""
@@ -72,10 +65,8 @@ class ConfigModuleRunner:
         return ''.join(text.lower().strip().split())
 
     def assess_summary(self, expected, spoken):
-        norm_user = self.normalize(spoken)
-        norm_expected = self.normalize(expected)
-        score = difflib.SequenceMatcher(None, norm_user, norm_expected).ratio()
-        return ("PASS" if score >= SIMILARITY_THRESHOLD else "FAIL", score)
+        score = compare(expected, spoken).score
+        return ("PASS" if score >= SUMMARY_PASS else "FAIL", score)
 
     def run_activity(self, activity):
         filled_fields = {}
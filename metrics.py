@@ -0,0 +1,203 @@
+import math
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+
+import tracing
+
+# Bucket bounds in seconds: 4 log-spaced steps per doubling from 1 ms to ~2 min, so every
+# bucket is within ~19% of its neighbour whatever the scale (HDR-style relative precision)
+BUCKET_BOUNDS = tuple(round(0.001 * 2 ** (i / 4), 6) for i in range(0, 4 * 17 + 1))
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _label_text(labels):
+    if not labels:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n") for _, v in labels)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + "}"
+
+
+class Histogram:
+    """Counts of observations per bucket, plus sum and count, for one label set."""
+
+    def __init__(self, bounds=BUCKET_BOUNDS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile (None when empty)."""
+        with self._lock:
+            counts, total = list(self.counts), self.count
+        if not total:
+            return None
+        rank = max(math.ceil(q * total), 1)
+        running = 0
+        for bound, n in zip(self.bounds + (math.inf,), counts):
+            running += n
+            if running >= rank:
+                return bound
+        return math.inf
+
+    def samples(self, name, labels):
+        with self._lock:
+            counts, total, summed = list(self.counts), self.count, self.sum
+        running = 0
+        for bound, n in zip(self.bounds + (math.inf,), counts):
+            running += n
+            le = "+Inf" if bound == math.inf else repr(bound)
+            yield f"{name}_bucket{_label_text(labels + (('le', le),))} {running}"
+        yield f"{name}_sum{_label_text(labels)} {summed}"
+        yield f"{name}_count{_label_text(labels)} {total}"
+
+
+class Registry:
+    """Process-wide metrics in Prometheus text format.
+
+    Histograms are created per (name, labels) on first use. Collectors are
+    callables run at scrape time that return (name, type, help, [(labels, value)])
+    for counters and gauges kept elsewhere (cache hits, pool depth, ...).
+    """
+
+    def __init__(self):
+        self._histograms = {}  # name -> {labels: Histogram}
+        self._help = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def histogram(self, name, help_text="", **labels):
+        key = tuple(sorted(labels.items()))
+        family = self._histograms.get(name)
+        if family is None or key not in family:
+            with self._lock:
+                family = self._histograms.setdefault(name, {})
+                self._help.setdefault(name, help_text)
+                family.setdefault(key, Histogram())
+        return family[key]
+
+    def add_collector(self, collector):
+        self._collectors.append(collector)
+
+    def render(self):
+        lines = []
+        with self._lock:
+            families = {name: dict(family) for name, family in self._histograms.items()}
+        for name, family in sorted(families.items()):
+            lines.append(f"# HELP {name} {self._help.get(name, '')}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, histogram in sorted(family.items()):
+                lines.extend(histogram.samples(name, labels))
+        for collector in self._collectors:
+            try:
+                families = collector()
+            except Exception as e:
+                lines.append(f"# collector {getattr(collector, '__name__', collector)} failed: {e}")
+                continue
+            for name, kind, help_text, samples in families:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_label_text(tuple(sorted(labels.items())))} {value}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+@contextmanager
+def timed(stage, **labels):
+    """Record how long the block took in voice_stage_seconds{stage=..., **labels}, including when it raises.
+
+    The block is also a span in the session trace, when one is active.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        registry.histogram(
+            "voice_stage_seconds", "Time spent per processing stage", stage=stage, **labels
+        ).observe(elapsed)
+        trace = tracing.current()
+        if trace is not None:
+            trace.complete(stage, started, elapsed, **labels)
+
+
+def _shared_collector():
+    # Imported here so metrics.py stays importable from every module without cycles
+    from llm_cache import verdict_cache
+    from local_rules import rules
+    from tts_cache import phrase_cache
+    from speech_pool import speech_pool
+    from workers import pool_stats
+    from singleflight import llm_flight
+
+    verdicts = verdict_cache.stats()
+    tts = phrase_cache.stats()
+    speech = speech_pool.stats()
+    pools = pool_stats()
+    flight = llm_flight.stats()
+    families = [
+        ("voice_verdict_cache_total", "counter", "LLM verdict cache lookups by result",
+         [({"result": "hit"}, verdicts["hits"]), ({"result": "disk_hit"}, verdicts["disk_hits"]),
+          ({"result": "miss"}, verdicts["misses"])]),
+        ("voice_verdict_cache_entries", "gauge", "Verdicts held in memory", [({}, verdicts["entries"])]),
+        ("voice_local_rule_total", "counter", "Local rule outcomes by behavior and path",
+         [({"behavior": key.split(":", 1)[0], "path": key.split(":", 1)[1]}, n) for key, n in rules.stats().items()]),
+        ("voice_tts_cache_total", "counter", "Phrase cache lookups by result",
+         [({"result": "hit"}, tts["hits"]), ({"result": "miss"}, tts["misses"])]),
+        ("voice_tts_cache_bytes", "gauge", "Bytes of audio in the phrase cache", [({}, tts["bytes"])]),
+        ("voice_speech_synthesizers_total", "counter", "Pooled synthesizers by outcome",
+         [({"outcome": k}, speech[k]) for k in ("created", "reused", "discarded")]),
+        ("voice_speech_synthesizers_idle", "gauge", "Idle pooled synthesizers", [({}, speech["idle"])]),
+        ("voice_llm_calls_total", "counter", "Yes/no LLM calls that went upstream or joined an identical one in flight",
+         [({"result": "upstream"}, flight["leaders"]), ({"result": "coalesced"}, flight["coalesced"])]),
+        ("voice_llm_in_flight", "gauge", "Distinct yes/no LLM calls in flight", [({}, flight["in_flight"])]),
+    ]
+    for field, kind, help_text in (
+        ("active", "gauge", "Calls running in each worker pool"),
+        ("waiting", "gauge", "Calls queued for each worker pool"),
+        ("completed", "counter", "Calls finished by each worker pool"),
+        ("failed", "counter", "Calls that raised in each worker pool"),
+        ("rejected", "counter", "Calls refused because the pool was saturated"),
+    ):
+        families.append((f"voice_worker_{field}" + ("_total" if kind == "counter" else ""), kind, help_text,
+                         [({"pool": name}, stats[field]) for name, stats in pools.items()]))
+    return families
+
+
+registry.add_collector(_shared_collector)
+
+
+def instrument_flask(app):
+    """Time every request into voice_http_request_seconds and serve GET /metrics on `app`."""
+    from flask import Response, g, request
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _observe(response):
+        started = g.pop("metrics_started", None)
+        if started is not None:
+            # Streamed responses are timed to their first byte
+            registry.histogram(
+                "voice_http_request_seconds", "HTTP request latency by route",
+                endpoint=request.url_rule.rule if request.url_rule else "unmatched",
+                method=request.method, status=str(response.status_code)
+            ).observe(time.perf_counter() - started)
+        return response
+
+    app.add_url_rule("/metrics", "metrics", lambda: Response(registry.render(), content_type=CONTENT_TYPE))
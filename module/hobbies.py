@@ -4,7 +4,9 @@ import json
 import logging
 import sounddevice as sd
 from scipy.io.wavfile import write
-import azure.cognitiveservices.speech as speechsdk
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from speech_pool import speech_pool
 from dotenv import load_dotenv
 from datetime import datetime
 import difflib
@@ -45,10 +47,7 @@ class HobbiesModule:
 
     def speak(self, text):
         try:
-            speech_config = speechsdk.SpeechConfig(subscription=AZURE_SPEECH_KEY, region=AZURE_REGION)
-            speech_config.speech_synthesis_voice_name = "en-IN-NeerjaNeural"
-            synthesizer = speechsdk.SpeechSynthesizer(speech_config=speech_config)
-            synthesizer.speak_text_async(text).get()
+            speech_pool.speak(text)
         except Exception as e:
             logging.error(f"Text-to-speech failed: {e}")
 
@@ -62,15 +61,11 @@ class HobbiesModule:
 
     def transcribe_audio(self, filename=AUDIO_FILENAME):
         try:
-            speech_config = speechsdk.SpeechConfig(subscription=AZURE_SPEECH_KEY, region=AZURE_REGION)
-            audio_input = speechsdk.AudioConfig(filename=filename)
-            recognizer = speechsdk.SpeechRecognizer(speech_config=speech_config, audio_config=audio_input)
-
             logging.info("Transcribing audio...")
-            result = recognizer.recognize_once()
-            if result.reason == speechsdk.ResultReason.RecognizedSpeech:
-                logging.info(f"Recognized Text: {result.text}")
-                return result.text.strip()
+            text = speech_pool.recognize_file(filename)
+            if text:
+                logging.info(f"Recognized Text: {text}")
+                return text.strip()
             else:
                 logging.warning("Could not recognize speech.")
                 return ""
@@ -1,15 +1,26 @@
-import cohere
 import os
 import json
 import logging
-import sounddevice as sd
-from scipy.io.wavfile import write
-import azure.cognitiveservices.speech as speechsdk
 from dotenv import load_dotenv
+from llm_cache import verdict_cache, make_key
+from local_rules import rules as local_rules
+from batch_eval import BatchCheck, evaluate_yes_no_batch
+from config_registry import config_registry
+from behaviors import behaviors
+from scoring import ValidationAggregator
+from similarity import compare, missed_words, SUMMARY_PASS, SUMMARY_RETRY, PRONUNCIATION_PASS, PRONUNCIATION_RETRY
+from workers import llm_workers, PoolSaturated
+from singleflight import llm_flight
+from providers import make_llm_client
+from metrics import timed
+import tracing
+from prosody import check_stress, check_intonation
+from contour_store import contour_store, contour_text
 from datetime import datetime
-import difflib
 import time
 import random
+import threading
+import uuid
 
 import random
 
@@ -27,8 +38,11 @@ VOCAB_ANTONYMS = [
     {"word": "tall", "type": "antonym", "hint": "short, tiny"}
 ]
 
+local_rules.register_vocab(VOCAB_SYNONYMS + VOCAB_ANTONYMS)
+
 AUDIO_FILENAME = "input_audio.wav"
 DEFAULT_DURATION = 5
+RETRY_MESSAGE = "Hmm, that wasn't quite right. Let's try again."
 SIMILARITY_THRESHOLD = 0.90
 
 FIELD_RECORDING_DURATION = {
@@ -40,15 +54,28 @@ COHERE_API_KEY = os.getenv("COHERE_API_KEY")
 AZURE_SPEECH_KEY = os.getenv("AZURE_SPEECH_KEY")
 AZURE_REGION = os.getenv("AZURE_REGION", "eastus")
 
-co = cohere.Client(api_key=COHERE_API_KEY)
+co = make_llm_client()  # LLM_PROVIDER picks Cohere or a local fake
+
+
+def chat(flight_key=None, **kwargs):
+    """co.chat through the bounded LLM worker pool; raises PoolSaturated when it is full.
+
+    Concurrent calls with the same `flight_key` (a verdict cache key) share one upstream request.
+    """
+    if flight_key is not None:
+        return llm_flight.do(flight_key, chat, **kwargs)
+    with timed("llm"):
+        return llm_workers.run(co.chat, **kwargs)
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
 
 class ModuleRunner:
-    def __init__(self, config_path, gui_mode=False, ui_callback=None):
+    def __init__(self, config_path, gui_mode=False, ui_callback=None, audio_prefetch=None, trace=False):
         self.config = self.load_config(config_path)
         self.fields = self.config.get("fields", [])
+        # Running correct/total for validation_logic, updated as each field is scored
+        self.scoring = ValidationAggregator(self.config.get("validation_logic"), self.fields)
         self.filled_fields = {}
         self.expected_summary = ""
         self.field_results = {}
@@ -59,14 +86,23 @@ class ModuleRunner:
         self.last_result = {}
         self.gui_mode = gui_mode
         self.ui_callback = ui_callback
+        # audio_prefetch(text) starts rendering speech in the background and returns a URL for it
+        self.audio_prefetch = audio_prefetch
         self.current_field_index = 0
         self.attempts = {}
+        # 16 kHz int16 PCM of the answer being validated, attached by the server for prosody checks
+        self.last_audio = None
+        # Serializes background validation jobs for this learner
+        self._submit_lock = threading.RLock()
+        # Chrome trace of this session when `trace` is set or it is sampled (TRACE_SAMPLE_RATE)
+        self.trace = tracing.start_session(f"{self.config.get('module', 'module')}-{uuid.uuid4().hex[:8]}", trace)
 
     def emit_welcome_and_prompt(self):
         self.current_field_index = 0
-        if "welcome" in self.config:
-            self.notify_ui("welcome", self.config["welcome"])
-        self.prompt_current_field()
+        with tracing.activate(self.trace):
+            if "welcome" in self.config:
+                self.notify_ui("welcome", self.config["welcome"], **self.audio_for(self.config["welcome"]))
+            self.prompt_current_field()
     def emit_closing_if_needed(self):
         if "closing" in self.config:
             self.notify_ui("closing", self.config["closing"])
@@ -84,14 +120,53 @@ class ModuleRunner:
         key = field["key"]
         self.last_prompt = field.get("prompt", "")
         self.last_hint = field.get("hint", "")
-        self.notify_ui("prompt", self.last_prompt, duration=field.get("duration", DEFAULT_DURATION))
+        self.notify_ui(
+            "prompt",
+            self.last_prompt,
+            duration=field.get("duration", DEFAULT_DURATION),
+            field_key=key,
+            **self.audio_for(self.last_prompt)
+        )
 
         if self.last_hint:
-            self.notify_ui("hint", self.last_hint)
+            self.notify_ui("hint", self.last_hint, **self.audio_for(self.last_hint))
 
         self.notify_ui("status", "recording")
 
-    def submit_response(self, text, field_key=None):
+    def audio_for(self, text):
+        """Extra payload fields pointing the client at pre-rendered audio for `text`."""
+        if not self.audio_prefetch or not text:
+            return {}
+        try:
+            url = self.audio_prefetch(text)
+        except Exception as e:
+            logging.error(f"Audio prefetch failed: {e}")
+            return {}
+        return {"audio_url": url} if url else {}
+
+    def prefetch_upcoming(self):
+        """Render whatever can be said after the current answer is judged, while it is being judged.
+
+        Pass (or attempts exhausted) moves to the next field; a retry repeats the current one.
+        """
+        if not self.audio_prefetch:
+            return
+        texts = [RETRY_MESSAGE]
+        for index in (self.current_field_index + 1, self.current_field_index):
+            if index < len(self.fields):
+                texts.extend([self.fields[index].get("prompt"), self.fields[index].get("hint")])
+        for text in texts:
+            self.audio_for(text)
+
+    def submit_response(self, text, field_key=None, on_scored=None):
+        """Score `text` for the current field, then prompt the next field, a retry or the closing.
+
+        `on_scored(key)` runs in between, so whatever it emits reaches the client first.
+        """
+        with self._submit_lock, tracing.activate(self.trace), tracing.span("answer", "runner", field_key=field_key or ""):
+            return self._submit_response(text, field_key, on_scored)
+
+    def _submit_response(self, text, field_key=None, on_scored=None):
         if self.current_field_index >= len(self.fields):
             return
 
@@ -107,14 +182,18 @@ class ModuleRunner:
 
         self.notify_ui("status", "validating")
         self.notify_ui("transcript", text)
+        self.prefetch_upcoming()
 
         result = self.handle_llm_behavior(field, text)
+        self.last_audio = None  # the recording belongs to this answer only
         if result:
             self.filled_fields[key] = result
         else:
             self.filled_fields[key] = "[Unrecognized or skipped]"
 
         self.last_result["feedback"] = self.filled_fields.get("feedback")
+        if on_scored:
+            on_scored(key)
 
         # Early check for field_scores set by LLM validation
         passed = self.field_scores.get(key, False)
@@ -133,7 +212,8 @@ class ModuleRunner:
             self.last_result = {}
             self.prompt_current_field()
         elif attempts < max_attempts:
-            self.notify_ui("retry", "Hmm, that wasn't quite right. Let's try again.")
+            tracing.instant("retry", "runner", field_key=key, attempt=attempts, max_attempts=max_attempts)
+            self.notify_ui("retry", RETRY_MESSAGE, **self.audio_for(RETRY_MESSAGE))
             self.last_result = {}
             self.prompt_current_field()
         else:
@@ -141,21 +221,99 @@ class ModuleRunner:
             self.last_result = {}
             self.prompt_current_field()
 
+    def submit_response_async(self, text, field_key=None, spawn=None):
+        """Queue validation of a response and return its job id straight away.
+
+        The verdict is delivered later as a "verdict" ui_event carrying the same job id.
+        `spawn` starts the job (e.g. socketio.start_background_task); defaults to a thread.
+        """
+        job_id = uuid.uuid4().hex
+        if spawn is None:
+            spawn = lambda fn, *args: threading.Thread(target=fn, args=args, daemon=True).start()
+        spawn(self._run_validation_job, job_id, text, field_key)
+        return job_id
+
+    def _run_validation_job(self, job_id, text, field_key):
+        with self._submit_lock:
+            if self.current_field_index < len(self.fields):
+                current_key = self.fields[self.current_field_index]["key"]
+                if field_key and field_key != current_key:
+                    # An answer to a field the learner has already moved past; scoring it would judge the wrong prompt
+                    logging.warning(f"Validation job {job_id} rejected: field key {field_key} (expected {current_key})")
+                    self.notify_ui("verdict", f"Answer was for {field_key}, but the current field is {current_key}",
+                                   job_id=job_id, field_key=field_key, error=True, stale=True)
+                    return
+                field_key = field_key or current_key
+            emitted = []
+
+            def emit_verdict(key):
+                emitted.append(key)
+                self.notify_ui(
+                    "verdict",
+                    self.filled_fields.get(key, ""),
+                    job_id=job_id,
+                    field_key=key,
+                    passed=self.field_scores.get(key)
+                )
+
+            try:
+                # The verdict goes out before the next prompt (or closing) it leads to
+                self.submit_response(text, field_key, on_scored=emit_verdict)
+                if not emitted:
+                    emit_verdict(field_key)
+            except PoolSaturated as e:
+                logging.warning(f"Validation job {job_id} rejected: {e}")
+                if not emitted:
+                    # Nothing was scored; the learner can simply submit the answer again
+                    self.notify_ui("verdict", str(e), job_id=job_id, field_key=field_key, error=True, busy=True)
+                else:
+                    self._recover_after_verdict(job_id, e)
+            except Exception as e:
+                logging.exception(f"Validation job {job_id} failed")
+                if not emitted:
+                    self.notify_ui("verdict", str(e), job_id=job_id, field_key=field_key, error=True)
+                else:
+                    self._recover_after_verdict(job_id, e)
+
+    def _recover_after_verdict(self, job_id, error):
+        """Moving on failed after the verdict went out; still send the learner a prompt or the closing."""
+        self.notify_ui("error", str(error), job_id=job_id, busy=isinstance(error, PoolSaturated))
+        try:
+            if self.current_field_index < len(self.fields):
+                self.prompt_current_field()
+                return
+            # Module end: keep what was answered even though the final validation did not run
+            self.write_results()
+        except Exception:
+            logging.exception(f"Recovery after validation job {job_id} failed")
+        self.emit_static_closing()
+
     def perform_validation_and_feedback(self):
         if self.config.get("validation_logic"):
             self.notify_ui("status", "validating")
             self.run_validation_logic()
         else:
             self.notify_ui("status", "Module complete — no validation logic.")
+        self.write_results()
 
-        filename = f"{self.config['module']}_output_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.json"
-        with open(filename, 'w') as f:
+    def write_results(self):
+        stamp = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
+        filename = f"{self.config['module']}_output_{stamp}.json"
+        with timed("write_results", config=self.config.get("module", "")), open(filename, 'w') as f:
             json.dump({**self.filled_fields, "field_results": self.field_results}, f, indent=2)
         self.notify_ui("status", f"Results saved to {filename}")
+        if self.trace:
+            try:
+                path = self.trace.dump(tracing.trace_path(self.config['module'], stamp))
+                logging.info(f"Session trace written to {path}")
+            except OSError as e:
+                logging.error(f"Could not write session trace: {e}")
         # self.emit_static_closing()
     def mark_audio_ready(self):
         self.audio_ready = True
     def notify_ui(self, label, message, **kwargs):
+        if self.trace:
+            self.trace.instant(f"ui:{label}", "ui", message=str(message)[:200], **kwargs)
         if self.gui_mode and self.ui_callback:
             payload = {"label": label, "message": message}
             payload.update(kwargs)
@@ -167,13 +325,11 @@ class ModuleRunner:
                 pass
 
     def load_config(self, path):
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        config_path = os.path.join(base_dir, "configs", path)
-
-        if not os.path.exists(config_path):
-            raise FileNotFoundError(f"Config file not found: {config_path}")
-        with open(config_path, 'r') as f:
-            config = json.load(f)
+        # Parsed once by the registry; each runner gets its own copy to mutate
+        config = config_registry.materialize(path)
+        compiled = config_registry.get(path)
+        # Handlers resolved when the config was compiled, keyed by field
+        self.behavior_handlers = {f.key: f.handler for f in compiled.fields} if compiled else {}
 
         if config.get("random_prompt_pool"):
             prompt_fields = config.get("fields", [])
@@ -241,7 +397,7 @@ class ModuleRunner:
         prompt = system_prompt_override or base_prompt
 
         try:
-            resp = co.chat(
+            resp = chat(
                 chat_history=[{"role": "system", "message": prompt}],
                 message=text,
                 temperature=0.3,
@@ -252,6 +408,8 @@ class ModuleRunner:
             if any(phrase in extracted.lower() for phrase in ["no value", "does not contain", "implied"]):
                 return ""
             return extracted
+        except PoolSaturated:
+            raise
         except Exception as e:
             logging.error(f"Cohere extraction failed: {e}")
             return ""
@@ -273,8 +431,11 @@ class ModuleRunner:
 
         try:
             message = f"{field_key}: {value}"
-            resp = co.chat(chat_history=[{"role": "system", "message": system_prompt}], message=message)
+            with timed("acknowledgment", config=self.config.get("module", "")):
+                resp = chat(chat_history=[{"role": "system", "message": system_prompt}], message=message)
             return resp.text.strip()
+        except PoolSaturated:
+            raise
         except Exception as e:
             logging.error(f"Acknowledgment generation failed: {e}")
             return ""
@@ -284,69 +445,41 @@ class ModuleRunner:
             logging.warning("Empty or invalid input for SVO validation.")
             return False
 
-        system_prompt = (
+        return self._validate_yes_no_prompt(self._svo_prompt(text), text.strip(), "SVO", temperature=0.2, max_tokens=10)
+
+    def _svo_prompt(self, text):
+        return (
             "You are an English grammar teacher. Evaluate whether the following sentence follows the Subject-Verb-Object (SVO) pattern. "
             "Only reply 'Yes' or 'No'."
         )
 
-        try:
-            resp = co.chat(
-                chat_history=[{"role": "system", "message": system_prompt}],
-                message=text.strip(),  # ✅ user input goes here
-                temperature=0.2,
-                max_tokens=10
-            )
-            answer = resp.text.strip().lower()
-            logging.info(f"SVO validation result: {answer}")
-            return "yes" in answer
-        except Exception as e:
-            logging.error(f"SVO validation failed: {e}")
-            return False
-
     def validate_clause_expansion(self, text, field):
-        system_prompt = (
+        return self._validate_yes_no_prompt(
+            self._clause_expansion_prompt(text), text, "Clause expansion", temperature=0.2, max_tokens=10
+        )
+
+    def _clause_expansion_prompt(self, text):
+        return (
             "You are a grammar tutor helping students expand sentences meaningfully.\n"
             "Check if the student's response logically expands the sentence: 'I met a girl.'\n"
             "It must include a clause such as 'who', 'where', 'when', or 'because', and maintain the original meaning (that the person met a girl).\n"
             f"Student's response: \"{text}\"\n"
             "Reply only 'Yes' if the response maintains the base meaning and adds a valid clause. Reply 'No' otherwise."
         )
-        try:
-            resp = co.chat(
-                chat_history=[{"role": "system", "message": system_prompt}],
-                message=text,
-                temperature=0.2,
-                max_tokens=10
-            )
-            result = resp.text.strip().lower()
-            logging.info(f"Clause expansion validation result: {result}")
-            return "yes" in result
-        except Exception as e:
-            logging.error(f"Clause expansion validation failed: {e}")
-            return False
     
     def validate_yesno_question(self, text):
         if not isinstance(text, str) or not text.strip():
             return False
 
-        system_prompt = (
+        return self._validate_yes_no_prompt(
+            self._yesno_question_prompt(text), text.strip(), "Yes/No question", temperature=0.2, max_tokens=10
+        )
+
+    def _yesno_question_prompt(self, text):
+        return (
             "You are an English grammar teacher. Is the following sentence a correctly formed Yes/No question? "
             "Answer only 'Yes' or 'No'."
         )
-
-        try:
-            resp = co.chat(
-                chat_history=[{"role": "system", "message": system_prompt}],
-                message=text.strip(),
-                temperature=0.2,
-                max_tokens=10
-            )
-            result = resp.text.strip().lower()
-            logging.info(f"Yes/No question check result: {result}")
-            return "yes" in result
-        except Exception as e:
-            logging.error(f"Yes/No validation failed: {e}")
-            return False
     
     def validate_family_answer(self, user_input, field):
         expected = field.get("hint", "")
@@ -355,14 +488,7 @@ class ModuleRunner:
             f"\nPrompt: {field['prompt']}\nHint (Expected Answer): {expected}\nStudent Answer: {user_input}"
             "\nOnly reply with Yes or No."
         )
-        try:
-            resp = co.chat(chat_history=[{"role": "system", "message": system_prompt}], message=user_input)
-            result = resp.text.strip().lower()
-            logging.info(f"Family validation result: {result}")
-            return "yes" in result
-        except Exception as e:
-            logging.error(f"Validation failed for {field['key']}: {e}")
-            return False  
+        return self._validate_yes_no_prompt(system_prompt, user_input, "Family")  
 
     def validate_adjective_description(self, text, field):
         expected = field.get("hint", "")
@@ -373,42 +499,54 @@ class ModuleRunner:
             f"Student Answer: {text}\n\n"
             "Reply only 'Yes' if the answer is contextually appropriate, otherwise 'No'."
         )
-        try:
-            resp = co.chat(
-                chat_history=[{"role": "system", "message": system_prompt}],
-                message=text,
-                temperature=0.2,
-                max_tokens=10
-            )
-            result = resp.text.strip().lower()
-            logging.info(f"Adjective validation result: {result}")
-            return "yes" in result
-        except Exception as e:
-            logging.error(f"Adjective description validation failed: {e}")
-            return False
+        return self._validate_yes_no_prompt(system_prompt, text, "Adjective description", temperature=0.2, max_tokens=10)
     
     def validate_negative_sentence(self, text):
         if not isinstance(text, str) or not text.strip():
             return False
 
-        system_prompt = (
+        return self._validate_yes_no_prompt(
+            self._negative_sentence_prompt(text), text.strip(), "Negative sentence", temperature=0.2, max_tokens=10
+        )
+
+    def _negative_sentence_prompt(self, text):
+        return (
             "You are an English grammar teacher. Is the following sentence a correct negative sentence in English? "
             "Answer only 'Yes' or 'No'."
         )
 
-        try:
-            resp = co.chat(
-                chat_history=[{"role": "system", "message": system_prompt}],
-                message=text.strip(),
-                temperature=0.2,
-                max_tokens=10
-            )
-            result = resp.text.strip().lower()
-            logging.info(f"Negative sentence check result: {result}")
-            return "yes" in result
-        except Exception as e:
-            logging.error(f"Negative validation failed: {e}")
-            return False
+    def batch_validate(self, checks):
+        """Score (field, behavior) pairs at module end with at most one LLM round-trip.
+
+        Fields already scored by the same behavior during the interaction reuse field_scores.
+        Returns {field_key: bool}.
+        """
+        verdicts = {}
+        pending = []
+        for field, behavior in checks:
+            key = field["key"]
+            text = self.filled_fields.get(key, "")
+            if field.get("llm_behavior") == behavior and key in self.field_scores:
+                verdicts[key] = bool(self.field_scores[key])
+                continue
+            if not isinstance(text, str) or not text.strip():
+                verdicts[key] = False
+                continue
+            text = text.strip()
+            local = local_rules.check(behavior, text, field)
+            if local is not None:
+                verdicts[key] = local
+                continue
+            spec = behaviors.get(behavior)
+            build_prompt = getattr(self, spec.batch_prompt)
+            pending.append(BatchCheck(key, spec.batch_label, build_prompt(text), text, {"temperature": 0.2, "max_tokens": 10}))
+
+        verdicts.update(evaluate_yes_no_batch(
+            chat,
+            pending,
+            fallback=lambda check: self._validate_yes_no_prompt(check.system_prompt, check.text, check.label, **check.params)
+        ))
+        return verdicts
 
     def extract_number_or_fallback(self, field_key, text):
         digits = ''.join(filter(str.isdigit, text))
@@ -429,6 +567,7 @@ class ModuleRunner:
             self.filled_fields["user_summary_spoken"] = user_summary
             self.filled_fields["expected_summary"] = self.expected_summary
             self.filled_fields["similarity_score"] = round(similarity, 2)
+            self.filled_fields["summary_missed_words"] = missed_words(self.expected_summary, user_summary)
 
             if assessment == "PASS":
                 self.filled_fields["assessment"] = "PASS"
@@ -493,288 +632,43 @@ class ModuleRunner:
         self.filled_fields[key] = value if value else "[Unrecognized or skipped]"
 
     def handle_llm_behavior(self, field, user_input):
-        behavior = field.get("llm_behavior")
-
-        def _set_result(field_key, is_correct):
-            self.field_scores[field_key] = is_correct
-            self.field_results[field_key] = "PASS" if is_correct else "FAIL"
-                
-        if behavior == "extract_value":
-            extract_type = field.get("extract_type")
-            if extract_type == "number":
-                value = self.extract_number_or_fallback(field["key"], user_input)
-            else:
-                value = self.extract_with_cohere(field["key"], user_input)
-
-            if value and "The input does not" in value:
-                logging.warning(f"LLM fallback text detected for {field['key']}")
-                value = "[Unrecognized]"
-
-            if field.get("acknowledge"):
-                ack_prompt = field.get("ack_prompt")
-                ack = self.generate_natural_acknowledgment(field["key"], value, custom_prompt=ack_prompt)
-                self.notify_ui("acknowledge", ack)
-            return value
-
-        elif behavior == "acknowledge":
-            ack = self.generate_natural_acknowledgment(field["key"], user_input)
-            self.notify_ui("feedback", ack)
-            self.last_result["feedback"] = ack
-            return ack
-
-        elif behavior == "validate_svo":
-            is_correct = self.validate_svo_pattern(user_input, field)
-            _set_result(field["key"], is_correct)
-            return user_input
-
-        elif behavior == "validate_family_answers":
-            is_correct = self.validate_family_answer(user_input, field)
-            self.field_scores[field["key"]] = is_correct
-            self.field_results[field["key"]] = "PASS" if is_correct else "FAIL"
-            feedback = field.get("feedback_pass") if is_correct else field.get("feedback_fail")
-            if feedback:
-                self.notify_ui("feedback", feedback)
-                self.last_result["feedback"] = feedback
-            return user_input
-        
-        elif behavior == "yesno_question_check":
-            is_correct = self.validate_yesno_question(user_input)
-            _set_result(field["key"], is_correct)
-            feedback = field.get("feedback_pass") if is_correct else field.get("feedback_fail")
-            if feedback:
-                self.notify_ui("feedback", feedback)
-                self.last_result["feedback"] = feedback
-            return user_input
-
-        elif behavior == "negative_sentence_check":
-            is_correct = self.validate_negative_sentence(user_input)
-            _set_result(field["key"], is_correct)
-            feedback = field.get("feedback_pass") if is_correct else field.get("feedback_fail")
-            if feedback:
-                self.notify_ui("feedback", feedback)
-                self.last_result["feedback"] = feedback
-            return user_input
-
-        elif behavior == "validate_clause_expansion":
-            is_correct = self.validate_clause_expansion(user_input, field)
-            _set_result(field["key"], is_correct)
-            feedback = field.get("feedback_pass") if is_correct else field.get("feedback_fail")
-            if feedback:
-                self.notify_ui("feedback", feedback)
-                self.last_result["feedback"] = feedback
-            return user_input
-        
-        elif behavior == "validate_pronunciation":
-            expected_text = field.get("expected")
-            if expected_text:
-                result, score = self.validate_pronunciation(expected_text, user_input)
-                self.field_scores[field["key"]] = result == "PASS"
-                self.filled_fields[f"{field['key']}_pron_score"] = round(score, 2)
-                self.filled_fields[f"{field['key']}_pron_result"] = result
-                feedback = field.get("feedback_pass") if result == "PASS" else field.get("feedback_fail")
-                if feedback:
-                    self.notify_ui("feedback", feedback)
-                    self.last_result["feedback"] = feedback
-            return user_input
-        
-        elif behavior == "validate_stress_pattern":
-            result = self.validate_stress_pattern(user_input, field.get("expected"))
-            self.field_scores[field["key"]] = result
-            feedback = field.get("feedback_pass") if result else field.get("feedback_fail")
-            if feedback:
-                self.notify_ui("feedback", feedback)
-                self.last_result["feedback"] = feedback
-            return user_input
-
-        elif behavior == "validate_rising_intonation":
-            result = self.validate_rising_intonation(user_input)
-            self.field_scores[field["key"]] = result
-            feedback = field.get("feedback_pass") if result else field.get("feedback_fail")
-            if feedback:
-                self.notify_ui("feedback", feedback)
-                self.last_result["feedback"] = feedback
-            return user_input
-
-        elif behavior == "validate_adjective_description":
-            is_correct = self.validate_adjective_description(user_input, field)
-            self.field_scores[field["key"]] = is_correct
-            self.field_results[field["key"]] = "PASS" if is_correct else "FAIL"
-            feedback = field.get("feedback_pass") if is_correct else field.get("feedback_fail")
-            if feedback:
-                self.notify_ui("feedback", feedback)
-                self.last_result["feedback"] = feedback
-            return user_input
-
-        elif behavior == "validate_modal_verb_usage":
-            is_correct = self.validate_modal_verb_usage(user_input, field)
-            self.field_scores[field["key"]] = is_correct
-            self.field_results[field["key"]] = "PASS" if is_correct else "FAIL"
-            feedback = field.get("feedback_pass") if is_correct else field.get("feedback_fail")
-            if feedback:
-                self.notify_ui("feedback", feedback)
-                self.last_result["feedback"] = feedback
-            return user_input
-
-        elif behavior == "validate_first_conditional":
-            is_correct = self.validate_first_conditional(user_input, field)
-            self.field_scores[field["key"]] = is_correct
-            self.field_results[field["key"]] = "PASS" if is_correct else "FAIL"
-            feedback = field.get("feedback_pass") if is_correct else field.get("feedback_fail")
-            if feedback:
-                self.notify_ui("feedback", feedback)
-                self.last_result["feedback"] = feedback
-            return user_input
-
-        elif behavior == "validate_phrasal_verb":
-            is_correct = self.validate_phrasal_verb(user_input, field)
-            self.field_scores[field["key"]] = is_correct
-            self.field_results[field["key"]] = "PASS" if is_correct else "FAIL"
-            feedback = field.get("feedback_pass") if is_correct else field.get("feedback_fail")
-            if feedback:
-                self.notify_ui("feedback", feedback)
-                self.last_result["feedback"] = feedback
-            return user_input
-
-        elif behavior == "validate_falling_intonation":
-            result = self.validate_falling_intonation(user_input)
-            self.field_scores[field["key"]] = result
-            feedback = field.get("feedback_pass") if result else field.get("feedback_fail")
-            if feedback:
-                self.notify_ui("feedback", feedback)
-                self.last_result["feedback"] = feedback
-            return user_input
-
-        elif behavior == "validate_command":
-            is_correct = self.validate_command_sentence(user_input, field)
-            self.field_scores[field["key"]] = is_correct
-            self.field_results[field["key"]] = "PASS" if is_correct else "FAIL"
-            feedback = field.get("feedback_pass") if is_correct else field.get("feedback_fail")
-            if feedback:
-                self.notify_ui("feedback", feedback)
-                self.last_result["feedback"] = feedback
-            return user_input
-        
-        elif behavior == "validate_place_description":
-            is_correct = self.validate_place_description(user_input, field)
-            self.field_scores[field["key"]] = is_correct
-            self.field_results[field["key"]] = "PASS" if is_correct else "FAIL"
-            feedback = field.get("feedback_pass") if is_correct else field.get("feedback_fail")
-            if feedback:
-                self.notify_ui("feedback", feedback)
-                self.last_result["feedback"] = feedback
-            return user_input
-
-        elif behavior == "validate_contextual_dialogue":
-            is_correct = self.validate_contextual_dialogue(user_input, field)
-            self.field_scores[field["key"]] = is_correct
-            self.field_results[field["key"]] = "PASS" if is_correct else "FAIL"
-            feedback = field.get("feedback_pass") if is_correct else field.get("feedback_fail")
-            if feedback:
-                self.notify_ui("feedback", feedback)
-                self.last_result["feedback"] = feedback
-            return user_input
-
-        elif behavior == "validate_synonym_antonym":
-            is_correct = self.validate_synonym_antonym(user_input, field)
-            self.field_scores[field["key"]] = is_correct
-            self.field_results[field["key"]] = "PASS" if is_correct else "FAIL"
-            feedback = field.get("feedback_pass") if is_correct else field.get("feedback_fail")
-            if feedback:
-                self.notify_ui("feedback", feedback)
-                self.last_result["feedback"] = feedback
-            return user_input
-        
-        elif behavior == "validate_meaningful_response_strict":
-            is_correct = self.validate_meaningful_response_strict(user_input, field)
-            self.field_scores[field["key"]] = is_correct
-            self.field_results[field["key"]] = "PASS" if is_correct else "FAIL"
-            feedback = field.get("feedback_pass") if is_correct else field.get("feedback_fail")
-            if feedback:
-                self.notify_ui("feedback", feedback)
-                self.last_result["feedback"] = feedback
-            return user_input
-
-        elif behavior == "validate_mindmap_ideas":
-            is_correct = self.validate_mindmap_ideas(user_input, field)
-            self.field_scores[field["key"]] = is_correct
-            self.field_results[field["key"]] = "PASS" if is_correct else "FAIL"
-            feedback = field.get("feedback_pass") if is_correct else field.get("feedback_fail")
-            if feedback:
-                self.notify_ui("feedback", feedback)
-                self.last_result["feedback"] = feedback
-            return user_input
-
-        elif behavior == "validate_grammar_correction":
-            is_correct = self.validate_grammar_correction(user_input, field)
-            self.field_scores[field["key"]] = is_correct
-            self.field_results[field["key"]] = "PASS" if is_correct else "FAIL"
-            feedback = field.get("feedback_pass") if is_correct else field.get("feedback_fail")
-            if feedback:
-                self.notify_ui("feedback", feedback)
-                self.last_result["feedback"] = feedback
-            return user_input
-
-        elif behavior == "validate_passive_voice":
-            is_correct = self.validate_passive_voice(user_input, field)
-            self.field_scores[field["key"]] = is_correct
-            self.field_results[field["key"]] = "PASS" if is_correct else "FAIL"
-            feedback = field.get("feedback_pass") if is_correct else field.get("feedback_fail")
-            if feedback:
-                self.notify_ui("feedback", feedback)
-                self.last_result["feedback"] = feedback
-            return user_input
-
-        elif behavior == "validate_reported_speech":
-            is_correct = self.validate_reported_speech(user_input, field)
-            self.field_scores[field["key"]] = is_correct
-            self.field_results[field["key"]] = "PASS" if is_correct else "FAIL"
-            feedback = field.get("feedback_pass") if is_correct else field.get("feedback_fail")
-            if feedback:
-                self.notify_ui("feedback", feedback)
-                self.last_result["feedback"] = feedback
+        handler = self.behavior_handlers.get(field["key"]) or behaviors.get(field.get("llm_behavior"))
+        if handler is None:
             return user_input
+        with timed("behavior", behavior=field.get("llm_behavior") or "", config=self.config.get("module", "")):
+            return handler(self, field, user_input)
+
+    def _set_result(self, field, is_correct):
+        self.field_scores[field["key"]] = is_correct
+        self.field_results[field["key"]] = "PASS" if is_correct else "FAIL"
+        self.scoring.record(field["key"], is_correct)
+        feedback = field.get("feedback_pass") if is_correct else field.get("feedback_fail")
+        if feedback:
+            self.notify_ui("feedback", feedback)
+            self.last_result["feedback"] = feedback
 
-        elif behavior == "validate_discourse_marker":
-            is_correct = self.validate_discourse_marker(user_input, field)
-            self.field_scores[field["key"]] = is_correct
-            self.field_results[field["key"]] = "PASS" if is_correct else "FAIL"
-            feedback = field.get("feedback_pass") if is_correct else field.get("feedback_fail")
-            if feedback:
-                self.notify_ui("feedback", feedback)
-                self.last_result["feedback"] = feedback
-            return user_input
-        
-        elif behavior == "validate_debate_response":
-            is_correct = self.validate_debate_response(user_input, field)
-            self.field_scores[field["key"]] = is_correct
-            self.field_results[field["key"]] = "PASS" if is_correct else "FAIL"
-            feedback = field.get("feedback_pass") if is_correct else field.get("feedback_fail")
-            if feedback:
-                self.notify_ui("feedback", feedback)
-                self.last_result["feedback"] = feedback
-            return user_input
-        
-        elif behavior == "validate_comparative_expression":
-            is_correct = self.validate_comparative_expression(user_input, field)
-            self.field_scores[field["key"]] = is_correct
-            self.field_results[field["key"]] = "PASS" if is_correct else "FAIL"
-            feedback = field.get("feedback_pass") if is_correct else field.get("feedback_fail")
-            if feedback:
-                self.notify_ui("feedback", feedback)
-                self.last_result["feedback"] = feedback
-            return user_input
-        
-        elif behavior == "validate_past_tense_response":
-            is_correct = self.validate_past_tense_response(user_input, field)
-            self.field_scores[field["key"]] = is_correct
-            self.field_results[field["key"]] = "PASS" if is_correct else "FAIL"
-            feedback = field.get("feedback_pass") if is_correct else field.get("feedback_fail")
-            if feedback:
-                self.notify_ui("feedback", feedback)
-                self.last_result["feedback"] = feedback
-            return user_input
-        
-        return user_input
+    def _extract_value(self, field, user_input):
+        extract_type = field.get("extract_type")
+        if extract_type == "number":
+            value = self.extract_number_or_fallback(field["key"], user_input)
+        else:
+            value = self.extract_with_cohere(field["key"], user_input)
+
+        if value and "The input does not" in value:
+            logging.warning(f"LLM fallback text detected for {field['key']}")
+            value = "[Unrecognized]"
+
+        if field.get("acknowledge"):
+            ack_prompt = field.get("ack_prompt")
+            ack = self.generate_natural_acknowledgment(field["key"], value, custom_prompt=ack_prompt)
+            self.notify_ui("acknowledge", ack)
+        return value
+
+    def _acknowledge(self, field, user_input):
+        ack = self.generate_natural_acknowledgment(field["key"], user_input)
+        self.notify_ui("feedback", ack)
+        self.last_result["feedback"] = ack
+        return ack
     
     def run(self):
         if "welcome" in self.config:
@@ -804,179 +698,12 @@ class ModuleRunner:
         feedback = ""
         if self.config.get("validation_logic"):
             logic = self.config["validation_logic"]
-            logic_type = logic.get("type", "pattern_match")
-            correct = 0
-            total = 0
-
-            if logic_type == "pattern_match":
-                patterns = logic.get("pattern", [])
-                if isinstance(patterns, str):
-                    patterns = [patterns]
-
-                for field in self.fields:
-                    if field.get("validate_pattern") == logic.get("pattern"):
-                        total += 1
-                        if self.validate_svo_pattern(self.filled_fields[field["key"]], field):
-                            correct += 1
-
-            elif logic_type == "family_validation":
-                for key, is_correct in self.field_scores.items():
-                    total += 1
-                    if is_correct:
-                        correct += 1
-
-            elif logic_type == "custom_svo_block":
-                for key in logic.get("target_fields", []):
-                    total += 1
-                    if self.validate_svo_pattern(self.filled_fields.get(key, ""), {"key": key}):
-                        correct += 1
-
-            elif logic_type == "custom_clause":
-                total = correct = 0
-                for field in self.fields:
-                    if field.get("llm_behavior") == "validate_clause_expansion":
-                        total += 1
-                        if self.validate_clause_expansion(self.filled_fields.get(field["key"], ""), field):
-                            correct += 1
-
-            elif logic_type == "yesno_or_negative":
-                total = len(self.field_scores)
-                correct = sum(1 for v in self.field_scores.values() if v)
-
-            elif logic_type == "yesno_pattern_matching":
-                patterns = logic.get("pattern", [])
-                if isinstance(patterns, str):
-                    patterns = [patterns]
-
-                for field in self.fields:
-                    if field.get("validate_pattern") in patterns:
-                        total += 1
-                        key = field["key"]
-                        text = self.filled_fields.get(key, "")
-                        pattern_type = field.get("validate_pattern")
-
-                        if pattern_type == "yesno":
-                            if self.validate_yesno_question(text):
-                                correct += 1
-                        elif pattern_type == "negative":
-                            if self.validate_negative_sentence(text):
-                                correct += 1
-
-            elif logic_type == "pronunciation_check":
-                for field in self.fields:
-                    if field.get("llm_behavior") == "validate_pronunciation":
-                        total += 1
-                        score_key = f"{field['key']}_pron_score"
-                        result_key = f"{field['key']}_pron_result"
-                        result = self.filled_fields.get(result_key, "FAIL")
-                        if result == "PASS":
-                            correct += 1
-
-            elif logic_type == "synonym_antonym_check":
-                for field in self.fields:
-                    if field.get("llm_behavior") == "validate_synonym_antonym":
-                        total += 1
-                        key = field["key"]
-                        if self.field_scores.get(key, False):
-                            correct += 1
-
-            elif logic_type == "meaningful_response":
-                for field in self.fields:
-                    if field.get("llm_behavior") == "validate_meaningful_response":
-                        total += 1
-                        if self.field_scores.get(field["key"], False):
-                            correct += 1
-
-            elif logic_type == "stress_and_intonation":
-                total = len(self.field_scores)
-                correct = sum(1 for v in self.field_scores.values() if v)
-
-            elif logic_type == "verb_constructs_validation":
-                for field in self.fields:
-                    key = field["key"]
-                    behavior = field.get("llm_behavior", "")
-                    if behavior in ["validate_modal_verb_usage", "validate_first_conditional", "validate_phrasal_verb"]:
-                        total += 1
-                        if self.field_scores.get(key, False):
-                            correct += 1
-            elif logic_type == "custom_command_block":
-                for key in logic.get("target_fields", []):
-                    total += 1
-                    if self.field_scores.get(key):
-                        correct += 1
-
-            elif logic_type == "command_validation":
-                for field in self.fields:
-                    if field.get("llm_behavior") == "validate_command":
-                        total += 1
-                        key = field["key"]
-                        if self.field_scores.get(key, False):
-                            correct += 1
-
-            elif logic_type == "place_description_check":
-                for field in self.fields:
-                    if field.get("llm_behavior") == "validate_place_description":
-                        total += 1
-                        if self.field_scores.get(field["key"]):
-                            correct += 1
-
-            elif logic_type == "custom_meaningful":
-                for key in logic.get("target_fields", []):
-                    total += 1
-                    if self.field_scores.get(key):
-                        correct += 1
-
-            elif logic_type == "price_check":
-                for field in self.fields:
-                    if field.get("llm_behavior") == "validate_price_question":
-                        total += 1
-                        key = field["key"]
-                        if self.field_scores.get(key, False):
-                            correct += 1
-
-            elif logic_type == "contextual_dialogue_check":
-                for field in self.fields:
-                    if field.get("llm_behavior") == "validate_contextual_dialogue":
-                        total += 1
-                        if self.field_scores.get(field["key"], False):
-                            correct += 1
-
-            elif logic_type == "mindmap_check":
-                for field in self.fields:
-                    if field.get("llm_behavior") == "validate_mindmap_ideas":
-                        total += 1
-                        if self.field_scores.get(field["key"], False):
-                            correct += 1
-
-            elif logic_type == "grammar_constructs_check":
-                for field in self.fields:
-                    if field["llm_behavior"] in ["validate_passive_voice", "validate_reported_speech", "validate_discourse_marker"]:
-                        total += 1
-                        if self.field_scores.get(field["key"], False):
-                            correct += 1
-
-            elif logic_type == "custom_literature_analysis":
-                for key in logic.get("target_fields", []):
-                    total += 1
-                    if self.field_scores.get(key):
-                        correct += 1
-
-            elif logic_type == "custom_debate_analysis":
-                for field in self.fields:
-                    if field["key"] in logic.get("target_fields", []):
-                        total += 1
-                        if self.field_scores.get(field["key"], False):
-                            correct += 1
-                            
-            elif logic_type == "group_discussion_turns":
-                for key in logic.get("target_fields", []):
-                    total += 1
-                    if self.field_scores.get(key):
-                        correct += 1
+            result = self.scoring.finalize(self.batch_validate)
+            correct, total = result.correct, result.total
 
             if total > 0:
                 score = correct / total
-                passed = score >= (logic.get("minimum_correct", total) / total)
+                passed = result.passed
                 feedback = logic.get("feedback_pass", "Great job!") if passed else logic.get("feedback_fail", "Please try again.")
                 #print(f"\nCHATBOT FEEDBACK: {feedback}")
                 #self.speak(feedback)
@@ -1031,80 +758,75 @@ class ModuleRunner:
             self.notify_ui("closing", self.config["closing"])
 
         filename = f"{self.config['module']}_output_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.json"
-        with open(filename, 'w') as f:
+        with timed("write_results", config=self.config.get("module", "")), open(filename, 'w') as f:
             json.dump({**self.filled_fields, "field_results": self.field_results}, f, indent=2)
         self.notify_ui("status", f"Results saved to {filename}")
         self.emit_static_closing()
         
     def assess_summary(self, user_spoken):
-        norm_user = self.normalize(user_spoken)
-        norm_expected = self.normalize(self.expected_summary)
-        score = difflib.SequenceMatcher(None, norm_user, norm_expected).ratio()
+        score = compare(self.expected_summary, user_spoken).score
 
-        if score >= 0.90:
+        if score >= SUMMARY_PASS:
             return "PASS", score
-        elif score >= 0.80:
+        elif score >= SUMMARY_RETRY:
             return "RETRY", score
         else:
             return "FAIL", score
 
     def validate_pronunciation(self, expected: str, spoken: str) -> tuple[str, float]:
-        norm_expected = self.normalize(expected)
-        norm_spoken = self.normalize(spoken)
-        similarity = difflib.SequenceMatcher(None, norm_expected, norm_spoken).ratio()
-        result = "PASS" if similarity >= 0.85 else "RETRY" if similarity >= 0.7 else "FAIL"
+        similarity = compare(expected, spoken).score
+        result = "PASS" if similarity >= PRONUNCIATION_PASS else "RETRY" if similarity >= PRONUNCIATION_RETRY else "FAIL"
         return result, similarity
     
+    def acoustic_verdict(self, check, *args):
+        """Verdict of a prosody check on the recording of this answer; None falls back to the LLM."""
+        if self.last_audio is None:
+            return None
+        try:
+            return check(self.last_audio, *args)
+        except Exception as e:
+            logging.error(f"Acoustic analysis failed: {e}")
+            return None
+
+    def record_contour_match(self, field):
+        """Store how closely the answer's pitch/energy contour follows the reference rendering, if one was built."""
+        reference = contour_text(field) if field else None
+        if self.last_audio is None or not reference:
+            return
+        try:
+            match = contour_store.match(self.last_audio, reference)
+        except Exception as e:
+            logging.error(f"Contour comparison failed: {e}")
+            return
+        if match:
+            self.filled_fields[f"{field['key']}_contour_score"] = round(match.score, 2)
+
     def validate_stress_pattern(self, text, expected_word):
+        verdict = self.acoustic_verdict(check_stress, text, expected_word, contour_store.stress_pattern(expected_word))
+        if verdict is not None:
+            return verdict
         system_prompt = (
             f"Does the pronunciation of the word '{expected_word}' in the user's response '{text}' show correct syllable stress? "
             "Reply only with 'Yes' or 'No'."
         )
-        try:
-            resp = co.chat(
-                chat_history=[{"role": "system", "message": system_prompt}],
-                message=text,
-                temperature=0.2,
-                max_tokens=10
-            )
-            answer = resp.text.strip().lower()
-            logging.info(f"Stress validation result: {answer}")
-            return "yes" in answer
-        except Exception as e:
-            logging.error(f"Stress validation failed: {e}")
-            return False
+        return self._validate_yes_no_prompt(system_prompt, text, "Stress", temperature=0.2, max_tokens=10)
         
-    def validate_rising_intonation(self, text):
+    def validate_rising_intonation(self, text, field=None):
+        self.record_contour_match(field)
+        verdict = self.acoustic_verdict(check_intonation, "rising")
+        if verdict is not None:
+            return verdict
         system_prompt = (
             "Does the following sentence demonstrate rising intonation (as in a Yes/No question)? "
             "Only answer 'Yes' or 'No'."
         )
-        try:
-            resp = co.chat(
-                chat_history=[{"role": "system", "message": system_prompt}],
-                message=text,
-                temperature=0.2,
-                max_tokens=10
-            )
-            answer = resp.text.strip().lower()
-            logging.info(f"Rising intonation result: {answer}")
-            return "yes" in answer
-        except Exception as e:
-            logging.error(f"Rising intonation validation failed: {e}")
-            return False
+        return self._validate_yes_no_prompt(system_prompt, text, "Rising intonation", temperature=0.2, max_tokens=10)
     def validate_meaningful_response(self, text, field):
         prompt = (
             f"Does the following response appropriately and meaningfully answer the question: '{field.get('prompt')}'?\n"
             f"Answer: '{text}'\n\nReply only 'Yes' or 'No'."
         )
-        try:
-            resp = co.chat(chat_history=[{"role": "system", "message": prompt}], message=text)
-            result = resp.text.strip().lower()
-            logging.info(f"Meaningful response check result: {result}")
-            return "yes" in result
-        except Exception as e:
-            logging.error(f"Meaningful response validation failed: {e}")
-            return False
+        return self._validate_yes_no_prompt(prompt, text, "Meaningful response")
     
     def validate_modal_verb_usage(self, text, field):
         prompt = (
@@ -1127,34 +849,35 @@ class ModuleRunner:
         )
         return self._validate_yes_no_prompt(prompt, text, "Phrasal Verb")
 
-    def _validate_yes_no_prompt(self, system_prompt, text, label=""):
+    def _validate_yes_no_prompt(self, system_prompt, text, label="", **chat_params):
+        key = make_key(label, system_prompt, text, chat_params)
+        cached = verdict_cache.get(key)
+        if cached is not None:
+            logging.info(f"{label} validation result (cached): {'yes' if cached else 'no'}")
+            return cached
         try:
-            resp = co.chat(chat_history=[{"role": "system", "message": system_prompt}], message=text)
+            resp = chat(flight_key=key, chat_history=[{"role": "system", "message": system_prompt}], message=text, **chat_params)
             result = resp.text.strip().lower()
             logging.info(f"{label} validation result: {result}")
-            return "yes" in result
+            verdict = "yes" in result
+        except PoolSaturated:
+            raise
         except Exception as e:
             logging.error(f"{label} validation failed: {e}")
             return False
-
-    def validate_falling_intonation(self, text):
+        verdict_cache.put(key, verdict)
+        return verdict
+
+    def validate_falling_intonation(self, text, field=None):
+        self.record_contour_match(field)
+        verdict = self.acoustic_verdict(check_intonation, "falling")
+        if verdict is not None:
+            return verdict
         system_prompt = (
             "Does the following sentence demonstrate falling intonation (as in a wh-question or statement)? "
             "Only answer 'Yes' or 'No'."
         )
-        try:
-            resp = co.chat(
-                chat_history=[{"role": "system", "message": system_prompt}],
-                message=text,
-                temperature=0.2,
-                max_tokens=10
-            )
-            answer = resp.text.strip().lower()
-            logging.info(f"Falling intonation result: {answer}")
-            return "yes" in answer
-        except Exception as e:
-            logging.error(f"Falling intonation validation failed: {e}")
-            return False
+        return self._validate_yes_no_prompt(system_prompt, text, "Falling intonation", temperature=0.2, max_tokens=10)
         
     def validate_command_sentence(self, text, field):
         system_prompt = (   
@@ -1265,19 +988,20 @@ class ModuleRunner:
         return self._validate_yes_no_prompt(prompt, text, "Past Tense Validation")
     def run_validation_logic(self):
         logic = self.config.get("validation_logic", {})
-        minimum_correct = logic.get("minimum_correct", 1)
         feedback_pass = logic.get("feedback_pass", "Well done!")
         feedback_fail = logic.get("feedback_fail", "Let's try again.")
 
-        passed_fields = [k for k, v in self.field_scores.items() if v]
-        passed_count = len(passed_fields)
-
-        if passed_count >= minimum_correct:
-            self.notify_ui("feedback", feedback_pass)
-            self.filled_fields["feedback"] = feedback_pass
+        # Same logic_type scoring as run(); counters were kept up to date while fields were answered
+        result = self.scoring.finalize(self.batch_validate)
+        if result.total == 0:
+            feedback = "No applicable validation fields."
+            self.filled_fields["score"] = "N/A"
         else:
-            self.notify_ui("feedback", feedback_fail)
-            self.filled_fields["feedback"] = feedback_fail
+            feedback = feedback_pass if result.passed else feedback_fail
+            self.filled_fields["score"] = round(result.correct / result.total * 100, 2)
+
+        self.notify_ui("feedback", feedback)
+        self.filled_fields["feedback"] = feedback
 if __name__ == "__main__":
     import argparse
 
@@ -0,0 +1,217 @@
+import os
+import logging
+from collections import namedtuple
+
+import numpy as np
+
+from audio_codec import TARGET_RATE
+from vad import as_samples, frame_features, speech_mask
+from similarity import words
+
+HOP_MS = 10
+PITCH_WINDOW_MS = 30
+PITCH_MIN_HZ = 70
+PITCH_MAX_HZ = 400
+YIN_THRESHOLD = 0.15  # cumulative-mean-normalized difference below this counts as periodic
+INTONATION_TAIL_SECONDS = 0.5  # the contour is judged on the last half second of voiced speech
+INTONATION_SLOPE = float(os.getenv("INTONATION_SLOPE", "3.0"))  # semitones/second that counts as rising or falling
+MIN_VOICED_FRAMES = 8
+NUCLEUS_MIN_GAP_MS = 120  # two syllable peaks closer than this are one syllable
+NUCLEUS_DIP_DB = 2.0  # energy has to drop this much between two syllables
+# Clips reaching here are already VAD-trimmed, so a floor taken from their own quietest
+# frames would sit inside speech; judge voicing against VAD_MIN_ENERGY alone
+TRIMMED_NOISE_FLOOR = 0.0
+
+# word -> (syllables, index of the stressed syllable)
+STRESS_LEXICON = {
+    "teacher": (2, 0), "doctor": (2, 0), "water": (2, 0), "happy": (2, 0), "student": (2, 0),
+    "mother": (2, 0), "father": (2, 0), "window": (2, 0), "table": (2, 0), "pencil": (2, 0),
+    "hotel": (2, 1), "today": (2, 1), "about": (2, 1), "begin": (2, 1), "again": (2, 1), "hello": (2, 1),
+    "banana": (3, 1), "computer": (3, 1), "tomorrow": (3, 1), "potato": (3, 1), "important": (3, 1),
+    "photograph": (3, 0), "family": (3, 0), "beautiful": (3, 0), "elephant": (3, 0), "yesterday": (3, 0),
+    "photographer": (4, 1), "economy": (4, 1), "information": (4, 2), "education": (4, 2),
+}
+
+# f0 in Hz per hop (NaN where unvoiced); times in seconds
+PitchTrack = namedtuple("PitchTrack", ["f0", "times"])
+# direction: "rising", "falling" or "level"; slope in semitones/second over the final stretch
+Contour = namedtuple("Contour", ["direction", "slope", "voiced_seconds"])
+# start/end in seconds; prominence combines loudness, length and pitch of the syllable
+Syllable = namedtuple("Syllable", ["start", "end", "energy", "pitch", "prominence"])
+
+
+def _frames(samples, frame_len, hop):
+    count = max((len(samples) - frame_len) // hop + 1, 0)
+    if count == 0:
+        return np.zeros((0, frame_len), dtype=np.float32)
+    view = np.lib.stride_tricks.sliding_window_view(samples, frame_len)[::hop][:count]
+    return view.astype(np.float32)
+
+
+def pitch_track(pcm, rate=TARGET_RATE):
+    """YIN fundamental frequency for every 10 ms hop, computed for all frames at once."""
+    samples = as_samples(pcm)
+    hop = int(rate * HOP_MS / 1000)
+    window = int(rate * PITCH_WINDOW_MS / 1000)
+    tau_min, tau_max = int(rate / PITCH_MAX_HZ), int(rate / PITCH_MIN_HZ)
+    frames = _frames(samples, window + tau_max, hop)
+    if not len(frames):
+        return PitchTrack(np.zeros(0), np.zeros(0))
+
+    # Difference function d(tau) = e(0) + e(tau) - 2 r(tau), with r from one FFT per frame
+    size = 1 << int(np.ceil(np.log2(2 * frames.shape[1])))
+    head = np.fft.rfft(frames[:, :window], size)
+    whole = np.fft.rfft(frames, size)
+    corr = np.fft.irfft(np.conj(head) * whole, size)[:, :tau_max + 1]
+    power = np.cumsum(np.pad(frames * frames, ((0, 0), (1, 0))), axis=1)
+    taus = np.arange(tau_max + 1)
+    energy = power[:, taus + window] - power[:, taus]
+    diff = np.maximum(energy[:, :1] + energy - 2 * corr, 0.0)
+
+    # Cumulative mean normalized difference
+    cmnd = np.ones_like(diff)
+    running = np.cumsum(diff[:, 1:], axis=1)
+    cmnd[:, 1:] = diff[:, 1:] * taus[1:] / np.maximum(running, 1e-9)
+    cmnd[:, :tau_min] = 1.0
+
+    # First dip under the threshold, then down to the bottom of that dip
+    below = cmnd < YIN_THRESHOLD
+    periodic = below.any(axis=1)
+    tau = np.argmax(below, axis=1)
+    rows = np.arange(len(tau))
+    for _ in range(tau_max - tau_min):
+        step = (tau < tau_max) & (cmnd[rows, np.minimum(tau + 1, tau_max)] < cmnd[rows, tau])
+        if not step.any():
+            break
+        tau = tau + step
+
+    # Parabolic interpolation around the chosen lag
+    left = cmnd[rows, np.maximum(tau - 1, 0)]
+    mid = cmnd[rows, tau]
+    right = cmnd[rows, np.minimum(tau + 1, tau_max)]
+    denom = left - 2 * mid + right
+    shift = np.where(np.abs(denom) > 1e-9, 0.5 * (left - right) / np.where(denom == 0, 1, denom), 0.0)
+    period = tau + np.clip(shift, -1, 1)
+
+    rms, zcr = frame_features(samples, rate, HOP_MS)
+    voiced = speech_mask(rms, zcr, noise_floor=TRIMMED_NOISE_FLOOR)[:len(frames)]
+    voiced = np.pad(voiced, (0, len(frames) - len(voiced)))
+    f0 = np.where(periodic & voiced & (period > 0), rate / np.maximum(period, 1), np.nan)
+    times = (np.arange(len(frames)) * hop + window / 2) / rate
+    return PitchTrack(f0, times)
+
+
+def _semitones(f0):
+    return 12 * np.log2(f0 / np.nanmedian(f0))
+
+
+def intonation(pcm, rate=TARGET_RATE):
+    """Direction of the pitch movement at the end of the utterance, or None if too little was voiced."""
+    track = pitch_track(pcm, rate)
+    voiced = ~np.isnan(track.f0)
+    if voiced.sum() < MIN_VOICED_FRAMES:
+        return None
+    times, f0 = track.times[voiced], track.f0[voiced]
+    # Octave jumps are tracking errors, not intonation
+    st = _semitones(f0)
+    keep = np.abs(st) < 9
+    times, st = times[keep], st[keep]
+    tail = times >= times[-1] - INTONATION_TAIL_SECONDS if len(times) else keep
+    if tail.sum() < MIN_VOICED_FRAMES:
+        return None
+    slope = float(np.polyfit(times[tail], st[tail], 1)[0])
+    if slope >= INTONATION_SLOPE:
+        direction = "rising"
+    elif slope <= -INTONATION_SLOPE:
+        direction = "falling"
+    else:
+        direction = "level"
+    return Contour(direction, slope, len(times) * HOP_MS / 1000)
+
+
+def syllables(pcm, rate=TARGET_RATE):
+    """Syllable nuclei found as peaks of the smoothed energy envelope within voiced speech."""
+    samples = as_samples(pcm)
+    rms, zcr = frame_features(samples, rate, HOP_MS)
+    if not len(rms):
+        return []
+    voiced = speech_mask(rms, zcr, noise_floor=TRIMMED_NOISE_FLOOR)
+    db = 20 * np.log10(np.maximum(np.convolve(rms, np.ones(5) / 5, mode="same"), 1.0))
+    track = pitch_track(samples, rate)
+    f0 = np.full(len(db), np.nan)
+    f0[:min(len(track.f0), len(db))] = track.f0[:len(db)]
+
+    is_peak = np.r_[False, (db[1:-1] >= db[:-2]) & (db[1:-1] > db[2:]), False] & voiced
+    peaks = []
+    min_gap = NUCLEUS_MIN_GAP_MS // HOP_MS
+    for p in np.flatnonzero(is_peak):
+        if peaks and (p - peaks[-1] < min_gap or db[peaks[-1]:p + 1].min() > min(db[p], db[peaks[-1]]) - NUCLEUS_DIP_DB):
+            if db[p] > db[peaks[-1]]:
+                peaks[-1] = p
+            continue
+        peaks.append(p)
+
+    result = []
+    for i, p in enumerate(peaks):
+        # A syllable runs from the energy valley before its peak to the valley after it
+        lo = peaks[i - 1] + int(np.argmin(db[peaks[i - 1]:p + 1])) if i else int(np.flatnonzero(voiced)[0])
+        hi = p + int(np.argmin(db[p:peaks[i + 1] + 1])) if i + 1 < len(peaks) else int(np.flatnonzero(voiced)[-1]) + 1
+        pitch = f0[lo:hi]
+        pitch = float(np.nanmean(pitch)) if np.any(~np.isnan(pitch)) else np.nan
+        result.append([lo * HOP_MS / 1000, hi * HOP_MS / 1000, float(db[p]), pitch])
+
+    if not result:
+        return []
+    table = np.array(result, dtype=float)
+    durations = table[:, 1] - table[:, 0]
+    pitches = np.where(np.isnan(table[:, 3]), np.nanmean(table[:, 3]) if np.any(~np.isnan(table[:, 3])) else 0, table[:, 3])
+
+    def z(values):
+        spread = values.std()
+        return (values - values.mean()) / spread if spread > 1e-9 else np.zeros_like(values)
+
+    # Stressed syllables are louder, longer and higher; loudness is the most reliable cue
+    prominence = 0.5 * z(table[:, 2]) + 0.3 * z(durations) + 0.2 * z(pitches)
+    return [Syllable(s, e, en, p, float(pr)) for (s, e, en, p), pr in zip(result, prominence)]
+
+
+def stressed_syllable(pcm, syllable_count, rate=TARGET_RATE):
+    """Index of the most prominent of `syllable_count` syllables, or None when nothing was heard."""
+    found = syllables(pcm, rate)
+    if not found:
+        return None
+    strongest = max(range(len(found)), key=lambda i: found[i].prominence)
+    if len(found) == syllable_count:
+        return strongest
+    # Syllables merged or split: place the strongest peak proportionally within the word
+    start, end = found[0].start, found[-1].end
+    middle = (found[strongest].start + found[strongest].end) / 2
+    return min(int((middle - start) / max(end - start, 1e-3) * syllable_count), syllable_count - 1)
+
+
+def check_stress(pcm, text, word, pattern=None, rate=TARGET_RATE):
+    """Acoustic stress verdict for `word`, or None when it cannot be judged from the audio.
+
+    `pattern` is a (syllables, stressed index) for words missing from the lexicon.
+    Only a recording of the word on its own is judged; a sentence around it would
+    put its own stresses into the energy envelope.
+    """
+    word = (word or "").lower()
+    pattern = STRESS_LEXICON.get(word, pattern)
+    if pattern is None or words(text) != [word]:
+        return None
+    count, expected = pattern
+    heard = stressed_syllable(pcm, count, rate)
+    if heard is None:
+        return None
+    logging.info(f"Stress on '{word}': heard syllable {heard + 1}/{count}, expected {expected + 1}")
+    return heard == expected
+
+
+def check_intonation(pcm, direction, rate=TARGET_RATE):
+    """Acoustic rising/falling verdict, or None when too little voiced speech was recorded."""
+    contour = intonation(pcm, rate)
+    if contour is None:
+        return None
+    logging.info(f"Intonation: {contour.direction} ({contour.slope:+.1f} st/s), expected {direction}")
+    return contour.direction == direction
@@ -0,0 +1,215 @@
+import os
+import re
+import json
+import time
+import random
+import logging
+import threading
+from collections import namedtuple
+
+from batch_eval import BATCH_SYSTEM_PROMPT
+
+# Provider settings are read when a client is made, after the runners' load_dotenv():
+# LLM_PROVIDER ("cohere", "fake" in-process, "http" local fake server), FAKE_LLM_URL,
+# FAKE_LLM_LATENCY_MS, FAKE_LLM_ERROR_RATE, FAKE_LLM_SCRIPT (JSON file of scripted replies)
+# and FAKE_SEED (fixes latency/error draws for reproducible runs).
+DEFAULT_FAKE_LLM_URL = "http://127.0.0.1:8765"
+LLM_HTTP_TIMEOUT = float(os.getenv("LLM_HTTP_TIMEOUT", "30"))
+
+# Replies for the non yes/no prompts, so extraction and acknowledgments look plausible
+DEFAULT_RULES = [
+    {"match": "extract only the value", "reply": "{message}"},
+    {"match": "acknowledge", "reply": "That sounds wonderful, thanks for sharing!"},
+]
+
+_BATCH_CHECK = re.compile(r"Check (\d+):\nInstructions: (.*?)\nStudent text: \"(.*?)\"(?=\n\nCheck \d+:|\Z)", re.S)
+
+# Same shape as cohere's chat response as far as the runners are concerned
+ChatReply = namedtuple("ChatReply", ["text"])
+
+
+class ProviderError(RuntimeError):
+    """Injected failure or unusable reply from a fake provider."""
+
+
+class Latency:
+    """Delay distribution in milliseconds.
+
+    Specs: "120" (fixed), "50-200" (uniform) or "lognormal:120:0.5" (median, sigma).
+    """
+
+    def __init__(self, spec="0", rng=None):
+        self.spec = str(spec or "0")
+        self.rng = rng or random.Random()
+        if self.spec.startswith("lognormal:"):
+            _, median, sigma = self.spec.split(":")
+            self._draw = lambda: self.rng.lognormvariate(0, float(sigma)) * float(median)
+        elif "-" in self.spec:
+            low, high = (float(x) for x in self.spec.split("-", 1))
+            self._draw = lambda: self.rng.uniform(low, high)
+        else:
+            fixed = float(self.spec)
+            self._draw = lambda: fixed
+
+    def sample(self):
+        """Next delay in seconds."""
+        return max(self._draw(), 0.0) / 1000.0
+
+
+class Faults:
+    """Latency plus a random failure rate, applied before every fake call."""
+
+    def __init__(self, name, latency="0", error_rate=0.0, seed=None):
+        self.name = name
+        self.rng = random.Random(f"{seed}:{name}" if seed is not None else None)
+        self.latency = Latency(latency, self.rng)
+        self.error_rate = error_rate
+        self._lock = threading.Lock()
+
+    def apply(self):
+        with self._lock:
+            delay = self.latency.sample()
+            fail = self.rng.random() < self.error_rate
+        if delay:
+            time.sleep(delay)  # green under eventlet, so other learners keep running
+        if fail:
+            raise ProviderError(f"Injected {self.name} failure")
+
+
+class FakeChatClient:
+    """In-process stand-in for cohere.Client.
+
+    Replies come from script rules: {"rules": [{"match": "rising intonation", "reply": "No"}],
+    "default": "Yes"}. The first rule whose `match` is a case-insensitive substring
+    of the prompt and message wins; a list `reply` is cycled through on each hit, and
+    "{message}" echoes the learner's text. Batched yes/no requests are answered
+    check by check with the same rules.
+    """
+
+    def __init__(self, script=None, latency="0", error_rate=0.0, seed=None):
+        script = script or {}
+        self.rules = list(script.get("rules", [])) + DEFAULT_RULES
+        self.default = script.get("default", "Yes")
+        self.faults = Faults("llm", latency, error_rate, seed)
+        self.calls = 0
+        self._hits = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            load_script(os.getenv("FAKE_LLM_SCRIPT")),
+            os.getenv("FAKE_LLM_LATENCY_MS", "0"),
+            float(os.getenv("FAKE_LLM_ERROR_RATE", "0")),
+            os.getenv("FAKE_SEED")
+        )
+
+    def reply(self, prompt, message):
+        haystack = f"{prompt}\n{message}".lower()
+        for i, rule in enumerate(self.rules):
+            if rule["match"].lower() in haystack:
+                reply = rule["reply"]
+                if isinstance(reply, list):
+                    with self._lock:
+                        hit = self._hits.get(i, 0)
+                        self._hits[i] = hit + 1
+                    reply = reply[hit % len(reply)]
+                return reply.replace("{message}", message)
+        return self.default
+
+    def chat(self, chat_history=None, message="", **params):
+        self.faults.apply()
+        with self._lock:
+            self.calls += 1
+        system = "\n".join(m.get("message", "") for m in chat_history or [])
+        if system == BATCH_SYSTEM_PROMPT:
+            verdicts = {number: self.reply(instructions, text) for number, instructions, text in _BATCH_CHECK.findall(message)}
+            return ChatReply(json.dumps(verdicts))
+        return ChatReply(self.reply(system, message))
+
+
+class HttpChatClient:
+    """cohere.Client look-alike that posts to a fake LLM server (`python providers.py serve`)."""
+
+    def __init__(self, url=DEFAULT_FAKE_LLM_URL, timeout=LLM_HTTP_TIMEOUT):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def chat(self, chat_history=None, message="", **params):
+        import urllib.request
+
+        body = json.dumps({"chat_history": chat_history or [], "message": message, **params}).encode("utf-8")
+        req = urllib.request.Request(f"{self.url}/chat", data=body, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            data = json.loads(resp.read().decode("utf-8"))
+        if "text" not in data:
+            raise ProviderError(data.get("error", "Malformed reply from fake LLM server"))
+        return ChatReply(data["text"])
+
+
+def load_script(path):
+    if not path:
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def make_llm_client(provider=None):
+    """The chat client selected by LLM_PROVIDER; anything but "fake"/"http" is the real Cohere client."""
+    provider = provider or os.getenv("LLM_PROVIDER", "cohere")
+    if provider == "fake":
+        logging.info("LLM provider: in-process fake")
+        return FakeChatClient.from_env()
+    if provider == "http":
+        url = os.getenv("FAKE_LLM_URL", DEFAULT_FAKE_LLM_URL)
+        logging.info(f"LLM provider: fake server at {url}")
+        return HttpChatClient(url)
+    import cohere
+    return cohere.Client(api_key=os.getenv("COHERE_API_KEY"))
+
+
+def serve(host, port, client):
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if self.path != "/chat":
+                self.send_error(404)
+                return
+            try:
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                status, body = 200, {"text": client.chat(**payload).text}
+            except ProviderError as e:
+                status, body = 503, {"error": str(e)}
+            except (ValueError, TypeError) as e:
+                status, body = 400, {"error": str(e)}
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, fmt, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    logging.info(f"Fake LLM server on http://{host}:{port}/chat")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Local fake LLM server for load tests")
+    parser.add_argument("command", choices=["serve"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--script", default=os.getenv("FAKE_LLM_SCRIPT"), help="JSON file of scripted replies")
+    parser.add_argument("--latency", default=os.getenv("FAKE_LLM_LATENCY_MS", "0"), help='e.g. "120", "50-200", "lognormal:120:0.5"')
+    parser.add_argument("--error-rate", type=float, default=float(os.getenv("FAKE_LLM_ERROR_RATE", "0")))
+    parser.add_argument("--seed", default=os.getenv("FAKE_SEED"))
+    args = parser.parse_args()
+
+    serve(args.host, args.port, FakeChatClient(load_script(args.script), args.latency, args.error_rate, args.seed))
@@ -0,0 +1,145 @@
+from collections import namedtuple
+
+# How a scoped field counts towards `correct`:
+SCORE = "score"  # its field_scores verdict
+NEVER = "never"  # counted in total, never correct (e.g. a pattern with no validator)
+# ("check", behavior): verdict of `behavior`; reuses field_scores only when the field was scored by that behavior
+
+ValidationResult = namedtuple("ValidationResult", ["correct", "total", "passed"])
+
+
+def _by_behavior(*names):
+    return lambda logic, fields: [(f["key"], f, SCORE) for f in fields if f.get("llm_behavior") in names]
+
+
+def _target_fields(logic, fields):
+    return [(key, None, SCORE) for key in logic.get("target_fields", [])]
+
+
+def _present_target_fields(logic, fields):
+    targets = logic.get("target_fields", [])
+    return [(f["key"], f, SCORE) for f in fields if f["key"] in targets]
+
+
+def _pattern_match(logic, fields):
+    return [(f["key"], f, ("check", "validate_svo")) for f in fields if f.get("validate_pattern") == logic.get("pattern")]
+
+
+def _svo_block(logic, fields):
+    fields_by_key = {f["key"]: f for f in fields}
+    return [(key, fields_by_key.get(key, {"key": key}), ("check", "validate_svo")) for key in logic.get("target_fields", [])]
+
+
+def _clause(logic, fields):
+    return [(f["key"], f, ("check", "validate_clause_expansion"))
+            for f in fields if f.get("llm_behavior") == "validate_clause_expansion"]
+
+
+def _yesno_patterns(logic, fields):
+    patterns = logic.get("pattern", [])
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    pattern_behaviors = {"yesno": "yesno_question_check", "negative": "negative_sentence_check"}
+    entries = []
+    for f in fields:
+        pattern = f.get("validate_pattern")
+        if pattern in patterns:
+            behavior = pattern_behaviors.get(pattern)
+            entries.append((f["key"], f, ("check", behavior) if behavior else NEVER))
+    return entries
+
+
+# logic_type -> selector(logic, fields) returning (key, field, source) entries; None means every scored field
+SELECTORS = {
+    "pattern_match": _pattern_match,
+    "family_validation": None,
+    "custom_svo_block": _svo_block,
+    "custom_clause": _clause,
+    "yesno_or_negative": None,
+    "yesno_pattern_matching": _yesno_patterns,
+    "pronunciation_check": _by_behavior("validate_pronunciation"),
+    "synonym_antonym_check": _by_behavior("validate_synonym_antonym"),
+    "meaningful_response": _by_behavior("validate_meaningful_response"),
+    "stress_and_intonation": None,
+    "verb_constructs_validation": _by_behavior("validate_modal_verb_usage", "validate_first_conditional", "validate_phrasal_verb"),
+    "custom_command_block": _target_fields,
+    "command_validation": _by_behavior("validate_command"),
+    "place_description_check": _by_behavior("validate_place_description"),
+    "custom_meaningful": _target_fields,
+    "price_check": _by_behavior("validate_price_question"),
+    "contextual_dialogue_check": _by_behavior("validate_contextual_dialogue"),
+    "mindmap_check": _by_behavior("validate_mindmap_ideas"),
+    "grammar_constructs_check": _by_behavior("validate_passive_voice", "validate_reported_speech", "validate_discourse_marker"),
+    "custom_literature_analysis": _target_fields,
+    "custom_debate_analysis": _present_target_fields,
+    "group_discussion_turns": _target_fields,
+}
+
+
+class ValidationAggregator:
+    """Running correct/total for a module's `validation_logic`.
+
+    The scope of fields is worked out once from the config; `record()` is
+    called on every field_scores write (including retries that overwrite an
+    earlier verdict), so `finalize()` only has to resolve checks that could
+    not reuse an interaction verdict.
+    """
+
+    def __init__(self, logic, fields):
+        self.logic = logic or {}
+        self.logic_type = self.logic.get("type", "pattern_match")
+        self.verdicts = {}
+        self.correct = 0
+        self.all_scores = False
+        self._weights = {}  # key -> how many times it counts towards correct
+        self._checks = []  # (key, field, behavior, reusable) resolved at finalize if unscored
+        self._total = 0
+
+        if not logic or self.logic_type not in SELECTORS:
+            return  # unknown types score N/A, as before
+        selector = SELECTORS[self.logic_type]
+        if selector is None:
+            self.all_scores = True
+            return
+
+        entries = selector(self.logic, fields)
+        self._total = len(entries)
+        for key, field, source in entries:
+            if source == SCORE:
+                self._weights[key] = self._weights.get(key, 0) + 1
+            elif source != NEVER:
+                behavior = source[1]
+                reusable = field.get("llm_behavior") == behavior
+                if reusable:
+                    # A key listed twice counts twice, as the per-occurrence loops this replaced did
+                    self._weights[key] = self._weights.get(key, 0) + 1
+                self._checks.append((key, field, behavior, reusable))
+
+    @property
+    def total(self):
+        return len(self.verdicts) if self.all_scores else self._total
+
+    def record(self, key, verdict):
+        verdict = bool(verdict)
+        previous = self.verdicts.get(key, False)
+        self.verdicts[key] = verdict
+        weight = 1 if self.all_scores else self._weights.get(key, 0)
+        self.correct += weight * (int(verdict) - int(previous))
+
+    def finalize(self, resolve=None):
+        """Final ValidationResult; `resolve(checks)` scores the remaining (field, behavior) pairs in one batch."""
+        correct = self.correct
+        pending = []
+        for key, field, behavior, reusable in self._checks:
+            if not (reusable and key in self.verdicts):
+                pending.append((field, behavior))
+        if pending and resolve:
+            # Each distinct check is resolved once, then counted for every occurrence
+            unique = list({(field["key"], behavior): (field, behavior) for field, behavior in pending}.values())
+            verdicts = resolve(unique)
+            correct += sum(1 for field, _ in pending if verdicts.get(field["key"]))
+
+        total = self.total
+        if total == 0:
+            return ValidationResult(0, 0, None)
+        return ValidationResult(correct, total, correct >= self.logic.get("minimum_correct", total))
@@ -1,18 +1,31 @@
-from flask import Flask, request, jsonify
-from flask_socketio import SocketIO, emit
+import eventlet
+eventlet.monkey_patch()  # let co.chat/Azure sockets yield to the hub instead of blocking it
+
+from flask import Flask, request, jsonify, Response, stream_with_context
+from flask_socketio import SocketIO, emit, join_room
 from new import ModuleRunner
+from sessions import SessionRegistry
+from config_registry import config_registry
+from vad import trim_silence, EndpointDetector
+from audio_codec import decode_to_pcm16, pcm16_to_wav, pcm16_duration, TARGET_RATE
+from workers import PoolSaturated, speech_workers, llm_workers, pool_stats
+from metrics import instrument_flask, timed
+import tracing
 import os
+import io
+import uuid
+import shutil
 from flask_cors import CORS
 import tempfile
 import json
 import logging
-import subprocess
 import wave
 
 # Setup Flask and Socket.IO
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "*"}})
 socketio = SocketIO(app, cors_allowed_origins="*")
+instrument_flask(app)
 
 # Logging setup for debugging
 logging.basicConfig(level=logging.INFO)
@@ -21,17 +34,49 @@ logging.basicConfig(level=logging.INFO)
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 CONFIG_DIR = os.path.join(BASE_DIR, "configs")
 
-def ui_callback(payload):
-    logging.info(f"UI Callback Payload: {json.dumps(payload, indent=2)}")
-    socketio.emit("ui_event", payload)
+# Uploads larger than this are spilled to a uniquely named temp file instead of held in memory
+AUDIO_SPILL_BYTES = int(os.getenv("AUDIO_SPILL_BYTES", str(8 * 1024 * 1024)))
+BUSY_RETRY_AFTER = 2  # seconds a client should wait after a 429
+
+# Active learners, keyed by Socket.IO sid (or a token handed out by /start-module)
+sessions = SessionRegistry()
+
+def make_ui_callback(session_id):
+    def ui_callback(payload):
+        logging.info(f"UI Callback Payload [{session_id}]: {json.dumps(payload, indent=2)}")
+        socketio.emit("ui_event", payload, to=session_id)
+    return ui_callback
+
+def busy_response(e):
+    """429 for requests turned away because a worker pool is full."""
+    response = jsonify({"error": str(e)})
+    response.status_code = 429
+    response.headers["Retry-After"] = str(BUSY_RETRY_AFTER)
+    return response
+
+@app.errorhandler(PoolSaturated)
+def handle_pool_saturated(e):
+    return busy_response(e)
+
+def get_session_id(data=None):
+    """Session id from the JSON body, query string or X-Session-Id header."""
+    session_id = (data or {}).get("session_id") or request.args.get("session_id")
+    return session_id or request.headers.get("X-Session-Id")
 
 def convert_to_wav(input_path, output_path):
-    try:
-        cmd = ["ffmpeg", "-y", "-i", input_path, "-ar", "16000", "-ac", "1", output_path]
-        subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
-    except subprocess.CalledProcessError as e:
-        logging.error(f"ffmpeg conversion failed: {e}")
-        raise
+    with open(input_path, "rb") as f:
+        pcm = decode_to_pcm16(f.read())
+    with open(output_path, "wb") as f:
+        f.write(pcm16_to_wav(pcm))
+
+def read_upload(upload):
+    """In-memory view of an uploaded file, or the path of a unique spill file for very large uploads."""
+    size = upload.content_length or request.content_length or 0
+    if size > AUDIO_SPILL_BYTES:
+        with tempfile.NamedTemporaryFile(prefix="upload_", suffix=".audio", delete=False) as f:
+            shutil.copyfileobj(upload.stream, f)
+            return f.name
+    return memoryview(upload.stream.read())
 
 def log_wav_duration(file_path):
     try:
@@ -48,85 +93,231 @@ def log_wav_duration(file_path):
 
 @app.route("/start-module", methods=["POST"])
 def start_module():
-    global runner_instance
     data = request.get_json()
     config_name = data.get("config")
+    session_id = get_session_id(data) or uuid.uuid4().hex
 
     if not config_name:
         return jsonify({"error": "No config provided"}), 400
 
     config_path = os.path.join(CONFIG_DIR, config_name)
-    if not os.path.exists(config_path):
+    if not config_registry.has(config_name):
         return jsonify({"error": f"Config file not found: {config_path}"}), 400
 
-    runner_instance = ModuleRunner(
+    runner = ModuleRunner(
         config_path=config_path,
         gui_mode=True,
-        ui_callback=ui_callback
+        ui_callback=make_ui_callback(session_id),
+        audio_prefetch=prefetch_audio,
+        trace=bool(data.get("trace"))
     )
-    runner_instance.emit_welcome_and_prompt()
+    sessions.put(session_id, runner)
+    runner.emit_welcome_and_prompt()
 
-    logging.info("✅ /start-module endpoint successfully invoked.")
-    return jsonify({"status": "started"})
+    logging.info(f"✅ /start-module endpoint successfully invoked. ({len(sessions)} active sessions)")
+    return jsonify({"status": "started", "session_id": session_id})
 
 
 @app.route("/list-modules", methods=["GET"])
 def list_modules():
-    categories = [
-        os.path.join(CONFIG_DIR, "energizer"),
-        os.path.join(CONFIG_DIR, "refresher"),
-        os.path.join(CONFIG_DIR, "achiver"),
-    ]
-    module_list = []
-
-    for category in categories:
-        if os.path.exists(category):
-            for f in os.listdir(category):
-                if f.endswith(".json"):
-                    module_list.append(os.path.join(os.path.basename(category), f))
-
-    return jsonify({"modules": module_list})
-# Global variable to hold the runner instance
-runner_instance = None
+    return jsonify({"modules": config_registry.list_modules()})
+
+@socketio.on("join_session")
+def handle_join_session(data):
+    # Clients that started a module with a token (not their sid) join its room here.
+    session_id = (data or {}).get("session_id")
+    if session_id:
+        join_room(session_id)
+
+@socketio.on("disconnect")
+def handle_disconnect():
+    stt = stt_streams.pop(request.sid, None)
+    if stt:
+        stt["stream"].cancel()
+    if sessions.remove(request.sid):
+        logging.info(f"Session {request.sid} closed on disconnect.")
 
 @socketio.on("audio_ready")
-def handle_audio_ready():
-    global runner_instance
-    if runner_instance:
-        runner_instance.mark_audio_ready()
+def handle_audio_ready(data=None):
+    runner = sessions.get((data or {}).get("session_id") or request.sid)
+    if runner:
+        runner.mark_audio_ready()
         logging.info("Audio is ready for processing.")
 
 
 # --- Azure Speech TTS and STT endpoints ---
-import azure.cognitiveservices.speech as speechsdk
+from speech_pool import speech_pool
+from tts_cache import phrase_cache, is_static
 from flask import send_file
 
+# ?format= for /speak -> (Azure output format, mimetype)
+TTS_FORMATS = {
+    "wav": ("Riff16Khz16BitMonoPcm", "audio/wav"),
+    "mp3": ("Audio16Khz32KBitRateMonoMp3", "audio/mpeg"),
+    "opus": ("Ogg16Khz16BitMonoOpus", "audio/ogg"),
+}
+
+def stream_tts(text, output_format):
+    """Yield audio chunks as they are synthesized; static phrases are then stored in the phrase cache."""
+    chunks = []
+    for chunk in speech_pool.synthesize_stream(text, output_format=output_format):
+        chunks.append(chunk)
+        yield chunk
+    if is_static(text):
+        phrase_cache.put(text, b"".join(chunks), output_format=output_format)
+
 @app.route("/speak", methods=["GET"])
 def speak():
     text = request.args.get("text", "")
     if not text:
         return jsonify({"error": "Missing text"}), 400
 
-    try:
-        speech_config = speechsdk.SpeechConfig(
-            subscription=os.getenv("AZURE_SPEECH_KEY"),
-            region=os.getenv("AZURE_REGION", "eastus")
-        )
-        speech_config.speech_synthesis_voice_name = "en-IN-NeerjaNeural"
+    if request.args.get("stream"):
+        fmt = request.args.get("format", "mp3")
+        if fmt not in TTS_FORMATS:
+            return jsonify({"error": f"Unsupported format: {fmt}"}), 400
+        output_format, mimetype = TTS_FORMATS[fmt]
+        cached = phrase_cache.get(text, output_format=output_format) if is_static(text) else None
+        if cached is not None:
+            return send_file(io.BytesIO(cached), mimetype=mimetype)
+        if speech_workers.saturated:
+            # Refuse before the 200 goes out; a streamed response cannot change its status later
+            return busy_response(PoolSaturated("speech workers are busy, try again shortly"))
+        # Chunked transfer: the learner hears the first frames while the rest is still synthesizing
+        return Response(stream_with_context(stream_tts(text, output_format)), mimetype=mimetype)
 
-        output_path = os.path.join(tempfile.gettempdir(), "tts_output.wav")
-        audio_config = speechsdk.audio.AudioOutputConfig(filename=output_path)
+    try:
+        # Static config phrases come from the TTS cache; one-off text is synthesized without storing it
+        if is_static(text):
+            audio_data = phrase_cache.get_or_synthesize(text)
+        else:
+            audio_data = speech_pool.synthesize(text)
+        return send_file(io.BytesIO(audio_data), mimetype="audio/wav")
+    except PoolSaturated as e:
+        return busy_response(e)
+    except Exception as e:
+        logging.error(f"TTS failed: {e}")
+        return jsonify({"error": str(e)}), 500
 
-        synthesizer = speechsdk.SpeechSynthesizer(speech_config=speech_config, audio_config=audio_config)
-        result = synthesizer.speak_text_async(text).get()
+def prefetch_audio(text):
+    """Start rendering `text` in the background and return the URL the client can play it from."""
+    key = phrase_cache.prefetch(text, spawn=socketio.start_background_task)
+    return f"/tts/{key}"
 
-        if result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
-            return send_file(output_path, mimetype="audio/wav")
-        else:
-            return jsonify({"error": "TTS synthesis failed"}), 500
+@app.route("/tts/<key>", methods=["GET"])
+def tts_by_key(key):
+    try:
+        audio_data = phrase_cache.get_or_render_key(key)
+    except PoolSaturated as e:
+        return busy_response(e)
     except Exception as e:
         logging.error(f"TTS failed: {e}")
         return jsonify({"error": str(e)}), 500
+    if audio_data is None:
+        return jsonify({"error": "Unknown audio key"}), 404
+    return send_file(io.BytesIO(audio_data), mimetype="audio/wav")
+
+@socketio.on("speak_stream")
+def handle_speak_stream(data):
+    """Socket.IO variant of /speak?stream=1: audio arrives as binary tts_chunk events."""
+    text = (data or {}).get("text", "")
+    fmt = (data or {}).get("format", "mp3")
+    request_id = (data or {}).get("request_id")
+    sid = request.sid
+    if not text or fmt not in TTS_FORMATS:
+        emit("tts_end", {"request_id": request_id, "error": "Missing text or unsupported format"})
+        return
+
+    def run():
+        output_format, mimetype = TTS_FORMATS[fmt]
+        try:
+            cached = phrase_cache.get(text, output_format=output_format) if is_static(text) else None
+            chunks = [cached] if cached is not None else stream_tts(text, output_format)
+            for seq, chunk in enumerate(chunks):
+                socketio.emit("tts_chunk", {"request_id": request_id, "seq": seq, "mimetype": mimetype, "data": chunk}, to=sid)
+            socketio.emit("tts_end", {"request_id": request_id}, to=sid)
+        except Exception as e:
+            logging.error(f"Streaming TTS failed: {e}")
+            socketio.emit("tts_end", {"request_id": request_id, "error": str(e)}, to=sid)
+
+    socketio.start_background_task(run)
+
+# Live recognizers for clients streaming microphone audio, keyed by Socket.IO sid
+stt_streams = {}
+
+@socketio.on("stt_start")
+def handle_stt_start(data=None):
+    """Begin streaming recognition; the client follows with binary stt_chunk events of 16-bit mono PCM."""
+    data = data or {}
+    session_id = data.get("session_id") or request.sid
+    if not sessions.get(session_id):
+        emit("ui_event", {"label": "error", "message": "Unknown or expired session"})
+        return
+
+    previous = stt_streams.pop(request.sid, None)
+    if previous:
+        previous["stream"].cancel()
+    try:
+        stream = speech_pool.open_stream(int(data.get("rate", TARGET_RATE)))
+    except Exception as e:
+        logging.error(f"Streaming STT failed to start: {e}")
+        emit("ui_event", {"label": "error", "message": "Speech recognition unavailable"})
+        return
+    stt_streams[request.sid] = {
+        "stream": stream,
+        "session_id": session_id,
+        "field_key": data.get("field_key"),
+        "partial": "",
+        "rate": int(data.get("rate", TARGET_RATE)),
+        "audio": bytearray(),
+        "endpoint": EndpointDetector(int(data.get("rate", TARGET_RATE)))
+    }
+
+@socketio.on("stt_chunk")
+def handle_stt_chunk(chunk):
+    stt = stt_streams.get(request.sid)
+    if not stt or not chunk:
+        return
+    stt["stream"].write(chunk)
+    stt["audio"].extend(chunk)
+    partial = stt["stream"].partial
+    if partial and partial != stt["partial"]:
+        stt["partial"] = partial
+        socketio.emit("ui_event", {"label": "partial_transcript", "message": partial}, to=stt["session_id"])
+    if stt["endpoint"].feed(chunk):
+        # The learner stopped talking: finish now and tell the client to release the mic
+        emit("stt_endpoint", {})
+        finish_stt(stt_streams.pop(request.sid, None))
+
+@socketio.on("stt_stop")
+def handle_stt_stop(data=None):
+    finish_stt(stt_streams.pop(request.sid, None))
+
+def finish_stt(stt):
+    if not stt:
+        return
+
+    def finish():
+        session_id = stt["session_id"]
+        runner = sessions.get(session_id)
+        try:
+            with tracing.activate(getattr(runner, "trace", None)), timed("stt_stream_finish"):
+                transcript = stt["stream"].finish()
+        except Exception as e:
+            logging.error(f"Streaming STT failed: {e}")
+            transcript = None
+        if not transcript or not runner:
+            socketio.emit("ui_event", {"label": "error", "message": "Speech not recognized"}, to=session_id)
+            return
+
+        if stt["rate"] == TARGET_RATE:
+            runner.last_audio = trim_silence(bytes(stt["audio"]))
+        # Hand the final transcript straight to the runner; no /transcribe or /submit-response round-trip
+        socketio.emit("ui_event", {"label": "recognized", "message": transcript}, to=session_id)
+        job_id = runner.submit_response_async(transcript, stt["field_key"], spawn=socketio.start_background_task)
+        socketio.emit("ui_event", {"label": "status", "message": "Validating your answer...", "job_id": job_id}, to=session_id)
+
+    socketio.start_background_task(finish)
 
 @app.route("/transcribe", methods=["POST"])
 @app.route("/transcribe", methods=["POST"])
@@ -135,36 +326,41 @@ def transcribe():
     if not audio:
         return jsonify({"error": "No audio file uploaded"}), 400
 
+    upload = None
+    runner = sessions.get(request.form.get("session_id"))
     try:
-        webm_path = os.path.join(tempfile.gettempdir(), "input.webm")
-        wav_path = os.path.join(tempfile.gettempdir(), "input_converted.wav")
-        audio.save(webm_path)
-
-        # 🔁 Convert WebM to valid PCM WAV using ffmpeg
-        cmd = ["ffmpeg", "-y", "-i", webm_path, "-ar", "16000", "-ac", "1", "-f", "wav", wav_path]
-        subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-
-        # 🔊 Transcribe
-        speech_config = speechsdk.SpeechConfig(
-            subscription=os.getenv("AZURE_SPEECH_KEY"),
-            region=os.getenv("AZURE_REGION", "eastus")
-        )
-        audio_config = speechsdk.AudioConfig(filename=wav_path)
-        recognizer = speechsdk.SpeechRecognizer(speech_config=speech_config, audio_config=audio_config)
-
-        result = recognizer.recognize_once()
-        if result.reason == speechsdk.ResultReason.RecognizedSpeech:
-            return jsonify({"transcript": result.text})
+        upload = read_upload(audio)
+
+        with tracing.activate(getattr(runner, "trace", None)):
+            # 🔁 Decode WebM to 16 kHz mono PCM in-process (PyAV, or ffmpeg over pipes)
+            pcm = decode_to_pcm16(upload)
+            logging.info(f"⏱️ Decoded {pcm16_duration(pcm):.2f}s of audio")
+            with timed("vad"):
+                pcm = trim_silence(pcm)
+            if not pcm:
+                return jsonify({"error": "Speech not recognized"}), 400
+
+            # 🔊 Transcribe straight from memory through a push stream
+            transcript = speech_pool.recognize_pcm(pcm)
+        if transcript and runner:
+            # Kept for stress/intonation checks on the answer the client submits next
+            runner.last_audio = pcm
+        if transcript:
+            return jsonify({"transcript": transcript})
         else:
             return jsonify({"error": "Speech not recognized"}), 400
+    except PoolSaturated as e:
+        return busy_response(e)
     except Exception as e:
         logging.error(f"STT failed: {e}")
         return jsonify({"error": str(e)}), 500
+    finally:
+        if isinstance(upload, str):
+            os.remove(upload)
 
 
 @app.route("/submit-response", methods=["POST"])
 def submit_response():
-    global runner_instance
     data = request.get_json()
     logging.info(f"📥 Received response data: {data}")
 
@@ -172,15 +368,29 @@ def submit_response():
         logging.error("❌ Missing 'text' or 'field_key' in response")
         return jsonify({"error": "Missing text or field_key"}), 400
 
+    runner = sessions.get(get_session_id(data))
+    if not runner:
+        return jsonify({"error": "Unknown or expired session"}), 400
+
     text = data["text"]
     field_key = data["field_key"]
 
+    if llm_workers.saturated:
+        return busy_response(PoolSaturated("llm workers are busy, try again shortly"))
+
+    if not data.get("wait"):
+        # Validate in a background greenlet; the verdict arrives as a "verdict" ui_event.
+        job_id = runner.submit_response_async(text, field_key, spawn=socketio.start_background_task)
+        return jsonify({"status": "accepted", "job_id": job_id}), 202
+
     try:
-        result = runner_instance.submit_response(text, field_key)
-        score = runner_instance.field_scores.get(field_key)
-        result_text = runner_instance.filled_fields.get(field_key)
+        result = runner.submit_response(text, field_key)
+        score = runner.field_scores.get(field_key)
+        result_text = runner.filled_fields.get(field_key)
         logging.info(f"✅ LLM Eval Score: {score} | Extracted Response: {result_text}")
         return jsonify({"result": result})
+    except PoolSaturated as e:
+        return busy_response(e)
     except Exception as e:
         logging.exception("❌ Error during response handling")
         return jsonify({"error": str(e)}), 500
@@ -188,12 +398,17 @@ def submit_response():
 # --- New /get-summary endpoint ---
 @app.route("/get-summary", methods=["GET"])
 def get_summary():
-    global runner_instance
-    if not runner_instance:
+    runner = sessions.get(get_session_id())
+    if not runner:
         return jsonify({"error": "Runner not initialized"}), 400
     return jsonify({
-        "filled_fields": runner_instance.filled_fields,
-        "field_scores": runner_instance.field_scores
+        "filled_fields": runner.filled_fields,
+        "field_scores": runner.field_scores
     })
+@app.route("/workers", methods=["GET"])
+def worker_stats():
+    """Occupancy and queue depth of the speech, LLM and codec worker pools."""
+    return jsonify(pool_stats())
+
 if __name__ == "__main__":
-    socketio.run(app, host="0.0.0.0", port=3000, debug=True)
+    socketio.run(app, host="0.0.0.0", port=int(os.getenv("PORT", "3000")), debug=os.getenv("SERVER_DEBUG", "1") == "1")
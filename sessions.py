@@ -0,0 +1,61 @@
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+MAX_SESSIONS = int(os.getenv("MAX_SESSIONS", "500"))
+SESSION_IDLE_TIMEOUT = float(os.getenv("SESSION_IDLE_TIMEOUT", "1800"))  # seconds
+
+
+class SessionRegistry:
+    """Bounded LRU of ModuleRunner instances keyed by Socket.IO sid or session token."""
+
+    def __init__(self, max_sessions=MAX_SESSIONS, idle_timeout=SESSION_IDLE_TIMEOUT):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self._sessions = OrderedDict()  # session_id -> (runner, last_seen)
+        self._lock = threading.Lock()
+
+    def put(self, session_id, runner):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            self._sessions[session_id] = (runner, time.monotonic())
+            self._evict_locked()
+
+    def get(self, session_id):
+        if not session_id:
+            return None
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            runner, last_seen = entry
+            now = time.monotonic()
+            if now - last_seen > self.idle_timeout:
+                del self._sessions[session_id]
+                logging.info(f"Session {session_id} expired after {self.idle_timeout:.0f}s idle.")
+                return None
+            self._sessions[session_id] = (runner, now)
+            self._sessions.move_to_end(session_id)
+            return runner
+
+    def remove(self, session_id):
+        with self._lock:
+            return self._sessions.pop(session_id, (None, None))[0]
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def _evict_locked(self):
+        now = time.monotonic()
+        # Oldest entries sit at the front, so stop at the first live one.
+        while self._sessions:
+            session_id, (_, last_seen) = next(iter(self._sessions.items()))
+            if now - last_seen <= self.idle_timeout:
+                break
+            del self._sessions[session_id]
+            logging.info(f"Session {session_id} expired after {self.idle_timeout:.0f}s idle.")
+        while len(self._sessions) > self.max_sessions:
+            session_id, _ = self._sessions.popitem(last=False)
+            logging.info(f"Session {session_id} evicted (cap {self.max_sessions} reached).")
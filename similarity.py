@@ -0,0 +1,203 @@
+import re
+from functools import lru_cache
+from collections import namedtuple
+
+try:
+    from rapidfuzz.distance import Levenshtein as _rf_levenshtein  # same bit-parallel algorithm in C++
+except ImportError:
+    _rf_levenshtein = None
+
+_WORD = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+# (op, expected word, spoken word); op is "ok", "sub", "del" (missed) or "ins" (extra)
+AlignedWord = namedtuple("AlignedWord", ["op", "expected", "spoken"])
+# score: 1 - phoneme-level edit distance / length (0..1); wer: word error rate against the expected words
+Similarity = namedtuple("Similarity", ["score", "wer", "expected", "spoken"])
+
+# PASS/RETRY cut-offs on Similarity.score. The phoneme score runs lower than the old
+# difflib character ratio, so these are refitted to agree with the old decisions and
+# pass rates on perturbed attempts at the configs' sentences; reproduce or re-tune with
+# `python benchmarks/fit_similarity_thresholds.py` (summary 0.90/0.80 -> 0.85/0.72,
+# pronunciation 0.85/0.70 -> 0.80/0.61).
+SUMMARY_PASS = 0.85
+SUMMARY_RETRY = 0.72
+PRONUNCIATION_PASS = 0.80
+PRONUNCIATION_RETRY = 0.61
+# Words per side that align() compares; its DP is O(n·m) so longer rambles are cut off
+ALIGN_MAX_WORDS = 120
+
+# Spelling -> sound rewrites applied in order; keeps vowels so minimal pairs (sit/seat) stay apart
+_PHONETIC_RULES = [
+    (re.compile(r"^kn|^gn|^pn"), "n"), (re.compile(r"^wr"), "r"), (re.compile(r"^wh"), "w"),
+    (re.compile(r"mb$"), "m"), (re.compile(r"tch"), "X"), (re.compile(r"ch|sh"), "X"),
+    (re.compile(r"ph"), "f"), (re.compile(r"th"), "0"), (re.compile(r"gh$"), "f"), (re.compile(r"gh"), ""),
+    (re.compile(r"ck|q"), "k"), (re.compile(r"c(?=[eiy])"), "s"), (re.compile(r"c"), "k"),
+    (re.compile(r"dg(?=[eiy])"), "j"), (re.compile(r"x"), "ks"), (re.compile(r"z"), "s"),
+    (re.compile(r"ee|ea|ie|ey$"), "I"), (re.compile(r"oo|ou(?=[^r])|ew|ue"), "U"),
+    (re.compile(r"ai|ay|ei"), "A"), (re.compile(r"oa|ow$"), "O"),
+    (re.compile(r"(?<=[^aeiouAIUO])e$"), ""), (re.compile(r"(.)\1"), r"\1"),
+]
+
+
+def words(text):
+    return _WORD.findall(str(text or "").lower())
+
+
+@lru_cache(maxsize=65536)
+def phonetic_key(word):
+    key = word.lower()
+    for pattern, repl in _PHONETIC_RULES:
+        key = pattern.sub(repl, key)
+    return key or word
+
+
+def levenshtein(a, b):
+    """Edit distance between two sequences (strings or lists of hashables).
+
+    Bit-parallel (Myers/Hyyro): the shorter sequence is encoded as bit masks and
+    each element of the other costs a handful of integer operations. Uses
+    rapidfuzz when it is installed, otherwise the pure-Python version below.
+    """
+    if _rf_levenshtein is not None:
+        return _rf_levenshtein.distance(a, b)
+    if len(a) < len(b):
+        a, b = b, a
+    m = len(b)
+    if m == 0:
+        return len(a)
+    return _MyersPattern(b).distance(a)
+
+
+class _MyersPattern:
+    """Precomputed match masks for one pattern; reuse it to compare many texts against it."""
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.m = len(pattern)
+        self.full = (1 << self.m) - 1
+        self.high = 1 << (self.m - 1) if self.m else 0
+        self.peq = {}
+        for i, symbol in enumerate(pattern):
+            self.peq[symbol] = self.peq.get(symbol, 0) | (1 << i)
+
+    def distance(self, text):
+        if _rf_levenshtein is not None:
+            return _rf_levenshtein.distance(self.pattern, text)
+        if not self.m:
+            return len(text)
+        high, peq = self.high, self.peq
+        pv, mv, score = self.full, 0, self.m
+        # Bits above the pattern length only ever carry upwards, so no masking is needed
+        for symbol in text:
+            eq = peq.get(symbol, 0)
+            xv = eq | mv
+            xh = (((eq & pv) + pv) ^ pv) | eq
+            ph = mv | ~(xh | pv)
+            mh = pv & xh
+            if ph & high:
+                score += 1
+            elif mh & high:
+                score -= 1
+            ph = (ph << 1) | 1
+            pv = (mh << 1) | ~(xv | ph)
+            mv = ph & xv
+        return score
+
+
+class Reference:
+    """An expected utterance prepared once for scoring many spoken attempts."""
+
+    def __init__(self, expected):
+        self.expected = expected
+        self.words = words(expected)
+        self.phonemes = " ".join(phonetic_key(w) for w in self.words)
+        self._word_pattern = _MyersPattern(self.words)
+        self._phoneme_pattern = _MyersPattern(self.phonemes)
+
+    def score(self, spoken):
+        """Phoneme-level similarity and word error rate of one spoken attempt."""
+        spoken_words = words(spoken)
+        wer = self._word_pattern.distance(spoken_words) / max(len(self.words), 1)
+        phonemes = " ".join(phonetic_key(w) for w in spoken_words)
+        longest = max(len(self.phonemes), len(phonemes))
+        score = 1.0 - self._phoneme_pattern.distance(phonemes) / longest if longest else 1.0
+        return Similarity(score, wer, self.words, spoken_words)
+
+
+def compare(expected, spoken):
+    return Reference(expected).score(spoken)
+
+
+def score_batch(pairs):
+    """Score many (expected, spoken) pairs, building each distinct reference only once."""
+    references = {}
+    results = []
+    for expected, spoken in pairs:
+        reference = references.get(expected)
+        if reference is None:
+            reference = references[expected] = Reference(expected)
+        results.append(reference.score(spoken))
+    return results
+
+
+@lru_cache(maxsize=65536)
+def _word_cost(a, b):
+    if a == b:
+        return 0.0
+    ka, kb = phonetic_key(a), phonetic_key(b)
+    return levenshtein(ka, kb) / max(len(ka), len(kb), 1)
+
+
+def align(expected, spoken):
+    """Word alignment of `spoken` against `expected`, substitutions weighted by how different they sound."""
+    ref, hyp = words(expected)[:ALIGN_MAX_WORDS], words(spoken)[:ALIGN_MAX_WORDS]
+    rows, cols = len(ref) + 1, len(hyp) + 1
+    cost = [[0.0] * cols for _ in range(rows)]
+    for i in range(1, rows):
+        cost[i][0] = float(i)
+    for j in range(1, cols):
+        cost[0][j] = float(j)
+    for i in range(1, rows):
+        for j in range(1, cols):
+            cost[i][j] = min(
+                cost[i - 1][j - 1] + _word_cost(ref[i - 1], hyp[j - 1]),
+                cost[i - 1][j] + 1,
+                cost[i][j - 1] + 1,
+            )
+
+    aligned = []
+    i, j = len(ref), len(hyp)
+    while i or j:
+        if i and j and cost[i][j] == cost[i - 1][j - 1] + _word_cost(ref[i - 1], hyp[j - 1]):
+            aligned.append(AlignedWord("ok" if ref[i - 1] == hyp[j - 1] else "sub", ref[i - 1], hyp[j - 1]))
+            i, j = i - 1, j - 1
+        elif i and cost[i][j] == cost[i - 1][j] + 1:
+            aligned.append(AlignedWord("del", ref[i - 1], None))
+            i -= 1
+        else:
+            aligned.append(AlignedWord("ins", None, hyp[j - 1]))
+            j -= 1
+    aligned.reverse()
+    return aligned
+
+
+def missed_words(expected, spoken):
+    """Expected words the learner skipped or said differently, for feedback."""
+    return [w.expected for w in align(expected, spoken) if w.op in ("sub", "del")]
+
+
+if __name__ == "__main__":
+    import sys
+    import json
+
+    # Re-score stored summary attempts, e.g. python similarity.py *_output_*.json
+    pairs, names = [], []
+    for path in sys.argv[1:]:
+        with open(path, "r") as f:
+            result = json.load(f)
+        expected, spoken = result.get("expected_summary"), result.get("user_summary_spoken")
+        if isinstance(expected, str) and isinstance(spoken, str) and expected != "[Skipped]":
+            pairs.append((expected, spoken))
+            names.append(path)
+    for name, (expected, spoken), sim in zip(names, pairs, score_batch(pairs)):
+        print(f"{name}\t{sim.score:.2f}\tWER {sim.wer:.2f}\tmissed: {', '.join(missed_words(expected, spoken))}")
@@ -0,0 +1,68 @@
+import logging
+import threading
+
+import tracing
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+
+class SingleFlight:
+    """Share one execution between concurrent callers asking for the same key.
+
+    The first caller (the leader) runs the function; callers arriving while it
+    is in flight wait for it and get the same result, or the same exception.
+    Nothing is kept once the call returns — caching is the verdict cache's job.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                call.followers += 1
+                self.coalesced += 1
+        if not leader:
+            return self._wait(call)
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+            if call.followers:
+                logging.info(f"{self.name}: {call.followers} identical call(s) shared one upstream request")
+        return call.result
+
+    def _wait(self, call):
+        with tracing.span(f"{self.name}_coalesced", "stage"):
+            call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def stats(self):
+        with self._lock:
+            return {"leaders": self.leaders, "coalesced": self.coalesced, "in_flight": len(self._calls)}
+
+
+llm_flight = SingleFlight("llm")
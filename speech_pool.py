@@ -0,0 +1,322 @@
+import os
+import json
+import time
+import logging
+import threading
+
+from audio_codec import TARGET_RATE, pcm16_to_wav
+from workers import speech_workers
+from providers import Faults
+from metrics import timed
+
+SPEECH_BACKEND = os.getenv("SPEECH_BACKEND", "azure")  # "azure" or "stub" (offline)
+SPEECH_POOL_SIZE = int(os.getenv("SPEECH_POOL_SIZE", "8"))  # idle synthesizers kept per voice/format
+SPEECH_IDLE_TTL = float(os.getenv("SPEECH_IDLE_TTL", "240"))  # Azure drops idle websockets after a few minutes
+DEFAULT_VOICE = "en-IN-NeerjaNeural"
+SPEAKER = "speaker"  # output_format for synthesizers that play on the default audio device
+STREAM_CHUNK_BYTES = 4096
+STT_FINISH_TIMEOUT = float(os.getenv("STT_FINISH_TIMEOUT", "5"))  # wait for the last phrase after the mic closes
+STUB_LATENCY_MS = os.getenv("STUB_LATENCY_MS", "0")  # per call, e.g. "300" or "lognormal:400:0.4" (see providers.Latency)
+STUB_ERROR_RATE = float(os.getenv("STUB_ERROR_RATE", "0"))
+STUB_TRANSCRIPTS = os.getenv("STUB_TRANSCRIPTS")  # JSON list of transcripts returned in turn
+
+
+class AzureBackend:
+    def __init__(self):
+        import azure.cognitiveservices.speech as speechsdk
+        self.sdk = speechsdk
+        self.key = os.getenv("AZURE_SPEECH_KEY")
+        self.region = os.getenv("AZURE_REGION", "eastus")
+        # Recognizers are bound to their audio input, so only the config is shared for STT.
+        self.recognition_config = speechsdk.SpeechConfig(subscription=self.key, region=self.region)
+
+    def new_synthesizer(self, voice, output_format):
+        speech_config = self.sdk.SpeechConfig(subscription=self.key, region=self.region)
+        speech_config.speech_synthesis_voice_name = voice
+        if output_format == SPEAKER:
+            audio_config = self.sdk.audio.AudioOutputConfig(use_default_speaker=True)
+        else:
+            speech_config.set_speech_synthesis_output_format(
+                getattr(self.sdk.SpeechSynthesisOutputFormat, output_format)
+            )
+            audio_config = None  # keep audio in result.audio_data
+        synthesizer = self.sdk.SpeechSynthesizer(speech_config=speech_config, audio_config=audio_config)
+        # Open the websocket now so the first request does not pay for TLS + handshake.
+        self.sdk.Connection.from_speech_synthesizer(synthesizer).open(True)
+        return synthesizer
+
+    def synthesize(self, synthesizer, text):
+        result = synthesizer.speak_text_async(text).get()
+        if result.reason == self.sdk.ResultReason.SynthesizingAudioCompleted:
+            return result.audio_data
+        details = getattr(result, "cancellation_details", None)
+        raise RuntimeError(f"TTS synthesis failed: {getattr(details, 'error_details', result.reason)}")
+
+    def synthesize_stream(self, synthesizer, text, chunk_size):
+        # start_speaking returns as soon as the first audio arrives; the stream fills while we read
+        result = synthesizer.start_speaking_text_async(text).get()
+        stream = self.sdk.AudioDataStream(result)
+        buf = bytes(chunk_size)
+        while True:
+            n = stream.read_data(buf)
+            if n == 0:
+                break
+            yield buf[:n]
+        if stream.status == self.sdk.StreamStatus.Canceled:
+            raise RuntimeError(f"TTS stream cancelled: {stream.cancellation_details.error_details}")
+
+    def recognize(self, audio_config):
+        recognizer = self.sdk.SpeechRecognizer(speech_config=self.recognition_config, audio_config=audio_config)
+        result = recognizer.recognize_once()
+        if result.reason == self.sdk.ResultReason.RecognizedSpeech:
+            return result.text.strip()
+        return None
+
+    def recognize_pcm(self, pcm, rate=TARGET_RATE):
+        stream_format = self.sdk.audio.AudioStreamFormat(samples_per_second=rate, bits_per_sample=16, channels=1)
+        push_stream = self.sdk.audio.PushAudioInputStream(stream_format=stream_format)
+        push_stream.write(bytes(pcm))
+        push_stream.close()
+        return self.recognize(self.sdk.audio.AudioConfig(stream=push_stream))
+
+    def recognize_file(self, filename):
+        return self.recognize(self.sdk.audio.AudioConfig(filename=filename))
+
+    def open_stream(self, rate):
+        return AzureRecognitionStream(self, rate)
+
+
+class AzureRecognitionStream:
+    """Continuous recognizer fed through a push stream while the learner is still talking.
+
+    SDK events arrive on native threads, so they only update plain attributes;
+    callers read `partial` from their own greenlet/thread.
+    """
+
+    def __init__(self, backend, rate):
+        sdk = backend.sdk
+        self.sdk = sdk
+        stream_format = sdk.audio.AudioStreamFormat(samples_per_second=rate, bits_per_sample=16, channels=1)
+        self.push_stream = sdk.audio.PushAudioInputStream(stream_format=stream_format)
+        self.recognizer = sdk.SpeechRecognizer(
+            speech_config=backend.recognition_config,
+            audio_config=sdk.audio.AudioConfig(stream=self.push_stream)
+        )
+        self.segments = []
+        self.partial = ""
+        self.stopped = False
+        self.recognizer.recognizing.connect(self._on_recognizing)
+        self.recognizer.recognized.connect(self._on_recognized)
+        self.recognizer.session_stopped.connect(self._on_stopped)
+        self.recognizer.canceled.connect(self._on_stopped)
+        self.recognizer.start_continuous_recognition_async().get()
+
+    def _on_recognizing(self, evt):
+        self.partial = " ".join(self.segments + [evt.result.text])
+
+    def _on_recognized(self, evt):
+        if evt.result.reason == self.sdk.ResultReason.RecognizedSpeech and evt.result.text:
+            self.segments.append(evt.result.text.strip())
+            self.partial = " ".join(self.segments)
+
+    def _on_stopped(self, evt):
+        self.stopped = True
+
+    def write(self, pcm):
+        self.push_stream.write(bytes(pcm))
+
+    def finish(self, timeout=STT_FINISH_TIMEOUT):
+        """Close the input, wait for the final phrase and return the full transcript (or None)."""
+        self.push_stream.close()
+        deadline = time.monotonic() + timeout
+        # Poll rather than block on an Event: the flag is set from an SDK thread, not a greenlet
+        while not self.stopped and time.monotonic() < deadline:
+            time.sleep(0.05)
+        speech_workers.run(self.recognizer.stop_continuous_recognition_async().get)
+        return " ".join(self.segments).strip() or None
+
+    def cancel(self):
+        self.push_stream.close()
+        self.recognizer.stop_continuous_recognition_async()
+
+
+class StubRecognitionStream:
+    """Reveals the stub transcript word by word as audio arrives (~0.3 s per word)."""
+
+    def __init__(self, transcript, rate):
+        self.words = transcript.split()
+        self.rate = rate
+        self.received = 0
+        self.partial = ""
+
+    def write(self, pcm):
+        self.received += len(pcm)
+        heard = int(self.received / 2 / self.rate / 0.3)
+        self.partial = " ".join(self.words[:heard])
+
+    def finish(self, timeout=STT_FINISH_TIMEOUT):
+        return " ".join(self.words) if self.received else None
+
+    def cancel(self):
+        pass
+
+
+class StubBackend:
+    """Offline stand-in: silent audio for TTS and scripted transcripts for STT.
+
+    Every call waits STUB_LATENCY_MS and fails with probability STUB_ERROR_RATE.
+    """
+
+    def __init__(self):
+        self.transcripts = [os.getenv("STUB_TRANSCRIPT", "This is a test answer.")]
+        if STUB_TRANSCRIPTS:
+            with open(STUB_TRANSCRIPTS, "r") as f:
+                self.transcripts = json.load(f)
+        self.faults = Faults("speech", STUB_LATENCY_MS, STUB_ERROR_RATE, os.getenv("FAKE_SEED"))
+        self._turn = 0
+        self._lock = threading.Lock()
+
+    @property
+    def transcript(self):
+        with self._lock:
+            transcript = self.transcripts[self._turn % len(self.transcripts)]
+            self._turn += 1
+        return transcript
+
+    def new_synthesizer(self, voice, output_format):
+        return {"voice": voice, "output_format": output_format}
+
+    def synthesize(self, synthesizer, text):
+        self.faults.apply()
+        # ~60 ms of silence per character, roughly the length of real speech
+        samples = int(TARGET_RATE * 0.06 * max(len(text), 1))
+        if synthesizer["output_format"] == SPEAKER:
+            return b""
+        return pcm16_to_wav(b"\x00\x00" * samples)
+
+    def synthesize_stream(self, synthesizer, text, chunk_size):
+        audio = self.synthesize(synthesizer, text)
+        for i in range(0, len(audio), chunk_size):
+            yield audio[i:i + chunk_size]
+
+    def recognize_pcm(self, pcm, rate=TARGET_RATE):
+        self.faults.apply()
+        return self.transcript if len(pcm) else None
+
+    def recognize_file(self, filename):
+        self.faults.apply()
+        return self.transcript if os.path.exists(filename) else None
+
+    def open_stream(self, rate):
+        self.faults.apply()
+        return StubRecognitionStream(self.transcript, rate)
+
+
+class SpeechPool:
+    """Process-wide pool of warm synthesizers plus shared recognition config.
+
+    Idle synthesizers are kept per (voice, output format), at most `max_idle`
+    of each, and dropped once they have been idle longer than `idle_ttl` or
+    after a failed synthesis.
+    """
+
+    def __init__(self, backend=SPEECH_BACKEND, max_idle=SPEECH_POOL_SIZE, idle_ttl=SPEECH_IDLE_TTL):
+        self.backend_name = backend
+        self.max_idle = max_idle
+        self.idle_ttl = idle_ttl
+        self._backend = None
+        self._idle = {}  # (voice, output_format) -> [(synthesizer, last_used)]
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+        self.discarded = 0
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    self._backend = StubBackend() if self.backend_name == "stub" else AzureBackend()
+                    logging.info(f"Speech backend: {self.backend_name}")
+        return self._backend
+
+    def synthesize(self, text, voice=DEFAULT_VOICE, output_format="Riff16Khz16BitMonoPcm"):
+        """Synthesize `text` and return the encoded audio bytes."""
+        key = (voice, output_format)
+        synthesizer = self._checkout(key)
+        healthy = False
+        try:
+            # SDK calls block natively, so they run in the bounded speech worker pool
+            with timed("tts", format=output_format):
+                audio = speech_workers.run(self.backend.synthesize, synthesizer, text)
+            healthy = True
+            return audio
+        finally:
+            self._checkin(key, synthesizer, healthy)
+
+    def synthesize_stream(self, text, voice=DEFAULT_VOICE, output_format="Audio16Khz32KBitRateMonoMp3",
+                          chunk_size=STREAM_CHUNK_BYTES):
+        """Yield encoded audio chunks as the synthesizer produces them."""
+        key = (voice, output_format)
+        synthesizer = self._checkout(key)
+        healthy = False
+        try:
+            chunks = self.backend.synthesize_stream(synthesizer, text, chunk_size)
+            while True:
+                chunk = speech_workers.run(next, chunks, None)
+                if chunk is None:
+                    break
+                yield chunk
+            healthy = True
+        finally:
+            self._checkin(key, synthesizer, healthy)
+
+    def speak(self, text, voice=DEFAULT_VOICE):
+        """Play `text` on the default speaker (CLI runners)."""
+        self.synthesize(text, voice=voice, output_format=SPEAKER)
+
+    def recognize_pcm(self, pcm, rate=TARGET_RATE):
+        """Recognize one utterance of 16-bit mono PCM; returns the text or None."""
+        with timed("stt", source="pcm"):
+            return speech_workers.run(self.backend.recognize_pcm, pcm, rate)
+
+    def recognize_file(self, filename):
+        with timed("stt", source="file"):
+            return speech_workers.run(self.backend.recognize_file, filename)
+
+    def open_stream(self, rate=TARGET_RATE):
+        """Start continuous recognition of 16-bit mono PCM pushed with `write()`; `finish()` returns the text."""
+        with timed("stt_stream_open"):
+            return speech_workers.run(self.backend.open_stream, rate)
+
+    def stats(self):
+        with self._lock:
+            idle = sum(len(v) for v in self._idle.values())
+        return {"idle": idle, "created": self.created, "reused": self.reused, "discarded": self.discarded}
+
+    def _checkout(self, key):
+        now = time.monotonic()
+        with self._lock:
+            idle = self._idle.get(key, [])
+            while idle:
+                synthesizer, last_used = idle.pop()
+                if now - last_used <= self.idle_ttl:
+                    self.reused += 1
+                    return synthesizer
+                self.discarded += 1
+        # Opening the Azure connection blocks, so it runs off the hub like synthesis does
+        synthesizer = speech_workers.run(self.backend.new_synthesizer, *key)
+        with self._lock:
+            self.created += 1
+        return synthesizer
+
+    def _checkin(self, key, synthesizer, healthy):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if healthy and len(idle) < self.max_idle:
+                idle.append((synthesizer, time.monotonic()))
+            else:
+                self.discarded += 1
+
+
+speech_pool = SpeechPool()
@@ -0,0 +1,103 @@
+import os
+import json
+import time
+import random
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0"))  # fraction of sessions traced without asking
+TRACE_DIR = os.getenv("TRACE_DIR", ".")
+TRACE_MAX_EVENTS = 20000  # a runaway session stops recording rather than growing without bound
+
+_current = contextvars.ContextVar("session_trace", default=None)
+
+
+class SessionTrace:
+    """Spans and instant events of one learner session in Chrome trace_event format.
+
+    Open the dumped file in chrome://tracing or Perfetto; each greenlet/thread
+    that did work for the session gets its own row.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.origin = time.perf_counter()
+        self.events = [{"name": "process_name", "ph": "M", "pid": 1, "tid": 0, "args": {"name": name}}]
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def _ts(self, at):
+        return round((at - self.origin) * 1e6, 1)
+
+    def _add(self, event):
+        with self._lock:
+            if len(self.events) >= TRACE_MAX_EVENTS:
+                self.dropped += 1
+                return
+            self.events.append(event)
+
+    def complete(self, name, started, duration, category="stage", **args):
+        self._add({"name": name, "cat": category, "ph": "X", "pid": 1, "tid": threading.get_ident(),
+                   "ts": self._ts(started), "dur": round(duration * 1e6, 1), "args": args})
+
+    def instant(self, name, category="event", **args):
+        self._add({"name": name, "cat": category, "ph": "i", "s": "t", "pid": 1, "tid": threading.get_ident(),
+                   "ts": self._ts(time.perf_counter()), "args": args})
+
+    def dump(self, path):
+        with self._lock:
+            data = {"traceEvents": list(self.events), "displayTimeUnit": "ms",
+                    "otherData": {"session": self.name, "dropped_events": self.dropped}}
+        with open(path, "w") as f:
+            json.dump(data, f)
+        return path
+
+
+def start_session(name, force=False):
+    """A new trace when `force` is set or the session falls in TRACE_SAMPLE_RATE, else None."""
+    if force or (TRACE_SAMPLE_RATE and random.random() < TRACE_SAMPLE_RATE):
+        logging.info(f"Tracing session {name}")
+        return SessionTrace(name)
+    return None
+
+
+def current():
+    return _current.get()
+
+
+@contextmanager
+def activate(trace):
+    """Make `trace` the one that stages inside this block (LLM, STT, TTS...) record into."""
+    if trace is None:
+        yield
+        return
+    token = _current.set(trace)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def span(name, category="stage", **args):
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.complete(name, started, time.perf_counter() - started, category, **args)
+
+
+def instant(name, category="event", **args):
+    trace = _current.get()
+    if trace is not None:
+        trace.instant(name, category, **args)
+
+
+def trace_path(module_name, stamp):
+    return os.path.join(TRACE_DIR, f"{module_name}_trace_{stamp}.json")
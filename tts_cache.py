@@ -0,0 +1,270 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+from speech_pool import speech_pool, DEFAULT_VOICE
+from singleflight import SingleFlight
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CONFIG_DIR = os.path.join(BASE_DIR, "configs")
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(BASE_DIR, ".tts_cache"))
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+DEFAULT_FORMAT = "Riff16Khz16BitMonoPcm"
+TTS_TRANSIENT_CLIPS = int(os.getenv("TTS_TRANSIENT_CLIPS", "64"))  # one-off prefetched clips kept in memory
+
+# Hard-coded utterances in new.py/engine.py that are spoken regardless of config
+STATIC_PHRASES = [
+    "Hmm, that wasn't quite right. Let's try again.",
+    "Hmm, that wasn’t quite right. Let’s try again!",
+    "Almost there! Try repeating the sentence once more.",
+    "Hmm, that didn't sound like a spelling. Let's try again.",
+    "Hmm, I didn’t get that. Could you please try again?",
+    "This module is completed. Please select the next one.",
+    "Let's try a full sentence!",
+    "No applicable validation fields.",
+    "Great job!",
+    "Please try again.",
+    "Well done!",
+    "Let's try again.",
+]
+
+
+class PhraseCache:
+    """Content-addressed store of synthesized audio keyed on (voice, format, text).
+
+    Files live under `cache_dir`; the least recently used ones are deleted once
+    the directory grows past `max_bytes`.
+    """
+
+    def __init__(self, cache_dir=TTS_CACHE_DIR, max_bytes=TTS_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._total_bytes = None
+        self._sources = {}  # key -> (text, voice, format) for prefetched clips not yet on disk
+        self._renders = SingleFlight("tts")  # prefetch and /tts/<key> share one pending render per key
+        # Prefetched text that is not static (see is_static) lives here, not on disk
+        self._transient = OrderedDict()  # key -> audio, oldest first
+
+    def key(self, text, voice=DEFAULT_VOICE, output_format=DEFAULT_FORMAT):
+        return hashlib.sha256(f"{voice}\0{output_format}\0{text.strip()}".encode("utf-8")).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def get(self, text, voice=DEFAULT_VOICE, output_format=DEFAULT_FORMAT):
+        return self.get_by_key(self.key(text, voice, output_format))
+
+    def get_by_key(self, key):
+        path = self.path(key)
+        try:
+            with open(path, "rb") as f:
+                audio = f.read()
+        except OSError:
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)  # mtime doubles as the LRU clock
+        except OSError:
+            pass  # evicted since the read; the audio we have is still good
+        self.hits += 1
+        return audio
+
+    def put(self, text, audio, voice=DEFAULT_VOICE, output_format=DEFAULT_FORMAT):
+        key = self.key(text, voice, output_format)
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(audio)
+        os.replace(tmp_path, path)
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = self._scan_size()
+            else:
+                self._total_bytes += len(audio)
+            if self._total_bytes > self.max_bytes:
+                self._evict_locked()
+        return key
+
+    def get_or_synthesize(self, text, voice=DEFAULT_VOICE, output_format=DEFAULT_FORMAT):
+        key = self.key(text, voice, output_format)
+        audio = self.get_by_key(key)
+        if audio is None:
+            audio = self._renders.do(key, self._synthesize, key, text, voice, output_format)
+        return audio
+
+    def _render_transient(self, key, text, voice, output_format):
+        try:
+            audio = speech_pool.synthesize(text, voice=voice, output_format=output_format)
+            with self._lock:
+                self._transient[key] = audio
+                while len(self._transient) > TTS_TRANSIENT_CLIPS:
+                    self._transient.popitem(last=False)
+            return audio
+        finally:
+            with self._lock:
+                self._sources.pop(key, None)
+
+    def _transient_audio(self, key):
+        with self._lock:
+            return self._transient.get(key)
+
+    def _synthesize(self, key, text, voice, output_format):
+        # A render that finished between our cache miss and joining the flight is on disk already
+        try:
+            audio = self.get_by_key(key) if os.path.exists(self.path(key)) else None
+            if audio is None:
+                audio = speech_pool.synthesize(text, voice=voice, output_format=output_format)
+                self.put(text, audio, voice, output_format)
+            return audio
+        finally:
+            # Dropped on failure too, so failed prefetches do not pile up
+            with self._lock:
+                self._sources.pop(key, None)
+
+    def prefetch(self, text, voice=DEFAULT_VOICE, output_format=DEFAULT_FORMAT, spawn=None):
+        """Start rendering `text` in the background unless it is cached; returns its key.
+
+        `spawn` runs the render (e.g. socketio.start_background_task); defaults to a thread.
+        """
+        key = self.key(text, voice, output_format)
+        if not os.path.exists(self.path(key)) and self._transient_audio(key) is None:
+            with self._lock:
+                self._sources[key] = (text, voice, output_format)
+            if spawn is None:
+                spawn = lambda fn, *args: threading.Thread(target=fn, args=args, daemon=True).start()
+            spawn(self._render, text, voice, output_format)
+        return key
+
+    def get_or_render_key(self, key):
+        """Audio for a key from prefetch(); synthesizes now if the background render has not landed yet."""
+        audio = self._transient_audio(key) or self.get_by_key(key)
+        if audio is None:
+            with self._lock:
+                source = self._sources.get(key)
+            if source is not None:
+                audio = self._get_or_render(key, *source)
+            else:
+                # No source means the render landed (and dropped it) since the miss above
+                audio = self._transient_audio(key) or self.get_by_key(key)
+        return audio
+
+    def _get_or_render(self, key, text, voice, output_format):
+        if is_static(text):
+            return self.get_or_synthesize(text, voice, output_format)
+        # One-off text: rendered once for this learner, kept in memory only
+        return self._transient_audio(key) or self._renders.do(key, self._render_transient, key, text, voice, output_format)
+
+    def _render(self, text, voice, output_format):
+        try:
+            self._get_or_render(self.key(text, voice, output_format), text, voice, output_format)
+        except Exception as e:
+            logging.error(f"TTS prefetch failed for {text!r}: {e}")
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "bytes": self._total_bytes or 0}
+
+    def _files(self):
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                if not name.endswith(".tmp"):
+                    yield os.path.join(root, name)
+
+    def _scan_size(self):
+        return sum(os.path.getsize(p) for p in self._files())
+
+    def _evict_locked(self):
+        files = sorted(self._files(), key=os.path.getmtime)
+        total = sum(os.path.getsize(p) for p in files)
+        # Trim to 90% so we do not rescan on every following put
+        target = int(self.max_bytes * 0.9)
+        for path in files:
+            if total <= target:
+                break
+            size = os.path.getsize(path)
+            os.remove(path)
+            total -= size
+        self._total_bytes = total
+        logging.info(f"TTS cache trimmed to {total} bytes")
+
+
+phrase_cache = PhraseCache()
+
+
+def config_utterances(config):
+    """Every static string a module config can speak."""
+    texts = [config.get("welcome"), config.get("closing"), config.get("instruction")]
+    fields = list(config.get("fields", []))
+    for activity in config.get("activities", []):
+        fields.extend(activity.get("fields", []))
+    for field in fields:
+        texts.extend([field.get("prompt"), field.get("hint"), field.get("feedback_pass"), field.get("feedback_fail")])
+        texts.extend(field.get("prompt_pool", []))
+    logic = config.get("validation_logic") or {}
+    texts.extend([logic.get("feedback_pass"), logic.get("feedback_fail")])
+    texts.extend((config.get("post_summary_feedback") or {}).values())
+    # Prompts with {placeholders} depend on learner answers and cannot be pre-rendered
+    return [t for t in texts if isinstance(t, str) and t.strip() and "{" not in t]
+
+
+def static_phrases(config_dir=CONFIG_DIR):
+    """STATIC_PHRASES plus the utterances of every config under `config_dir`."""
+    texts = set(STATIC_PHRASES)
+    for root, _, names in os.walk(config_dir):
+        for name in sorted(names):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(root, name), "r") as f:
+                    texts.update(config_utterances(json.load(f)))
+            except ValueError as e:
+                logging.warning(f"Skipping {name}: {e}")
+    return texts
+
+
+_static = None
+_static_lock = threading.Lock()
+
+
+def is_static(text):
+    """Whether `text` is fixed module/config wording worth keeping in the phrase cache.
+
+    One-off speech (LLM acknowledgments, learner-specific prompts, summaries)
+    is synthesized directly so it cannot evict these.
+    """
+    global _static
+    if _static is None:
+        with _static_lock:
+            if _static is None:
+                _static = {t.strip() for t in static_phrases()}
+    return str(text or "").strip() in _static
+
+
+def precompute(config_dir=CONFIG_DIR, voice=DEFAULT_VOICE, output_format=DEFAULT_FORMAT):
+    texts = static_phrases(config_dir)
+    rendered = 0
+    for text in sorted(texts):
+        if phrase_cache.get(text, voice, output_format) is None:
+            phrase_cache.put(text, speech_pool.synthesize(text, voice=voice, output_format=output_format), voice, output_format)
+            rendered += 1
+    logging.info(f"TTS cache: {len(texts)} phrases, {rendered} newly rendered")
+    return rendered
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Pre-render static module utterances into the TTS cache")
+    parser.add_argument("--configs", default=CONFIG_DIR, help="Directory of module config JSON files")
+    parser.add_argument("--voice", default=DEFAULT_VOICE)
+    parser.add_argument("--format", default=DEFAULT_FORMAT, help="Azure SpeechSynthesisOutputFormat name")
+    args = parser.parse_args()
+
+    precompute(args.configs, args.voice, args.format)
@@ -0,0 +1,141 @@
+import os
+import logging
+
+import numpy as np
+
+from audio_codec import TARGET_RATE
+
+FRAME_MS = 30
+# Trailing silence that ends a turn grows with the speech heard so far: a one-word answer
+# ends after VAD_SHORT_SILENCE_SECONDS, while after VAD_LONG_SPEECH_SECONDS of speech the
+# learner is mid-answer and may pause for a second or more, so VAD_SILENCE_SECONDS applies
+VAD_SILENCE_SECONDS = float(os.getenv("VAD_SILENCE_SECONDS", "1.8"))
+VAD_SHORT_SILENCE_SECONDS = float(os.getenv("VAD_SHORT_SILENCE_SECONDS", "0.7"))
+VAD_LONG_SPEECH_SECONDS = float(os.getenv("VAD_LONG_SPEECH_SECONDS", "1.5"))
+VAD_MIN_SPEECH_SECONDS = float(os.getenv("VAD_MIN_SPEECH_SECONDS", "0.25"))  # ignores clicks and breaths
+VAD_MIN_ENERGY = float(os.getenv("VAD_MIN_ENERGY", "200"))  # int16 RMS below this is never speech
+VAD_ENERGY_RATIO = float(os.getenv("VAD_ENERGY_RATIO", "3.0"))  # speech must be this much louder than the noise floor
+VAD_PAD_MS = 150  # kept around trimmed speech so word onsets/endings are not clipped
+ZCR_UNVOICED = 0.25  # fricatives (s, f, th) are quiet but cross zero often
+
+
+def as_samples(pcm):
+    if isinstance(pcm, np.ndarray):
+        return pcm.astype(np.int16, copy=False).ravel()
+    return np.frombuffer(pcm, dtype=np.int16)
+
+
+def frame_features(samples, rate=TARGET_RATE, frame_ms=FRAME_MS):
+    """Per-frame RMS energy and zero-crossing rate of int16 samples (trailing partial frame dropped)."""
+    frame_len = int(rate * frame_ms / 1000)
+    count = len(samples) // frame_len
+    frames = samples[:count * frame_len].reshape(count, frame_len)
+    f = frames.astype(np.float32)
+    rms = np.sqrt(np.mean(f * f, axis=1))
+    signs = np.signbit(frames)
+    zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+    return rms, zcr
+
+
+def speech_mask(rms, zcr, noise_floor=None):
+    """Boolean speech/non-speech decision for each frame."""
+    if noise_floor is None:
+        noise_floor = float(np.percentile(rms, 10)) if len(rms) else 0.0
+    threshold = max(VAD_MIN_ENERGY, noise_floor * VAD_ENERGY_RATIO)
+    return (rms > threshold) | ((rms > threshold * 0.5) & (zcr > ZCR_UNVOICED))
+
+
+def trim_silence(pcm, rate=TARGET_RATE, pad_ms=VAD_PAD_MS):
+    """Drop leading and trailing silence; returns empty audio when no speech is found.
+
+    Accepts and returns the same kind of buffer: int16 numpy array or raw PCM bytes.
+    """
+    samples = as_samples(pcm)
+    rms, zcr = frame_features(samples, rate)
+    voiced = np.flatnonzero(speech_mask(rms, zcr))
+    frame_len = int(rate * FRAME_MS / 1000)
+    if len(voiced) == 0:
+        trimmed = samples[:0]
+    else:
+        pad = int(rate * pad_ms / 1000)
+        start = max(voiced[0] * frame_len - pad, 0)
+        end = min((voiced[-1] + 1) * frame_len + pad, len(samples))
+        trimmed = samples[start:end]
+    logging.info(f"VAD trimmed {len(samples) / rate:.2f}s to {len(trimmed) / rate:.2f}s")
+    return trimmed if isinstance(pcm, np.ndarray) else trimmed.tobytes()
+
+
+class EndpointDetector:
+    """Incremental end-of-utterance detection for audio arriving in blocks.
+
+    `feed()` returns True once at least `min_speech_seconds` of speech has been
+    heard and followed by enough silence: `short_silence_seconds` after a short
+    answer, rising to `silence_seconds` once `long_speech_seconds` of speech is in.
+    """
+
+    def __init__(self, rate=TARGET_RATE, silence_seconds=VAD_SILENCE_SECONDS, min_speech_seconds=VAD_MIN_SPEECH_SECONDS,
+                 short_silence_seconds=VAD_SHORT_SILENCE_SECONDS, long_speech_seconds=VAD_LONG_SPEECH_SECONDS):
+        self.rate = rate
+        self.frame_len = int(rate * FRAME_MS / 1000)
+        self.silence_frames = int(silence_seconds * 1000 / FRAME_MS)
+        self.short_silence_frames = min(int(short_silence_seconds * 1000 / FRAME_MS), self.silence_frames)
+        self.long_speech_frames = max(int(long_speech_seconds * 1000 / FRAME_MS), 1)
+        self.min_speech_frames = max(int(min_speech_seconds * 1000 / FRAME_MS), 1)
+        self._pending = np.zeros(0, dtype=np.int16)
+        self._rms = []
+        self.speech_frames = 0
+        self.trailing_silence = 0
+
+    def feed(self, pcm):
+        samples = np.concatenate([self._pending, as_samples(pcm)])
+        usable = len(samples) // self.frame_len * self.frame_len
+        self._pending = samples[usable:]
+        if not usable:
+            return self.done
+        rms, zcr = frame_features(samples[:usable], self.rate)
+        self._rms.extend(rms.tolist())
+        # Noise floor from the quietest frames heard so far
+        floor = float(np.percentile(self._rms, 10))
+        for is_speech in speech_mask(rms, zcr, noise_floor=floor):
+            if is_speech:
+                self.speech_frames += 1
+                self.trailing_silence = 0
+            else:
+                self.trailing_silence += 1
+        return self.done
+
+    @property
+    def heard_speech(self):
+        return self.speech_frames >= self.min_speech_frames
+
+    @property
+    def needed_silence(self):
+        """Frames of trailing silence that end the turn, given the speech heard so far."""
+        progress = min(self.speech_frames / self.long_speech_frames, 1.0)
+        return round(self.short_silence_frames + (self.silence_frames - self.short_silence_frames) * progress)
+
+    @property
+    def done(self):
+        return self.heard_speech and self.trailing_silence >= self.needed_silence
+
+
+def record_until_silence(max_duration, rate=TARGET_RATE, silence_seconds=VAD_SILENCE_SECONDS):
+    """Record from the default microphone until the learner stops talking or `max_duration` passes.
+
+    Returns trimmed int16 samples.
+    """
+    import sounddevice as sd
+
+    detector = EndpointDetector(rate, silence_seconds)
+    block = detector.frame_len * 4
+    max_blocks = int(max_duration * rate / block) + 1
+    blocks = []
+    with sd.InputStream(samplerate=rate, channels=1, dtype="int16", blocksize=block) as stream:
+        for _ in range(max_blocks):
+            data, _ = stream.read(block)
+            blocks.append(data.ravel().copy())
+            if detector.feed(data):
+                break
+    recording = np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.int16)
+    logging.info(f"Recorded {len(recording) / rate:.2f}s (limit {max_duration}s)")
+    return trim_silence(recording, rate)
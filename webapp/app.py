@@ -6,12 +6,14 @@ import sys
 #sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from new import ModuleRunner
+from config_registry import config_registry
+from metrics import instrument_flask
 
 app = Flask(__name__)
 socketio = SocketIO(app, cors_allowed_origins="*")
+instrument_flask(app)
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-CONFIG_BASE = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "configs"))
 UPLOAD_FOLDER = "uploads"
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
@@ -23,7 +25,7 @@ def ui_callback(payload):
 
 @app.route("/")
 def index():
-    folders = [f for f in os.listdir(CONFIG_BASE) if os.path.isdir(os.path.join(CONFIG_BASE, f))]
+    folders = config_registry.categories()
     return render_template("index.html", folders=folders)
 
 @app.route("/refresher")
@@ -41,21 +43,15 @@ def achiver():
 @app.route("/get-configs", methods=["POST"])
 def get_configs():
     folder = request.json.get("folder")
-    config_base = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "configs"))
-    path = os.path.join(config_base, folder)
-    configs = []
-    if os.path.exists(path):
-        configs = [{"id": idx, "name": f} for idx, f in enumerate(os.listdir(path)) if f.endswith(".json")]
+    configs = [{"id": idx, "name": f} for idx, f in enumerate(config_registry.list_category(folder))]
     return jsonify(configs)
 
 @app.route("/get-module", methods=["GET"])
 def get_configs_query():
     folder = request.args.get("type")
-    config_base = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "configs"))
-    path = os.path.join(config_base, folder)
     configs = []
-    if folder and os.path.exists(path):
-        configs = [{"id": idx, "name": f} for idx, f in enumerate(os.listdir(path)) if f.endswith(".json")]
+    if folder:
+        configs = [{"id": idx, "name": f} for idx, f in enumerate(config_registry.list_category(folder))]
     return jsonify(configs)
 
 # --- New endpoints for event-driven module running ---
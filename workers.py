@@ -0,0 +1,123 @@
+import os
+import time
+import logging
+import threading
+
+try:
+    from eventlet import patcher, tpool
+except ImportError:
+    patcher = tpool = None
+
+SPEECH_WORKERS = int(os.getenv("SPEECH_WORKERS", "8"))
+LLM_WORKERS = int(os.getenv("LLM_WORKERS", "8"))
+CODEC_WORKERS = int(os.getenv("CODEC_WORKERS", "4"))
+WORKER_QUEUE = int(os.getenv("WORKER_QUEUE", "32"))  # calls allowed to wait per pool before PoolSaturated
+
+
+class PoolSaturated(RuntimeError):
+    """Every worker is busy and the wait queue is full; the server answers 429."""
+
+
+def _hub_is_green():
+    return patcher is not None and patcher.is_monkey_patched("thread")
+
+
+class WorkerPool:
+    """At most `size` concurrent calls of one kind, with a bounded wait queue.
+
+    Under eventlet, `offload=True` runs the call on a native tpool thread so
+    blocking C code (the Azure SDK, PyAV) cannot stall the hub. Calls that
+    already yield through green sockets (co.chat, the ffmpeg subprocess) only
+    need the bound and stay on the calling greenlet. Without eventlet, calls
+    run on the caller's thread.
+    """
+
+    def __init__(self, name, size, max_queue=WORKER_QUEUE, offload=True):
+        self.name = name
+        self.size = size
+        self.max_queue = max_queue
+        self.offload = offload
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self.active = 0
+        self.waiting = 0
+        self.peak_waiting = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self.run_seconds = 0.0
+
+    @property
+    def saturated(self):
+        return self.active >= self.size and self.waiting >= self.max_queue
+
+    def run(self, fn, *args, **kwargs):
+        return self._run(self.offload, fn, args, kwargs)
+
+    def run_green(self, fn, *args, **kwargs):
+        """Like run(), but always on the calling greenlet (for calls that already yield, e.g. a green subprocess)."""
+        return self._run(False, fn, args, kwargs)
+
+    def _run(self, offload, fn, args, kwargs):
+        with self._lock:
+            if self.saturated:
+                self.rejected += 1
+                logging.warning(f"Worker pool '{self.name}' saturated ({self.active} running, {self.waiting} waiting)")
+                raise PoolSaturated(f"{self.name} workers are busy, try again shortly")
+            self.waiting += 1
+            self.peak_waiting = max(self.peak_waiting, self.waiting)
+
+        queued_at = time.monotonic()
+        self._slots.acquire()
+        started = time.monotonic()
+        with self._lock:
+            self.waiting -= 1
+            self.active += 1
+            self.wait_seconds += started - queued_at
+        ok = False
+        try:
+            if offload and _hub_is_green():
+                result = tpool.execute(fn, *args, **kwargs)
+            else:
+                result = fn(*args, **kwargs)
+            ok = True
+            return result
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.run_seconds += time.monotonic() - started
+                if ok:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+            self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            done = self.completed + self.failed
+            return {
+                "size": self.size,
+                "active": self.active,
+                "waiting": self.waiting,
+                "max_queue": self.max_queue,
+                "peak_waiting": self.peak_waiting,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "avg_wait_ms": round(self.wait_seconds / done * 1000, 1) if done else 0.0,
+                "avg_run_ms": round(self.run_seconds / done * 1000, 1) if done else 0.0
+            }
+
+
+speech_workers = WorkerPool("speech", SPEECH_WORKERS)
+llm_workers = WorkerPool("llm", LLM_WORKERS, offload=False)
+codec_workers = WorkerPool("codec", CODEC_WORKERS)
+
+if tpool is not None:
+    # One native thread for every call that may be offloaded at the same time
+    tpool.set_num_threads(SPEECH_WORKERS + CODEC_WORKERS)
+
+
+def pool_stats():
+    return {pool.name: pool.stats() for pool in (speech_workers, llm_workers, codec_workers)}